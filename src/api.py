@@ -0,0 +1,389 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from src import db_source
+from src.cube import get_sales_cube
+from src.data_handler import get_data_version, load_data
+from src.recent_orders import get_recent_orders
+from src.utils import DEFAULT_BASELINE_QUARTERS, RUNNING_BASELINES, compute_dashboard_snapshot, get_available_quarters, quarter_key_from_label
+
+# Configuración del servicio (variables de entorno)
+API_SOURCE = os.environ.get("SALES_API_SOURCE", "simulated") # Fuente de datos por defecto (ver load_data)
+# Fuentes que los clientes pueden pedir con ?source= (separadas por comas). Cada una se lee
+# siempre de su ruta configurada (SALES_FILE_PATH / SALES_DATA_DIR): la API no acepta rutas
+API_SOURCES = [s for s in os.environ.get("SALES_API_SOURCES", API_SOURCE).split(",") if s]
+API_WORKERS = int(os.environ.get("SALES_API_WORKERS", "4")) # Hilos para el trabajo con pandas
+API_CACHE_TTL = float(os.environ.get("SALES_API_CACHE_TTL", "300")) # Segundos de vida de una respuesta
+API_CACHE_MAX_ENTRIES = int(os.environ.get("SALES_API_CACHE_MAX_ENTRIES", "256")) # Respuestas en caché (LRU)
+
+# Valores de los filtros tal como aparecen en la barra lateral -> valores internos
+_LICENSE_TYPE_VALUES = {'Licencia': 'License', 'Renovación': 'Maintenance Renewal'}
+_ALL_VALUES = ('', '(Todos)', 'Todos', 'All')
+
+_executor = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="sales-api")
+_cache_lock = threading.Lock()
+_response_cache = OrderedDict() # clave -> (versión, instante de expiración, cuerpo JSON); orden = uso reciente
+_cache_stats = {"hits": 0, "misses": 0, "coalesced": 0, "expired": 0, "evictions": 0}
+_in_flight = {} # (clave, versión) -> asyncio.Future de la respuesta que se está calculando
+
+
+class BadRequest(ValueError):
+    """Parámetro de consulta inválido (se responde con 400)."""
+
+
+def _parse_filters(params):
+    """
+    Traduce los parámetros de consulta a los filtros globales del dashboard.
+    Admite los valores de la barra lateral ('Licencia', 'Renovación', 'Todos') y los internos.
+
+    Args:
+        params (Mapping): Parámetros de la consulta.
+
+    Returns:
+        dict: Filtros {'Product', 'License_Type', 'Region'} (None = sin filtrar).
+    """
+    filters = {}
+    for column, name in (('Product', 'product'), ('License_Type', 'license_type'), ('Region', 'region')):
+        value = params.get(name, '')
+        filters[column] = None if value in _ALL_VALUES else value
+    if filters['License_Type'] is not None:
+        filters['License_Type'] = _LICENSE_TYPE_VALUES.get(filters['License_Type'], filters['License_Type'])
+    return filters
+
+
+def _parse_quarters(params):
+    quarters = [q for q in params.get('quarters', '').split(',') if q]
+    for label in quarters:
+        try:
+            quarter_key_from_label(label)
+        except (ValueError, IndexError):
+            raise BadRequest(f"Trimestre inválido: {label!r} (formato esperado: 2016Q2).")
+    return quarters
+
+
+def _parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"Fecha inválida: {value!r} (formato esperado: AAAA-MM-DD).")
+
+
+def _parse_int(params, name, default, minimum=0):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise BadRequest(f"El parámetro {name} debe ser un entero.")
+    if value < minimum:
+        raise BadRequest(f"El parámetro {name} debe ser al menos {minimum}.")
+    return value
+
+
+def _quarter_end(label):
+    # Último día del trimestre (como la fecha de análisis de la barra lateral)
+    return pd.Period(label, freq='Q').end_time.date()
+
+
+def _parse_source(params):
+    """
+    Fuente pedida por el cliente, limitada a las configuradas en el servidor.
+
+    Args:
+        params (Mapping): Parámetros de la consulta.
+
+    Returns:
+        str: Tipo de fuente (ver load_data).
+
+    Raises:
+        BadRequest: Si se indica una ruta o una fuente no permitida.
+    """
+    if 'file' in params:
+        raise BadRequest("El parámetro file no está permitido: cada fuente se lee de su ruta configurada.")
+    source = params.get('source') or API_SOURCE
+    if source != API_SOURCE and source not in API_SOURCES:
+        raise BadRequest(f"Fuente no permitida: {source!r} (permitidas: {', '.join(dict.fromkeys([API_SOURCE] + API_SOURCES))}).")
+    return source
+
+
+def _query_key(params):
+    # Parámetros normalizados: ni el orden de la query string ni el de los trimestres crean entradas distintas
+    normalized = {k: v for k, v in params.items() if k != 'source'} # La fuente ya va en la clave
+    if 'quarters' in normalized:
+        normalized['quarters'] = ','.join(sorted(q for q in normalized['quarters'].split(',') if q))
+    return tuple(sorted(normalized.items()))
+
+
+def _data_version(source):
+    """
+    Datos y versión para una fuente permitida: la versión publicada por la caché de carga, o
+    la fecha de modificación del archivo para la base de datos.
+
+    Args:
+        source (str): Tipo de fuente (ver _parse_source).
+
+    Returns:
+        tuple: (DataFrame o None para la base de datos, identificador de versión).
+    """
+    if source == "database" and db_source.database_available():
+        return None, f"db:{os.stat(db_source.DEFAULT_DB_PATH).st_mtime_ns}"
+    df = load_data(source_type="simulated" if source == "database" else source)
+    return df, get_data_version(df)
+
+
+def _compute(endpoint, params, df, version):
+    """
+    Calcula la respuesta de un endpoint (se ejecuta en el pool de hilos).
+
+    Args:
+        endpoint (str): Nombre del endpoint.
+        params (Mapping): Parámetros de la consulta.
+        df (pd.DataFrame): Datos de la fuente resueltos por _data_version (None = base de datos).
+        version (str): Versión de esos datos.
+
+    Returns:
+        bytes: Cuerpo JSON.
+    """
+    filters = _parse_filters(params)
+    quarters = _parse_quarters(params)
+    approximate = params.get('approximate', 'false').lower() in ('1', 'true', 'yes')
+    use_database = df is None
+
+    if use_database:
+        available = db_source.query_available_quarters(filters)
+    else:
+        filtered_cube = get_sales_cube(df).filter(filters)
+        available = get_available_quarters(filtered_cube)
+
+    # Fecha de análisis: la indicada, o el fin del último trimestre seleccionado/disponible (como la barra lateral)
+    if 'as_of' in params:
+        as_of = _parse_date(params['as_of'])
+    elif quarters:
+        as_of = _quarter_end(sorted(quarters)[-1])
+    elif available:
+        as_of = _quarter_end(available[-1])
+    else:
+        as_of = datetime.date.today()
+
+    if endpoint == 'quarters':
+        data = available
+    elif endpoint == 'last-orders':
+        n = _parse_int(params, 'n', 5, minimum=1)
+        offset = _parse_int(params, 'offset', 0)
+        if use_database:
+            orders = db_source.query_last_n_orders(filters, n, offset=offset)
+        else:
+            orders = get_recent_orders(df).last_n(df, filters, n, offset)
+        data = orders.to_dict(orient='records')
+    else:
+        if use_database:
+            snapshot = db_source.query_dashboard_snapshot(filters, quarters, as_of)
+        else:
+            snapshot = compute_dashboard_snapshot(filtered_cube, quarters, as_of, approximate)
+        if endpoint == 'qtd-metrics':
+            data = snapshot.qtd_metrics
+        elif endpoint == 'seller-performance-over-time':
+            granularity = params.get('granularity', 'quarter')
+            if granularity not in ('month', 'quarter'):
+                raise BadRequest("El parámetro granularity debe ser 'month' o 'quarter'.")
+            data = snapshot.seller_performance_over_time(granularity).to_dict(orient='records')
+        elif endpoint == 'running-totals':
+            # Curvas de referencia opcionales del último trimestre seleccionado (ej. baselines=prior_quarter,average)
+            baselines = [b for b in params.get('baselines', '').split(',') if b]
+            unknown = [b for b in baselines if b not in RUNNING_BASELINES]
+            if unknown:
+                raise BadRequest(f"Curvas de referencia desconocidas: {', '.join(unknown)} (válidas: {', '.join(RUNNING_BASELINES)}).")
+            granularity = params.get('granularity', 'week')
+            if granularity not in ('week', 'day'):
+                raise BadRequest("El parámetro granularity debe ser 'week' o 'day'.")
+            average_quarters = _parse_int(params, 'average_quarters', DEFAULT_BASELINE_QUARTERS, minimum=1)
+            data = snapshot.running_totals_compared(quarters, baselines, average_quarters, granularity).to_dict(orient='records')
+        else:
+            data = getattr(snapshot, _SNAPSHOT_ENDPOINTS[endpoint]).to_dict(orient='records')
+
+    body = {
+        'data_version': version,
+        'filters': filters,
+        'as_of': as_of.isoformat(),
+        'data': data,
+    }
+    # Los valores de numpy (ej. np.int64 de las métricas) se convierten a tipos de Python
+    return json.dumps(body, default=lambda value: value.item() if hasattr(value, 'item') else str(value)).encode()
+
+
+def _cached(key, version):
+    """
+    Busca una respuesta válida en la caché (misma versión de los datos y sin expirar).
+
+    Args:
+        key (tuple): Clave de la consulta.
+        version (str): Versión actual de los datos (None = no comprobarla).
+
+    Returns:
+        bytes or None: Cuerpo de la respuesta.
+    """
+    with _cache_lock:
+        entry = _response_cache.get(key)
+        if entry is None:
+            return None
+        entry_version, expires, body = entry
+        if time.monotonic() > expires or (version is not None and entry_version != version):
+            del _response_cache[key]
+            _cache_stats["expired"] += 1
+            return None
+        _response_cache.move_to_end(key)
+        return body
+
+
+def _store(key, version, body):
+    """
+    Guarda una respuesta, descarta las de versiones anteriores de los datos y expulsa las
+    menos usadas recientemente por encima de API_CACHE_MAX_ENTRIES.
+
+    Args:
+        key (tuple): Clave de la consulta.
+        version (str): Versión de los datos con la que se calculó.
+        body (bytes): Cuerpo JSON.
+    """
+    with _cache_lock:
+        # Misma fuente con otra versión: sus respuestas ya no son válidas
+        source = key[0]
+        for old_key in [k for k, (v, _, _) in _response_cache.items() if k[0] == source and v != version]:
+            del _response_cache[old_key]
+        _response_cache[key] = (version, time.monotonic() + API_CACHE_TTL, body)
+        while len(_response_cache) > API_CACHE_MAX_ENTRIES:
+            _response_cache.popitem(last=False)
+            _cache_stats["evictions"] += 1
+
+
+async def _respond(endpoint, params):
+    """
+    Respuesta de un endpoint con caché y agrupación de peticiones: las consultas idénticas que
+    llegan mientras otra se calcula esperan su resultado en lugar de repetir el trabajo.
+
+    Args:
+        endpoint (str): Nombre del endpoint.
+        params (Mapping): Parámetros de la consulta.
+
+    Returns:
+        tuple: (cuerpo JSON, estado de caché: 'hit', 'miss' o 'coalesced').
+    """
+    source = _parse_source(params)
+    key = (source, endpoint, _query_key(params))
+    loop = asyncio.get_running_loop()
+    # Los datos y su versión se resuelven una vez en el pool (load_data puede leer archivos o
+    # calcular huellas); el cálculo usa esos mismos datos, coherentes con la clave de caché
+    df, version = await loop.run_in_executor(_executor, _data_version, source)
+    body = _cached(key, version)
+    if body is not None:
+        with _cache_lock:
+            _cache_stats["hits"] += 1
+        return body, 'hit'
+
+    # La versión forma parte de la clave: una petición con datos nuevos no espera un cálculo con
+    # los anteriores. Si el cálculo que se esperaba se cancela, se vuelve a intentar
+    flight_key = key + (version,)
+    while flight_key in _in_flight:
+        future = _in_flight[flight_key]
+        with _cache_lock:
+            _cache_stats["coalesced"] += 1
+        try:
+            return await asyncio.shield(future), 'coalesced'
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise # Se canceló esta petición, no la que se esperaba
+
+    future = loop.create_future()
+    _in_flight[flight_key] = future
+    with _cache_lock:
+        _cache_stats["misses"] += 1
+    try:
+        body = await loop.run_in_executor(_executor, _compute, endpoint, params, df, version)
+        _store(key, version, body)
+        future.set_result(body)
+        return body, 'miss'
+    except Exception as e:
+        future.set_exception(e)
+        future.exception() # Marca la excepción como recuperada si nadie más esperaba
+        raise
+    finally:
+        # Petición cancelada (CancelledError) u otra BaseException: los que esperan no se quedan colgados
+        if not future.done():
+            future.cancel()
+        del _in_flight[flight_key]
+
+
+def get_api_cache_info():
+    """
+    Devuelve estadísticas de uso de la caché de respuestas.
+
+    Returns:
+        dict: Número de entradas, límite, TTL y contadores.
+    """
+    with _cache_lock:
+        return {
+            "entries": len(_response_cache),
+            "max_entries": API_CACHE_MAX_ENTRIES,
+            "ttl_seconds": API_CACHE_TTL,
+            "in_flight": len(_in_flight),
+            **_cache_stats,
+        }
+
+
+def clear_api_cache():
+    """
+    Vacía la caché de respuestas.
+    """
+    with _cache_lock:
+        _response_cache.clear()
+
+
+# Endpoints servidos desde un campo del snapshot de paneles
+_SNAPSHOT_ENDPOINTS = {
+    'country-performance': 'country_performance',
+    'city-performance': 'city_performance',
+    'quarterly': 'quarterly',
+    'running-totals': 'running_totals',
+    'seller-performance': 'seller_performance',
+}
+ENDPOINTS = ['qtd-metrics', 'last-orders', 'quarters', 'seller-performance-over-time'] + list(_SNAPSHOT_ENDPOINTS)
+
+
+def _endpoint(name):
+    async def handler(request):
+        try:
+            body, cache_status = await _respond(name, dict(request.query_params))
+        except BadRequest as e:
+            return Response(json.dumps({'error': str(e)}), status_code=400, media_type='application/json')
+        return Response(body, media_type='application/json', headers={'X-Cache': cache_status})
+    return handler
+
+
+async def health(request):
+    return Response(json.dumps({'status': 'ok', 'cache': get_api_cache_info()}), media_type='application/json')
+
+
+# Aplicación ASGI: uvicorn src.api:app
+app = Starlette(routes=[Route(f"/{name}", _endpoint(name)) for name in ENDPOINTS] + [Route("/health", health)])
+
+
+if __name__ == "__main__":
+    # Servicio local: python -m src.api --port 8000
+    # Ejemplo: curl "http://127.0.0.1:8000/qtd-metrics?product=Product%201&region=UK&quarters=2016Q1,2016Q2"
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="API local con las agregaciones del dashboard de ventas.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interfaz en la que escuchar.")
+    parser.add_argument("--port", type=int, default=8000, help="Puerto.")
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
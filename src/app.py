@@ -8,18 +8,33 @@ if project_root not in sys.path:
 import streamlit as st # Importa la librería principal de Streamlit
 import pandas as pd # Importa Pandas para manipulación de datos
 import datetime # Importa datetime para manejar fechas
+import uuid # Identificador de sesión para el registro de rendimiento
+from concurrent.futures import ThreadPoolExecutor # Construcción en paralelo de las estructuras derivadas
 
 # Importa las funciones personalizadas desde los módulos locales
-from src.data_handler import load_data 
+from src.data_handler import load_data, get_memory_report, get_data_cache_info, get_data_version, DEFAULT_FOLDER_PATH
+from src import db_source # Consultas con filtros y agregaciones resueltas en la base de datos
+from src import report # Snapshots precalculados por lotes (python -m src.report)
+from src.recent_orders import get_recent_orders, RECENT_PAGE_SIZE # Índice de órdenes por fecha y combinación de filtros
+from src.cube import get_sales_cube # Cubo pre-agregado del que se sirven los paneles
+from src import distinct_sketch # Conteos únicos aproximados (HyperLogLog)
+from src import instrumentation # Tiempos por etapa (activados con SALES_PROFILE)
+from src import compute_backend # Motor de las agregaciones en memoria (pandas, DuckDB o Polars)
 # Importa todas las funciones de utilidad y trazado
-from src.utils import calculate_qtd_metrics, get_last_n_orders, calculate_country_performance, get_quarterly_data, get_running_totals_by_week, get_seller_performance_data, get_available_quarters, calculate_city_performance, get_seller_performance_over_time_data
-from src.plots import plot_running_totals, plot_quarterly_metrics, plot_country_performance, plot_seller_performance, plot_city_performance, plot_seller_performance_over_time
+from src.utils import compute_dashboard_snapshot, get_available_quarters, bucket_top_k, RUNNING_BASELINES, DEFAULT_BASELINE_QUARTERS
+from src.plots import plot_running_totals, plot_quarterly_metrics, plot_country_performance, plot_seller_performance, plot_city_performance, plot_seller_performance_over_time, LOCATION_TOP_K, SELLER_TOP_N, get_figure_cache_info
 
 # --- Configuración de la página de Streamlit ---
 # Configura el layout de la página como 'wide' para aprovechar el ancho completo
 # y el título de la página que aparece en la pestaña del navegador.
 st.set_page_config(layout="wide", page_title="Reporte de Ventas de Licencias de Software")
 
+# Con SALES_PROFILE activado se miden las etapas de esta ejecución del script
+# (carga, filtros, agregaciones, figuras) para el panel "Rendimiento" y el registro JSON lines
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
+instrumentation.start_rerun(st.session_state["session_id"])
+
 # --- Título Principal del Dashboard ---
 # Muestra el título principal del reporte en la parte superior de la aplicación.
 st.title("REPORTE DE VENTAS DE LICENCIAS DE SOFTWARE") 
@@ -28,24 +43,123 @@ st.title("REPORTE DE VENTAS DE LICENCIAS DE SOFTWARE")
 st.sidebar.header("Opciones de Datos") # Encabezado para la sección de opciones de datos
 data_source = st.sidebar.selectbox(
     "Seleccionar fuente de datos:", # Etiqueta para el selector
-    ("simulated", "csv", "excel", "hardcoded", "database"),
-    help="Elige de dónde cargar los datos de ventas. 'simulated' generará datos aleatorios." # Texto de ayuda
+    ("simulated", "csv", "csv_stream", "excel", "folder", "hardcoded", "database", "report"),
+    help="Elige de dónde cargar los datos de ventas. 'simulated' generará datos aleatorios. 'csv_stream' agrega un CSV grande por fragmentos sin cargarlo entero en memoria. 'folder' carga todas las exportaciones CSV/Excel de una carpeta. 'report' sirve los paneles precalculados por python -m src.report." # Texto de ayuda
 )
 
+# Con 'folder' se indica la carpeta o patrón glob de las exportaciones (ej. data/ventas_*.xlsx)
+source_path = None
+if data_source == "folder":
+    source_path = st.sidebar.text_input("Carpeta o patrón de archivos:", value=DEFAULT_FOLDER_PATH)
+
+# Con la fuente 'database' no se carga la tabla en memoria: los filtros y agregaciones
+# se resuelven en SQL y solo vuelven los resultados agregados.
+use_database = data_source == "database" and db_source.database_available()
+if data_source == "database" and not use_database:
+    st.sidebar.warning(f"Base de datos no encontrada en {db_source.DEFAULT_DB_PATH}. Se usan datos simulados.")
+
+# Con la fuente 'report' los paneles salen de los snapshots precalculados (por ejemplo, en un
+# proceso nocturno): no se cargan filas ni se agrega nada durante la ejecución del script.
+use_report = data_source == "report" and report.report_available()
+if data_source == "report" and not use_report:
+    st.sidebar.warning(f"No hay snapshots precalculados en {report.DEFAULT_REPORT_DIR}. Se usan datos simulados.")
+report_store = report.load_report() if use_report else None
+if use_report:
+    st.sidebar.caption(f"Snapshot al {report_store.as_of:%d/%m/%Y} (calculado el {report_store.manifest['created'][:10]}).")
+use_precomputed = use_database or use_report # Sin tabla en memoria
+
 # Carga los datos utilizando la función load_data del data_handler.
 # El tipo de fuente de datos se selecciona desde la barra lateral.
-df_sales = load_data(source_type=data_source) 
-
-# Asegurarse de que la columna 'Date' es de tipo datetime para operaciones de filtrado y análisis
-df_sales['Date'] = pd.to_datetime(df_sales['Date'])
+# load_data usa una caché compartida entre sesiones y ya entrega 'Date' como datetime,
+# por lo que df_sales no debe modificarse en el sitio.
+# Con 'csv_stream' el avance de la lectura por fragmentos se muestra en la barra lateral
+# (solo en la primera carga; las siguientes salen de la caché).
+progress_callback = None
+if data_source == "csv_stream":
+    progress_bar = st.sidebar.empty()
+    progress_callback = lambda fraction, rows: progress_bar.progress(fraction, text=f"Leyendo CSV: {rows:,} filas")
+with instrumentation.stage("load_data"):
+    df_sales = None if use_precomputed else load_data(
+        source_type="simulated" if data_source in ("database", "report") else data_source,
+        file_path=source_path,
+        progress=progress_callback
+    )
+if progress_callback is not None:
+    progress_bar.empty()
+
+# Informe de memoria por columna antes/después de aplicar el esquema tipado
+memory_report_df = get_memory_report()
+if memory_report_df is not None and not use_precomputed:
+    with st.sidebar.expander("Memoria de los datos"):
+        st.dataframe(memory_report_df, hide_index=True)
+
+# En la primera carga de una versión de los datos, sus estructuras derivadas (cubo e índice
+# de órdenes por fecha) son independientes entre sí y se construyen a la vez; en las
+# ejecuciones siguientes ya están registradas y cada llamada es inmediata.
+if not use_precomputed:
+    with instrumentation.stage("estructuras"):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(lambda build: build(df_sales), (get_sales_cube, get_recent_orders)))
+
+# Clientes y SAMs únicos: conteo exacto o estimación HyperLogLog fusionando los sketches de
+# las celdas del cubo. Con la base de datos el conteo es siempre exacto (COUNT DISTINCT).
+approximate_distinct = st.sidebar.checkbox(
+    "Conteos únicos aproximados (HyperLogLog)",
+    value=distinct_sketch.DISTINCT_MODE == "approx",
+    disabled=use_precomputed,
+    help=f"Estima clientes y gerentes únicos con un error típico de ±{distinct_sketch.relative_error(distinct_sketch.precision_for_error()):.1%}."
+) and not use_precomputed
+# Motor de las agregaciones en memoria: solo se ofrecen los instalados (DuckDB y Polars son opcionales)
+backend_options = compute_backend.available_backends()
+compute_engine = st.sidebar.selectbox(
+    "Motor de cálculo:",
+    backend_options,
+    index=backend_options.index(compute_backend.COMPUTE_BACKEND) if compute_backend.COMPUTE_BACKEND in backend_options else 0,
+    disabled=use_precomputed,
+    help="Motor que agrega las filas del cubo para los paneles. DuckDB y Polars agregan en varios hilos; los resultados son idénticos."
+)
+# Número de órdenes recientes a mostrar; "Cargar más" lo amplía página a página
+st.sidebar.number_input("Órdenes recientes a mostrar:", min_value=1, max_value=1000, value=5, key="num_orders")
+
+def _load_more_orders():
+    # Se ejecuta antes de la siguiente ejecución del script, cuando aún puede cambiarse el widget
+    st.session_state["num_orders"] = min(st.session_state["num_orders"] + RECENT_PAGE_SIZE, 1000)
+
+def _fetch_orders(n, offset):
+    # Una página de órdenes recientes de la fuente activa, saltando las offset ya cargadas
+    if use_database:
+        return db_source.query_last_n_orders(global_filters, n, offset=offset)
+    if use_report:
+        return report_store.last_orders(global_filters, n, offset)
+    return get_recent_orders(df_sales).last_n(df_sales, global_filters, n, offset)
+
+def _orders_version():
+    # Versión de los datos: las páginas ya cargadas solo valen mientras no cambie
+    if use_database:
+        return os.stat(db_source.DEFAULT_DB_PATH).st_mtime_ns
+    if use_report:
+        return report_store.manifest['created']
+    return get_data_version(df_sales)
+
+distinct_note = (
+    f"Aproximado (HyperLogLog, error típico ±{distinct_sketch.relative_error(distinct_sketch.precision_for_error()):.1%})"
+    if approximate_distinct else "Exacto"
+)
 
 # --- Filtros Globales ---
 st.sidebar.header("Filtros Globales") # Encabezado para la sección de filtros
 
 # Filtro por Producto (Partner)
+# Los productos salen de los datos cargados (las exportaciones pueden tener otros productos)
+if use_database:
+    available_products = db_source.query_distinct_values('Product')
+elif use_report:
+    available_products = report_store.values('Product')
+else:
+    available_products = get_sales_cube(df_sales).values('Product')
 product_filter = st.sidebar.radio(
     "Producto (Partner):", # Etiqueta del filtro 
-    ("Product 1", "Product 2") # Opciones de productos (mantener nombres originales si son identificadores de producto)
+    sorted(available_products) # Opciones de productos (mantener nombres originales si son identificadores de producto)
 )
 
 # Filtro por Tipo de Licencia o Renovación (License or MR)
@@ -63,7 +177,13 @@ else:
 
 # Filtro por Región
 # Obtiene las regiones únicas del DataFrame y añade "Todos" como opción para seleccionar todas.
-regions = ["Todos"] + sorted(df_sales['Region'].unique().tolist())
+if use_database:
+    available_regions = db_source.query_distinct_values('Region')
+elif use_report:
+    available_regions = report_store.values('Region')
+else:
+    available_regions = get_sales_cube(df_sales).values('Region')
+regions = ["Todos"] + sorted(available_regions)
 region_filter = st.sidebar.selectbox(
     "Región:", # Etiqueta del filtro 
     regions # Lista de regiones disponibles
@@ -76,18 +196,30 @@ else:
 
 
 # --- Aplicar Filtros Globales ---
-filtered_df = df_sales[df_sales['Product'] == product_filter].copy() # Filtrar por producto
-
-if internal_license_type_filter != "(Todos)":
-    filtered_df = filtered_df[filtered_df['License_Type'] == internal_license_type_filter].copy()
-
-if internal_region_filter != "All":
-    filtered_df = filtered_df[filtered_df['Region'] == internal_region_filter].copy()
+# Filtros activos (None significa "sin filtrar"); se usan tanto en las consultas SQL
+# como en el índice de filtros de las celdas del cubo (una vez por versión de los datos)
+global_filters = {
+    'Product': product_filter,
+    'License_Type': None if internal_license_type_filter == "(Todos)" else internal_license_type_filter,
+    'Region': None if internal_region_filter == "All" else internal_region_filter,
+}
+
+# Los paneles agregados se sirven desde el cubo (celdas por dimensiones y día), construido
+# una vez por versión de los datos; las últimas órdenes salen de las órdenes recientes por
+# combinación de filtros. Ambos se actualizan por delta al añadir transacciones.
+with instrumentation.stage("filtros"):
+    sales_cube = None if use_precomputed else get_sales_cube(df_sales)
+    filtered_cube = None if use_precomputed else sales_cube.filter(global_filters)
 
 
 # --- Selector de Períodos para KPIs y Running Totals ---
 st.sidebar.header("Períodos para KPIs y Gráficos") 
-all_available_quarters = get_available_quarters(filtered_df)
+if use_database:
+    all_available_quarters = db_source.query_available_quarters(global_filters)
+elif use_report:
+    all_available_quarters = report_store.available_quarters(global_filters)
+else:
+    all_available_quarters = get_available_quarters(filtered_cube)
 
 # Por defecto, selecciona los últimos 4 trimestres si existen
 default_selected_quarters = []
@@ -141,6 +273,119 @@ else:
         # Fallback a la fecha actual si no hay datos disponibles en absoluto
         current_analysis_date = pd.Timestamp(datetime.date.today()) 
 
+# Los snapshots precalculados tienen una fecha de corte fija para las métricas QTD
+if use_report:
+    current_analysis_date = pd.Timestamp(report_store.as_of)
+    current_analysis_quarter_label = str(current_analysis_date.to_period('Q'))
+
+# Todos los paneles se calculan juntos: en memoria, en un único recorrido de las celdas
+# filtradas del cubo; con la base de datos, con las consultas de cada panel en paralelo
+with instrumentation.stage("snapshot"):
+    if use_database:
+        snapshot = db_source.query_dashboard_snapshot(global_filters, selected_quarters, current_analysis_date.date())
+    elif use_report:
+        snapshot = report_store.snapshot(global_filters, selected_quarters)
+    else:
+        snapshot = compute_dashboard_snapshot(
+            filtered_cube,
+            selected_quarters_labels=selected_quarters,
+            current_date=current_analysis_date.date(),
+            approximate=approximate_distinct,
+            backend=compute_engine
+        )
+
+
+# --- Paneles con controles propios ---
+# Cada panel con widgets locales es un fragmento de Streamlit: al cambiar uno de sus widgets
+# solo se vuelve a ejecutar ese panel. Sus dependencias (versión de los datos y filtros, ya
+# resueltas en el snapshot) se declaran como argumentos y se conservan de la última ejecución completa.
+@st.fragment
+def location_panel(snapshot):
+    """
+    Panel de rendimiento por país o ciudad con su selector de vista y el detalle de "Otros".
+
+    Args:
+        snapshot (DashboardSnapshot): Resultados de los paneles para los datos y filtros actuales.
+    """
+    st.subheader("Rendimiento por Ubicación") # Nuevo subtítulo más general
+
+    # Selector para alternar entre vista por país y por ciudad
+    location_view_mode = st.radio(
+        "Ver rendimiento por:", 
+        ("País", "Ciudad") # Opciones traducidas
+    )
+    # Ubicaciones con barra propia; el resto se agrupa en "Otros" (detalle en la tabla de abajo)
+    location_top_k = st.number_input("Ubicaciones a mostrar:", min_value=1, max_value=100, value=LOCATION_TOP_K)
+
+    if location_view_mode == "País":
+        location_column = 'Region'
+        location_performance_df = snapshot.country_performance
+        if not location_performance_df.empty:
+            plot_country_performance(location_performance_df, top_k=location_top_k)
+        else:
+            st.info("No hay datos de rendimiento por país para mostrar con los filtros seleccionados.") # Mensaje traducido
+    else: # "Ciudad"
+        location_column = 'City'
+        location_performance_df = snapshot.city_performance
+        if not location_performance_df.empty:
+            plot_city_performance(location_performance_df, top_k=location_top_k)
+        else:
+            st.info("No hay datos de rendimiento por ciudad para mostrar con los filtros seleccionados.") # Mensaje traducido
+
+    # Desglose de la barra "Otros": las ubicaciones agrupadas, en una tabla desplazable
+    _, other_locations_df = bucket_top_k(location_performance_df, location_column, location_top_k)
+    if not other_locations_df.empty:
+        with st.expander(f"Detalle de Otros ({len(other_locations_df)} ubicaciones)"):
+            st.dataframe(
+                other_locations_df[[location_column, 'Formatted_Amount']].rename(
+                    columns={location_column: location_view_mode, 'Formatted_Amount': 'Monto'}
+                ),
+                hide_index=True, height=240
+            )
+
+
+@st.fragment
+def seller_panel(snapshot):
+    """
+    Panel de desempeño de vendedores con sus selectores de vista, número de vendedores y granularidad.
+
+    Args:
+        snapshot (DashboardSnapshot): Resultados de los paneles para los datos y filtros actuales.
+    """
+    st.subheader("Desempeño de Ventas por Gerente de Ventas") 
+
+    # Selector para tipo de visualización de vendedores
+    seller_view_mode = st.radio(
+        "Ver desempeño de vendedor por:", 
+        ("Agregado por País/Producto/Tipo de Venta", "A lo Largo del Tiempo") 
+    )
+    # Vendedores con serie propia; el resto se agrupa en "Otros" antes de construir la figura
+    seller_top_n = st.number_input("Vendedores a mostrar:", min_value=1, max_value=100, value=SELLER_TOP_N)
+
+    if seller_view_mode == "Agregado por País/Producto/Tipo de Venta":
+        seller_performance_df = snapshot.seller_performance
+        if not seller_performance_df.empty:
+            plot_seller_performance(seller_performance_df, top_n=seller_top_n)
+        else:
+            st.info("No hay datos de desempeño de vendedores para mostrar con los filtros seleccionados.") 
+    else: # "A lo Largo del Tiempo"
+        # Selector para la granularidad temporal (Mes o Trimestre)
+        time_granularity = st.selectbox(
+            "Granularidad de tiempo:",
+            ("Trimestre", "Mes"), 
+            help="Elige si ver el desempeño por mes o por trimestre." # Texto de ayuda
+        )
+
+        # Ajustar el valor interno de la granularidad
+        internal_time_granularity = 'quarter' if time_granularity == 'Trimestre' else 'month'
+
+        seller_time_performance_df = snapshot.seller_performance_over_time(internal_time_granularity)
+        if not seller_time_performance_df.empty:
+            plot_seller_performance_over_time(seller_time_performance_df, internal_time_granularity, top_n=seller_top_n)
+        else:
+            st.info("No hay datos de desempeño de vendedores en el tiempo para mostrar con los filtros seleccionados.")
+
+
 # --- Layout del Dashboard: Columnas Principales ---
 col1, col2 = st.columns([0.7, 0.3]) 
 
@@ -148,29 +393,8 @@ with col1:
     # --- Sección de Métricas Clave (KPIs) ---
     st.subheader(f"Métricas Clave para {current_analysis_quarter_label if current_analysis_quarter_label else 'Período Seleccionado'}") # El ultimo trimestre
     
-    # Filtrar el df para calcular los KPIs solo para el trimestre seleccionado como "actual"
-    kpi_df_for_calc = filtered_df
-    if current_analysis_date:
-        kpi_current_year = current_analysis_date.year
-        kpi_current_quarter_num = (current_analysis_date.month - 1) // 3 + 1
-        
-        if kpi_current_quarter_num == 1:
-            # Convertir a Timestamp para asegurar la compatibilidad de tipos
-            kpi_qtd_start = pd.Timestamp(f'{kpi_current_year}-01-01')
-        elif kpi_current_quarter_num == 2:
-            kpi_qtd_start = pd.Timestamp(f'{kpi_current_year}-04-01')
-        elif kpi_current_quarter_num == 3:
-            kpi_qtd_start = pd.Timestamp(f'{kpi_current_year}-07-01')
-        else: # Q4
-            kpi_qtd_start = pd.Timestamp(f'{kpi_current_year}-10-01')
-        
-        # Filtrar solo las transacciones del trimestre de current_analysis_date hasta esa fecha
-        # Ambas variables (filtered_df['Date'] y kpi_qtd_start/current_analysis_date) son ahora Timestamps.
-        kpi_df_for_calc = filtered_df[(filtered_df['Date'] >= kpi_qtd_start) & (filtered_df['Date'] <= current_analysis_date)].copy()
-    
-    # Pasar current_analysis_date como objeto date, ya que calculate_qtd_metrics lo convierte a pd.Timestamp internamente
-    # No es necesario convertirlo aquí, la función ya lo maneja.
-    qtd_metrics = calculate_qtd_metrics(kpi_df_for_calc, current_analysis_date.date())
+    # Las métricas QTD van del inicio del trimestre de current_analysis_date hasta esa fecha
+    qtd_metrics = snapshot.qtd_metrics
 
     st.markdown("---") # Separador visual
 
@@ -181,9 +405,9 @@ with col1:
     with kpi_col2:
         st.metric(label="Transacciones Trimestrales (QTD)", value=qtd_metrics["QTD Transactions"]) 
     with kpi_col3:
-        st.metric(label="Clientes Activos Trimestre (QTD)", value=qtd_metrics["QTD Active Clients"])
+        st.metric(label="Clientes Activos Trimestre (QTD)", value=qtd_metrics["QTD Active Clients"], help=distinct_note)
     with kpi_col4:
-        st.metric(label="Gerentes de Venta Únicos (QTD)", value=qtd_metrics["QTD SAMs"])
+        st.metric(label="Gerentes de Venta Únicos (QTD)", value=qtd_metrics["QTD SAMs"], help=distinct_note)
 
     kpi_col1_2, kpi_col2_2, kpi_col3_2, kpi_col4_2 = st.columns(4)
     with kpi_col1_2:
@@ -200,89 +424,124 @@ with col1:
     st.subheader("Totales Acumulados") 
     # Pasa los trimestres seleccionados a la función de trazado
     if selected_quarters:
-        df_running_totals = get_running_totals_by_week(filtered_df, selected_quarters)
-        plot_running_totals(df_running_totals, selected_quarters)
+        # Curvas de referencia del último trimestre seleccionado: salen de las curvas de todos los
+        # trimestres ya calculadas en el snapshot, sin volver a agregar. Las curvas diarias solo
+        # existen con los datos en memoria (la base de datos y los snapshots guardan semanas).
+        daily_curves = snapshot.running_curves is not None and snapshot.running_curves.position_column == 'Day_Number'
+        running_col1, running_col2 = st.columns([1, 2])
+        running_axis = running_col1.radio("Eje:", ("Semana", "Día"), horizontal=True, disabled=not daily_curves)
+        running_baselines = running_col2.multiselect(
+            "Comparar con:",
+            list(RUNNING_BASELINES),
+            format_func=lambda name: RUNNING_BASELINES[name].format(n="N"),
+            disabled=snapshot.running_curves is None
+        )
+        average_quarters = DEFAULT_BASELINE_QUARTERS
+        if 'average' in running_baselines:
+            average_quarters = st.number_input("Trimestres a promediar (N):", min_value=2, max_value=12, value=DEFAULT_BASELINE_QUARTERS)
+        plot_running_totals(
+            snapshot.running_totals_compared(
+                selected_quarters, running_baselines, average_quarters,
+                granularity='day' if running_axis == "Día" and daily_curves else 'week'
+            ),
+            selected_quarters
+        )
     else:
         st.info("Por favor, selecciona al menos un trimestre para visualizar los Totales Acumulados.")
 
 
 with col2:
-    # --- Sección de Últimas 5 Órdenes ---
-    st.subheader("Últimas 5 Órdenes")
-    last_orders_df = get_last_n_orders(filtered_df)
+    # --- Sección de Últimas N Órdenes ---
+    num_orders = st.session_state["num_orders"]
+    st.subheader(f"Últimas {num_orders} Órdenes")
+    # Fusión de los finales de las particiones del índice por fecha (sin ordenar la tabla).
+    # Las órdenes ya cargadas se guardan en la sesión: "Cargar más" solo pide la página
+    # siguiente (offset = órdenes cargadas) en lugar de volver a leer desde la primera.
+    with instrumentation.stage("ultimas_ordenes"):
+        orders_key = (data_source, _orders_version(), tuple(global_filters.items()))
+        pages = st.session_state.get("order_pages")
+        if pages is None or pages["key"] != orders_key:
+            pages = {"key": orders_key, "orders": None, "complete": False}
+        loaded = pages["orders"]
+        if loaded is None or (len(loaded) < num_orders and not pages["complete"]):
+            offset = 0 if loaded is None else len(loaded)
+            page = _fetch_orders(num_orders - offset, offset)
+            pages["orders"] = page if loaded is None else pd.concat([loaded, page])
+            pages["complete"] = len(page) < num_orders - offset # La fuente no tiene más órdenes
+        st.session_state["order_pages"] = pages
+        last_orders_df = pages["orders"].iloc[:num_orders]
     if not last_orders_df.empty:
         last_orders_df['Amount'] = last_orders_df['Amount'].apply(lambda x: f"$ {x:,.0f}")
         # Renombra las columnas para la tabla si es necesario
-        st.table(last_orders_df.rename(columns={'Company': 'Empresa', 'Amount': 'Monto'})) 
+        last_orders_table = last_orders_df.rename(columns={'Company': 'Empresa', 'Amount': 'Monto'})
+        if num_orders <= 10:
+            st.table(last_orders_table)
+        else:
+            st.dataframe(last_orders_table, height=320) # Con muchas órdenes, tabla desplazable
+        # El snapshot por lotes solo guarda la primera página: no se ofrece otra si no la tiene
+        has_more = (
+            report_store.has_more_orders(global_filters, num_orders) if use_report
+            else len(pages["orders"]) > num_orders or (len(last_orders_df) == num_orders and not pages["complete"])
+        )
+        if has_more:
+            st.button(f"Cargar {RECENT_PAGE_SIZE} más", on_click=_load_more_orders)
     else:
         st.info("No hay órdenes recientes para mostrar con los filtros seleccionados.") 
 
     st.markdown("---") # Separador visual
 
     # --- Sección de Rendimiento por País/Ciudad ---
-    st.subheader("Rendimiento por Ubicación") # Nuevo subtítulo más general
-    
-    # Selector para alternar entre vista por país y por ciudad
-    location_view_mode = st.radio(
-        "Ver rendimiento por:", 
-        ("País", "Ciudad") # Opciones traducidas
-    )
-
-    if location_view_mode == "País":
-        country_performance_df = calculate_country_performance(filtered_df)
-        if not country_performance_df.empty:
-            plot_country_performance(country_performance_df)
-        else:
-            st.info("No hay datos de rendimiento por país para mostrar con los filtros seleccionados.") # Mensaje traducido
-    else: # "Ciudad"
-        city_performance_df = calculate_city_performance(filtered_df)
-        if not city_performance_df.empty:
-            plot_city_performance(city_performance_df)
-        else:
-            st.info("No hay datos de rendimiento por ciudad para mostrar con los filtros seleccionados.") # Mensaje traducido
+    location_panel(snapshot)
 
 
 # --- Gráfico de Métricas Trimestrales Detalladas ---
 st.subheader("Métricas Trimestrales") 
-quarterly_metrics_df = get_quarterly_data(filtered_df)
+quarterly_metrics_df = snapshot.quarterly
 if selected_quarters:
     plot_quarterly_metrics(quarterly_metrics_df, selected_quarters)
+    st.caption(f"Clientes activos y gerentes únicos: {distinct_note.lower()}.")
 else:
     st.info("Por favor, selecciona al menos un trimestre para visualizar las Métricas Trimestrales.") # Mensaje traducido
 
 # --- Nuevo Gráfico: Desempeño de Vendedores ---
-st.subheader("Desempeño de Ventas por Gerente de Ventas") 
+seller_panel(snapshot)
 
-# Selector para tipo de visualización de vendedores
-seller_view_mode = st.radio(
-    "Ver desempeño de vendedor por:", 
-    ("Agregado por País/Producto/Tipo de Venta", "A lo Largo del Tiempo") 
-)
-
-if seller_view_mode == "Agregado por País/Producto/Tipo de Venta":
-    seller_performance_df = get_seller_performance_data(filtered_df)
-    if not seller_performance_df.empty:
-        plot_seller_performance(seller_performance_df)
-    else:
-        st.info("No hay datos de desempeño de vendedores para mostrar con los filtros seleccionados.") 
-else: # "A lo Largo del Tiempo"
-    # Selector para la granularidad temporal (Mes o Trimestre)
-    time_granularity = st.selectbox(
-        "Granularidad de tiempo:",
-        ("Trimestre", "Mes"), 
-        help="Elige si ver el desempeño por mes o por trimestre." # Texto de ayuda
-    )
-    
-    # Ajustar el valor interno de la granularidad
-    internal_time_granularity = 'quarter' if time_granularity == 'Trimestre' else 'month'
-
-    seller_time_performance_df = get_seller_performance_over_time_data(filtered_df, internal_time_granularity)
-    if not seller_time_performance_df.empty:
-        plot_seller_performance_over_time(seller_time_performance_df, internal_time_granularity)
-    else:
-        st.info("No hay datos de desempeño de vendedores en el tiempo para mostrar con los filtros seleccionados.")
 
 # --- Nota al pie de página sobre la conversión de moneda ---
 st.markdown("""
     <small>Los montos se muestran como dinero entregado a los proveedores. Para el Producto 1 se muestra en USD; para el Producto 2 en GBP (Libras Esterlinas). Los montos en EUR para los países europeos se convierten a una tasa de 1.35.</small>
 """, unsafe_allow_html=True) # Permite renderizar HTML en el markdown
+
+# --- Indicador de memoria del proceso ---
+# Todas las sesiones comparten la misma versión (de solo lectura) de los datos: la memoria
+# residente debería crecer poco con cada sesión nueva.
+memory_gauge = instrumentation.memory_gauge()
+with st.sidebar.expander("Memoria del proceso"):
+    if memory_gauge['rss_bytes'] is None:
+        st.caption("No se puede medir la memoria residente en esta plataforma (instala psutil).")
+    else:
+        gauge_cols = st.columns(2)
+        gauge_cols[0].metric("Memoria residente", f"{memory_gauge['rss_bytes'] / 1e6:,.0f} MB")
+        gauge_cols[1].metric("Sesiones activas", memory_gauge['sessions'])
+        st.scatter_chart(memory_gauge['samples'], x='Sesiones', y='Memoria residente (MB)', height=200)
+    data_cache_info = get_data_cache_info()
+    st.caption(
+        f"Datos compartidos: {data_cache_info['entries']} versiones en caché "
+        f"({data_cache_info['bytes'] / 1e6:.1f} MB), {data_cache_info['live_versions']} en uso"
+        + (f"; versión actual {get_data_version(df_sales)[:8]}" if df_sales is not None else "")
+    )
+
+# --- Panel de Rendimiento ---
+# Desglose por etapa de esta ejecución (vacío si SALES_PROFILE no está activado)
+profile_stages = instrumentation.finish_rerun()
+if profile_stages:
+    with st.sidebar.expander("Rendimiento"):
+        st.dataframe(instrumentation.stages_table(profile_stages), hide_index=True)
+        if instrumentation.PROFILE_LOG_PATH:
+            st.caption(f"Registro por etapa en {instrumentation.PROFILE_LOG_PATH}")
+        figure_cache_info = get_figure_cache_info()
+        st.caption(
+            f"Caché de figuras: {figure_cache_info['hits']} aciertos, {figure_cache_info['misses']} fallos, "
+            f"{figure_cache_info['entries']} figuras ({figure_cache_info['bytes'] / 1e6:.1f} de "
+            f"{figure_cache_info['max_bytes'] / 1e6:.0f} MB), {figure_cache_info['evictions']} expulsiones"
+        )
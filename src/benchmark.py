@@ -0,0 +1,320 @@
+import argparse
+import datetime
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+from src import compute_backend
+from src import plots
+from src import utils
+from src.cube import build_sales_cube
+
+# Tamaños de datos por defecto (filas simuladas)
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_REPEAT = 3 # Ejecuciones cronometradas por caso (se guarda la más rápida)
+DEFAULT_THRESHOLD = 0.20 # Aumento relativo a partir del cual se marca una regresión
+_MIN_SECONDS = 0.005 # Por debajo de este tiempo las diferencias se consideran ruido
+
+_SELECTED_QUARTERS = ['2015Q3', '2015Q4', '2016Q1', '2016Q2'] # Últimos trimestres de la simulación
+_CURRENT_DATE = datetime.date(2016, 6, 30)
+
+
+class _StreamlitSink:
+    """
+    Sustituto de streamlit para src/plots.py: en lugar de dibujar, serializa cada figura a
+    JSON como lo hace st.plotly_chart (to_dict y to_json sin validar, el trabajo de enviarla
+    al navegador) y descarta los avisos.
+    """
+
+    def __init__(self):
+        self.figure_bytes = 0
+
+    def plotly_chart(self, fig, **kwargs):
+        self.figure_bytes += len(pio.to_json(fig.to_dict(), validate=False))
+
+    def warning(self, *args, **kwargs):
+        pass
+
+
+def _measure(function, repeat):
+    """
+    Mide una función: el mejor tiempo de varias ejecuciones y el pico de memoria de una
+    ejecución adicional bajo tracemalloc (que ralentiza la ejecución, por eso va aparte).
+
+    Args:
+        function (callable): Función sin argumentos a medir.
+        repeat (int): Ejecuciones cronometradas.
+
+    Returns:
+        tuple: (segundos, bytes de pico).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def _fresh(data):
+    # Objeto nuevo que comparte los datos: evita que la memoización de
+    # compute_dashboard_snapshot (por objeto) convierta las mediciones en aciertos de caché
+    return data.take(None) if utils._is_cube(data) else data.copy(deep=False)
+
+
+def _aggregation_cases(df, cube):
+    """
+    Casos de las agregaciones de src/utils.py sobre las filas y sobre el cubo.
+
+    Args:
+        df (pd.DataFrame): Datos simulados con las claves de periodo.
+        cube (SalesCube): Cubo de df.
+
+    Returns:
+        list: Tuplas (nombre, función sin argumentos).
+    """
+    cases = [
+        ('utils.prepare_sales_data', lambda: utils.prepare_sales_data(df.drop(columns=utils.PERIOD_KEY_COLUMNS))),
+        ('cube.build_sales_cube', lambda: build_sales_cube(df)),
+        ('utils.get_last_n_orders[rows]', lambda: utils.get_last_n_orders(_fresh(df))),
+    ]
+    for label, data in (('rows', df), ('cube', cube)):
+        cases += [
+            (f'utils.calculate_qtd_metrics[{label}]', lambda data=data: utils.calculate_qtd_metrics(_fresh(data), _CURRENT_DATE)),
+            (f'utils.calculate_country_performance[{label}]', lambda data=data: utils.calculate_country_performance(_fresh(data))),
+            (f'utils.calculate_city_performance[{label}]', lambda data=data: utils.calculate_city_performance(_fresh(data))),
+            (f'utils.get_quarterly_data[{label}]', lambda data=data: utils.get_quarterly_data(_fresh(data))),
+            (f'utils.get_running_totals_by_week[{label}]', lambda data=data: utils.get_running_totals_by_week(_fresh(data), _SELECTED_QUARTERS)),
+            (f'utils.get_running_totals_by_week[{label}+baselines]', lambda data=data: utils.get_running_totals_by_week(
+                _fresh(data), _SELECTED_QUARTERS, baselines=list(utils.RUNNING_BASELINES))),
+            (f'utils.get_seller_performance_data[{label}]', lambda data=data: utils.get_seller_performance_data(_fresh(data))),
+            (f'utils.get_seller_performance_over_time_data[{label}]', lambda data=data: utils.get_seller_performance_over_time_data(_fresh(data), 'month')),
+            (f'utils.get_available_quarters[{label}]', lambda data=data: utils.get_available_quarters(data)),
+            (f'utils.compute_dashboard_snapshot[{label}]', lambda data=data: utils.compute_dashboard_snapshot(
+                _fresh(data), _SELECTED_QUARTERS, _CURRENT_DATE)),
+        ]
+    return cases
+
+
+def _backend_cases(df, cube, backends):
+    """
+    Casos de compute_dashboard_snapshot (las agregaciones de todos los paneles) con cada motor
+    de cálculo, sobre las filas y sobre el cubo.
+
+    Args:
+        df (pd.DataFrame): Datos simulados con las claves de periodo.
+        cube (SalesCube): Cubo de df.
+        backends (list): Motores a comparar (ver compute_backend.available_backends).
+
+    Returns:
+        list: Tuplas (nombre, función sin argumentos).
+    """
+    return [
+        (f'utils.compute_dashboard_snapshot[{label}/{backend}]', lambda data=data, backend=backend: utils.compute_dashboard_snapshot(
+            _fresh(data), _SELECTED_QUARTERS, _CURRENT_DATE, backend=backend))
+        for label, data in (('rows', df), ('cube', cube))
+        for backend in backends
+    ]
+
+
+def check_conformance(df, cube, backends):
+    """
+    Comprueba que todos los motores producen exactamente los mismos paneles que pandas
+    (valores, tipos, orden e índices).
+
+    Args:
+        df (pd.DataFrame): Datos simulados con las claves de periodo.
+        cube (SalesCube): Cubo de df.
+        backends (list): Motores a comparar con pandas.
+
+    Returns:
+        list: Descripción de cada diferencia encontrada (vacía si todos coinciden).
+    """
+    fields = ['last_orders', 'country_performance', 'city_performance', 'quarterly', 'running_totals',
+              'seller_performance', 'seller_performance_by_month', 'seller_performance_by_quarter']
+    differences = []
+    for label, data in (('rows', df), ('cube', cube)):
+        for approximate in (False, True):
+            expected = utils.compute_dashboard_snapshot(_fresh(data), _SELECTED_QUARTERS, _CURRENT_DATE, approximate, backend='pandas')
+            for backend in backends:
+                if backend == 'pandas':
+                    continue
+                case = f"{label}/{backend}{' (aprox.)' if approximate else ''}"
+                snapshot = utils.compute_dashboard_snapshot(_fresh(data), _SELECTED_QUARTERS, _CURRENT_DATE, approximate, backend=backend)
+                if snapshot.qtd_metrics != expected.qtd_metrics:
+                    differences.append(f"{case}: qtd_metrics {snapshot.qtd_metrics} != {expected.qtd_metrics}")
+                for field in fields:
+                    left, right = getattr(snapshot, field), getattr(expected, field)
+                    if left is None or right is None:
+                        if left is not right:
+                            differences.append(f"{case}: {field} solo existe con un motor")
+                        continue
+                    try:
+                        pd.testing.assert_frame_equal(left, right, obj=field)
+                    except AssertionError as e:
+                        differences.append(f"{case}: {str(e).splitlines()[0]}")
+    return differences
+
+
+def _plot_cases(cube):
+    """
+    Casos de los constructores de figuras de src/plots.py (construcción + serialización JSON),
+    sin caché de figuras y con la figura ya en caché.
+
+    Args:
+        cube (SalesCube): Cubo de los datos simulados.
+
+    Returns:
+        list: Tuplas (nombre, función sin argumentos).
+    """
+    snapshot = utils.compute_dashboard_snapshot(cube, _SELECTED_QUARTERS, _CURRENT_DATE)
+    builders = [
+        ('plots.plot_running_totals', lambda: plots.plot_running_totals(snapshot.running_totals, _SELECTED_QUARTERS)),
+        ('plots.plot_quarterly_metrics', lambda: plots.plot_quarterly_metrics(snapshot.quarterly, _SELECTED_QUARTERS)),
+        ('plots.plot_country_performance', lambda: plots.plot_country_performance(snapshot.country_performance)),
+        ('plots.plot_city_performance', lambda: plots.plot_city_performance(snapshot.city_performance)),
+        ('plots.plot_seller_performance', lambda: plots.plot_seller_performance(snapshot.seller_performance)),
+        ('plots.plot_seller_performance_over_time', lambda: plots.plot_seller_performance_over_time(
+            snapshot.seller_performance_over_time('month'), 'month')),
+    ]
+    cases = []
+    for name, build in builders:
+        # Sin caché: construcción completa; con caché: reenvío de las figuras ya construidas
+        cases.append((name, lambda build=build: (plots.clear_figure_cache(), build())))
+        cases.append((f'{name}[cache]', build))
+    return cases
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, seed=42, backends=None):
+    """
+    Ejecuta todos los casos para cada tamaño de datos.
+
+    Args:
+        sizes (list): Número de filas simuladas de cada escala.
+        repeat (int): Ejecuciones cronometradas por caso.
+        seed (int): Semilla de generate_simulated_data.
+        backends (list): Motores de cálculo a comparar (con su conformidad frente a pandas),
+                         o None para medir solo el motor por defecto.
+
+    Returns:
+        dict: {'meta': entorno de la ejecución, 'results': lista de {name, rows, seconds, peak_bytes},
+               'conformance': diferencias entre motores por tamaño}.
+    """
+    sink = _StreamlitSink()
+    original_st = plots.st
+    plots.st = sink # Las figuras se construyen y serializan sin un servidor de Streamlit
+    results = []
+    conformance = {}
+    try:
+        for rows in sizes:
+            start = time.perf_counter()
+            df = utils.prepare_sales_data(utils.generate_simulated_data(rows, seed=seed))
+            print(f"{rows:,} filas generadas en {time.perf_counter() - start:.1f} s.")
+            cube = build_sales_cube(df)
+            cases = _aggregation_cases(df, cube)
+            if backends:
+                differences = check_conformance(df, cube, backends)
+                conformance[str(rows)] = differences
+                print(f"  Conformidad de {', '.join(backends)}: " + ("idénticos" if not differences else f"{len(differences)} diferencias"))
+                for difference in differences:
+                    print(f"    {difference}")
+                cases += _backend_cases(df, cube, backends)
+            for name, function in cases + _plot_cases(cube):
+                seconds, peak = _measure(function, repeat)
+                results.append({'name': name, 'rows': rows, 'seconds': seconds, 'peak_bytes': peak})
+                print(f"  {name:<55} {seconds * 1000:>10.2f} ms {peak / 1e6:>10.1f} MB")
+    finally:
+        plots.st = original_st
+    meta = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'seed': seed,
+        'backends': backends or [compute_backend.COMPUTE_BACKEND],
+    }
+    return {'meta': meta, 'results': results, 'conformance': conformance}
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compara dos ejecuciones caso a caso (mismo nombre y tamaño).
+
+    Args:
+        baseline (dict): Resultados de referencia (formato de run_benchmarks).
+        current (dict): Resultados nuevos.
+        threshold (float): Aumento relativo de tiempo o memoria que se considera regresión.
+
+    Returns:
+        pd.DataFrame: Una fila por caso común con los tiempos, picos, cocientes y 'Regression'.
+    """
+    columns = ['name', 'rows', 'seconds', 'peak_bytes']
+    merged = pd.DataFrame(baseline['results'])[columns].merge(
+        pd.DataFrame(current['results'])[columns], on=['name', 'rows'], suffixes=('_baseline', '_current')
+    )
+    merged['time_ratio'] = merged['seconds_current'] / merged['seconds_baseline']
+    merged['memory_ratio'] = merged['peak_bytes_current'] / merged['peak_bytes_baseline'].where(merged['peak_bytes_baseline'] > 0)
+    slower = (merged['time_ratio'] > 1 + threshold) & (merged['seconds_current'] > _MIN_SECONDS)
+    bigger = merged['memory_ratio'] > 1 + threshold
+    merged['Regression'] = np.select([slower & bigger, slower, bigger], ['tiempo+memoria', 'tiempo', 'memoria'], '')
+    return merged
+
+
+def _print_comparison(comparison):
+    for row in comparison.itertuples(index=False):
+        flag = f"  <-- REGRESIÓN ({row.Regression})" if row.Regression else ""
+        print(
+            f"{row.name:<55} {row.rows:>11,} {row.seconds_baseline * 1000:>10.2f} -> {row.seconds_current * 1000:>10.2f} ms"
+            f" (x{row.time_ratio:.2f}){flag}"
+        )
+
+
+if __name__ == "__main__":
+    # python -m src.benchmark --sizes 1000 100000 --output benchmark.json
+    # python -m src.benchmark --sizes 1000 100000 --compare benchmark.json
+    # python -m src.benchmark --sizes 1000000 --backends pandas duckdb polars
+    parser = argparse.ArgumentParser(description="Mide las agregaciones de src/utils.py y las figuras de src/plots.py.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Filas simuladas de cada escala.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Ejecuciones cronometradas por caso.")
+    parser.add_argument("--output", default=None, help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--compare", default=None, help="Archivo JSON de referencia con el que comparar.")
+    parser.add_argument("--current", default=None, help="Con --compare: resultados ya guardados en lugar de ejecutar.")
+    parser.add_argument("--backends", nargs="+", default=None,
+                        help="Motores de cálculo a comparar (pandas, duckdb, polars); comprueba que dan resultados idénticos.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Aumento relativo que se marca como regresión.")
+    args = parser.parse_args()
+
+    if args.current:
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        current = run_benchmarks(args.sizes, args.repeat, backends=args.backends)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"Resultados guardados en {args.output}.")
+    if any(current.get('conformance', {}).values()):
+        print("Los motores de cálculo no producen resultados idénticos.")
+        sys.exit(1)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparison = compare_results(baseline, current, args.threshold)
+        _print_comparison(comparison)
+        regressions = int((comparison['Regression'] != '').sum())
+        print(f"{regressions} regresiones sobre {len(comparison)} casos (umbral {args.threshold:.0%}).")
+        sys.exit(1 if regressions else 0)
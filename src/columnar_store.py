@@ -0,0 +1,89 @@
+import os
+
+import pandas as pd
+
+# Sufijo del archivo columnar que se guarda junto al archivo de origen
+# (ej. data/Dataset_Prueba.xlsx -> data/Dataset_Prueba.xlsx.arrow)
+SIDECAR_SUFFIX = ".arrow"
+# Clave de los metadatos del esquema Arrow donde se guarda la huella del archivo de origen
+_FINGERPRINT_KEY = b"source_fingerprint"
+
+
+def sidecar_path(file_path):
+    """
+    Devuelve la ruta de la copia columnar (Arrow IPC/Feather) asociada a un archivo de origen.
+
+    Args:
+        file_path (str): Ruta al archivo Excel o CSV de origen.
+
+    Returns:
+        str: Ruta del archivo columnar.
+    """
+    return file_path + SIDECAR_SUFFIX
+
+
+def read_sidecar(file_path, fingerprint, columns=None):
+    """
+    Lee la copia columnar de un archivo de origen usando memory-mapping.
+    Solo se usa si la huella guardada coincide con la del archivo de origen actual;
+    en caso contrario (o si no existe) devuelve None para que se vuelva a ingerir.
+
+    Args:
+        file_path (str): Ruta al archivo Excel o CSV de origen.
+        fingerprint (str): Huella (hash del contenido) del archivo de origen actual.
+        columns (list): Columnas a leer. Si es None, se leen todas.
+
+    Returns:
+        pd.DataFrame or None: Datos leídos de la copia columnar, o None si no es válida.
+    """
+    import pyarrow as pa # Dependencia opcional: si falta, el llamador cae al parseo directo
+
+    path = sidecar_path(file_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        # El memory-map evita copiar el archivo a memoria: Arrow referencia directamente las páginas
+        with pa.memory_map(path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            metadata = reader.schema.metadata or {}
+            if metadata.get(_FINGERPRINT_KEY) != fingerprint.encode():
+                return None # Copia obsoleta: el archivo de origen cambió
+            table = reader.read_all()
+        if columns is not None:
+            table = table.select([c for c in columns if c in table.column_names])
+        # split_blocks evita consolidar columnas en bloques 2D (menos copias al convertir)
+        return table.to_pandas(split_blocks=True)
+    except (OSError, pa.ArrowInvalid) as e:
+        print(f"Aviso: no se pudo leer la copia columnar {path}: {e}. Se volverá a generar.")
+        return None
+
+
+def write_sidecar(df, file_path, fingerprint):
+    """
+    Escribe una copia columnar tipada (Arrow IPC sin compresión, apta para memory-map)
+    junto al archivo de origen, etiquetada con la huella de dicho archivo.
+
+    Args:
+        df (pd.DataFrame): Datos ya parseados y tipados.
+        file_path (str): Ruta al archivo Excel o CSV de origen.
+        fingerprint (str): Huella (hash del contenido) del archivo de origen.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_FINGERPRINT_KEY] = fingerprint.encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Se escribe en un archivo temporal y se renombra para que un lector concurrente
+    # nunca vea una copia a medio escribir
+    path = sidecar_path(file_path)
+    tmp_path = path + ".tmp"
+    try:
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Aviso: no se pudo escribir la copia columnar {path}: {e}.")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,245 @@
+import os
+import warnings
+import functools
+
+import numpy as np
+import pandas as pd
+
+from src.frame_registry import FrameRegistry
+
+# Motor de las pasadas pesadas de compute_dashboard_snapshot: 'pandas', 'duckdb' o 'polars'.
+# DuckDB y Polars son dependencias opcionales (multihilo); si faltan se usa pandas.
+COMPUTE_BACKEND = os.environ.get("SALES_COMPUTE_BACKEND", "pandas").lower()
+
+_polars_columns = FrameRegistry() # DataFrame -> {columna: pl.Series} ya convertidas a Polars
+
+
+@functools.lru_cache(maxsize=None)
+def _result_dtype(dtype):
+    # Tipo que da una suma por grupos de pandas (conserva el ancho de los enteros; booleanos a int64)
+    return pd.Series(np.zeros(1, dtype=dtype)).groupby([0]).sum().dtype
+
+
+def _as_dtype(values, dtype):
+    # astype no reordena categóricas con los mismos valores en otro orden (las considera
+    # iguales): set_categories sí recodifica según el orden original
+    if isinstance(dtype, pd.CategoricalDtype) and isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.set_categories(dtype.categories, ordered=dtype.ordered)
+    return values.astype(dtype)
+
+
+def _restore_dtypes(result, frame, keys, measures, extra_keys):
+    """
+    Devuelve el agregado de un motor externo con los tipos que produciría pandas (claves
+    categóricas con sus categorías originales, sumas con el ancho de pandas), de modo que los paneles
+    derivados sean idénticos con cualquier motor.
+
+    Args:
+        result (pd.DataFrame): Agregado devuelto por el motor.
+        frame (pd.DataFrame): Datos de entrada del agregado.
+        keys (list): Columnas de agrupación.
+        measures (list): Columnas sumadas.
+        extra_keys (dict): Claves adicionales (nombre -> array) que no son columnas de frame.
+
+    Returns:
+        pd.DataFrame: Columnas keys + extra_keys + measures con los tipos de pandas.
+    """
+    return pd.DataFrame({
+        **{k: _as_dtype(result[k], frame[k].dtype) for k in keys},
+        **{k: result[k].astype(values.dtype) for k, values in extra_keys.items()},
+        **{m: result[m].fillna(0).astype(_result_dtype(frame[m].dtype)) for m in measures},
+    })
+
+
+class PandasBackend:
+    """
+    Motor por defecto: groupby de pandas (un solo hilo).
+    """
+
+    name = 'pandas'
+
+    def aggregate(self, frame, keys, measures, extra_keys=None):
+        """
+        Suma las medidas por la combinación de claves (solo combinaciones observadas; las
+        filas con alguna clave nula se descartan).
+
+        Args:
+            frame (pd.DataFrame): Filas (o celdas del cubo) con las claves y las medidas.
+            keys (list): Columnas de agrupación.
+            measures (list): Columnas a sumar.
+            extra_keys (dict): Claves adicionales calculadas aparte (nombre -> array de la
+                               longitud de frame), ej. la marca de pertenencia al QTD.
+
+        Returns:
+            pd.DataFrame: Una fila por combinación, columnas keys + extra_keys + measures.
+        """
+        group_keys = [frame[k] for k in keys] + [
+            pd.Series(values, index=frame.index, name=name) for name, values in (extra_keys or {}).items()
+        ]
+        return frame.groupby(group_keys, observed=True, sort=False)[measures].sum().reset_index()
+
+    def nunique_by(self, frame, column, by):
+        """
+        Valores distintos (no nulos) de una columna por cada valor de otra.
+
+        Args:
+            frame (pd.DataFrame): Filas de ventas.
+            column (str): Columna cuyos valores distintos se cuentan (ej. 'Company').
+            by (str): Columna de agrupación (ej. 'Quarter_Key').
+
+        Returns:
+            pd.Series: Conteo por valor de by (índice by, enteros de 64 bits).
+        """
+        return frame.groupby(by, observed=True)[column].nunique()
+
+    def nunique(self, frame, column, mask):
+        """
+        Valores distintos (no nulos) de una columna en las filas marcadas.
+
+        Args:
+            frame (pd.DataFrame): Filas de ventas.
+            column (str): Columna cuyos valores distintos se cuentan.
+            mask (np.ndarray): Máscara booleana de filas.
+
+        Returns:
+            int: Número de valores distintos.
+        """
+        return frame[column][mask].nunique()
+
+
+class DuckDBBackend(PandasBackend):
+    """
+    DuckDB: agregación vectorizada y multihilo que lee las columnas del DataFrame sin cargarlas
+    en una base de datos. Cada llamada usa su propia conexión en memoria (las sesiones corren
+    en hilos distintos).
+    """
+
+    name = 'duckdb'
+
+    def _query(self, frame, sql):
+        import duckdb # Dependencia opcional: available_backends solo lo ofrece si está instalado
+
+        with duckdb.connect() as con:
+            con.register('sales', frame)
+            return con.execute(sql).df()
+
+    def aggregate(self, frame, keys, measures, extra_keys=None):
+        extra_keys = extra_keys or {}
+        group_keys = keys + list(extra_keys)
+        columns = ', '.join(f'"{k}"' for k in group_keys)
+        not_null = ' AND '.join(f'"{k}" IS NOT NULL' for k in group_keys)
+        sums = ', '.join(
+            f'SUM("{m}")::{"BIGINT" if frame[m].dtype.kind in "biu" else "DOUBLE"} AS "{m}"' for m in measures
+        )
+        result = self._query(
+            frame[keys + measures].assign(**extra_keys),
+            f'SELECT {columns}, {sums} FROM sales WHERE {not_null} GROUP BY ALL'
+        )
+        return _restore_dtypes(result, frame, keys, measures, extra_keys)
+
+    def nunique_by(self, frame, column, by):
+        result = self._query(
+            frame[[by, column]],
+            f'SELECT "{by}", COUNT(DISTINCT "{column}") AS n FROM sales WHERE "{by}" IS NOT NULL GROUP BY ALL ORDER BY "{by}"'
+        )
+        return pd.Series(result['n'].to_numpy(dtype=np.int64), index=pd.Index(_as_dtype(result[by], frame[by].dtype), name=by), name=column)
+
+    def nunique(self, frame, column, mask):
+        result = self._query(frame[[column]][mask], f'SELECT COUNT(DISTINCT "{column}") AS n FROM sales')
+        return int(result['n'].iloc[0])
+
+
+class PolarsBackend(PandasBackend):
+    """
+    Polars: agregación vectorizada y multihilo. Las columnas se convierten a Polars una vez
+    por DataFrame (la conversión se recuerda mientras el DataFrame exista).
+    """
+
+    name = 'polars'
+
+    def _to_polars(self, frame, columns):
+        import polars as pl # Dependencia opcional: available_backends solo lo ofrece si está instalado
+
+        converted = _polars_columns.get(frame, lambda _: {})
+        for column in columns:
+            if column not in converted:
+                converted[column] = pl.from_pandas(frame[column])
+        return pl.DataFrame([converted[c] for c in columns])
+
+    def aggregate(self, frame, keys, measures, extra_keys=None):
+        import polars as pl
+
+        extra_keys = extra_keys or {}
+        group_keys = keys + list(extra_keys)
+        sums = [pl.col(m).cast(pl.Int64 if frame[m].dtype.kind in 'biu' else pl.Float64).sum() for m in measures]
+        table = self._to_polars(frame, keys + measures).with_columns(
+            [pl.Series(name, values) for name, values in extra_keys.items()]
+        )
+        result = table.drop_nulls(group_keys).group_by(group_keys).agg(sums)
+        return _restore_dtypes(result.to_pandas(), frame, keys, measures, extra_keys)
+
+    def nunique_by(self, frame, column, by):
+        import polars as pl
+
+        result = (
+            self._to_polars(frame, [by, column]).drop_nulls(by)
+            .group_by(by).agg(pl.col(column).drop_nulls().n_unique().alias('n')).sort(by)
+            .to_pandas()
+        )
+        return pd.Series(result['n'].to_numpy(dtype=np.int64), index=pd.Index(_as_dtype(result[by], frame[by].dtype), name=by), name=column)
+
+    def nunique(self, frame, column, mask):
+        import polars as pl
+
+        values = self._to_polars(frame, [column]).filter(pl.Series(mask))[column]
+        return int(values.drop_nulls().n_unique())
+
+
+_BACKENDS = {backend.name: backend for backend in (PandasBackend(), DuckDBBackend(), PolarsBackend())}
+_REQUIRED_MODULE = {'duckdb': 'duckdb', 'polars': 'polars'}
+
+
+@functools.lru_cache(maxsize=None)
+def _installed(module):
+    # La importación se intenta una vez por proceso
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+def available_backends():
+    """
+    Motores de cálculo utilizables en este entorno ('pandas' siempre está disponible).
+
+    Returns:
+        list: Nombres de los motores instalados.
+    """
+    return ['pandas'] + [name for name, module in _REQUIRED_MODULE.items() if _installed(module)]
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_backend(name):
+    # Se resuelve una vez por nombre: el aviso de motor no disponible se emite una sola vez
+    if name not in available_backends():
+        if name not in _BACKENDS:
+            warnings.warn(f"Motor de cálculo desconocido '{name}'. Se usa pandas.", stacklevel=3)
+        else:
+            warnings.warn(f"El motor de cálculo '{name}' no está instalado. Se usa pandas.", stacklevel=3)
+        name = 'pandas'
+    return _BACKENDS[name]
+
+
+def get_backend(name=None):
+    """
+    Devuelve el motor de cálculo indicado, o el de SALES_COMPUTE_BACKEND. Si el motor no
+    existe o su librería no está instalada, se usa pandas (con un aviso la primera vez).
+
+    Args:
+        name (str): Nombre del motor ('pandas', 'duckdb' o 'polars'), o None para el por defecto.
+
+    Returns:
+        PandasBackend: Motor de cálculo (todos exponen aggregate, nunique_by y nunique).
+    """
+    return _resolve_backend((name or COMPUTE_BACKEND).lower())
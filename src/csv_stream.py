@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.schema import SALES_SCHEMA, enforce_schema
+from src.utils import prepare_sales_data
+from src.cube import build_sales_cube
+from src.recent_orders import RECENT_PARTITION_COLUMNS
+
+# Límite de memoria de la lectura por fragmentos: fragmento en curso + agregados retenidos
+STREAM_MAX_MB = float(os.environ.get("SALES_STREAM_MAX_MB", "256"))
+# Órdenes más recientes que se conservan por partición (para "Últimas N Órdenes")
+STREAM_RECENT_ROWS = 1000
+# Fracción de la memoria libre reservada al fragmento leído (el resto: su copia tipada y su cubo)
+_CHUNK_SHARE = 0.25
+# Copias temporales del cubo acumulado durante la fusión con el cubo de un fragmento
+_MERGE_OVERHEAD = 3
+_SAMPLE_ROWS = 1000 # Filas leídas para estimar el tamaño de cada fila
+
+# Tipos declarados para el parser: las dimensiones llegan ya como categóricas y los contadores
+# como float (admiten vacíos); enforce_schema los estrecha después fragmento a fragmento
+_CSV_DTYPES = {
+    column: ('category' if dtype == 'category' else 'float64')
+    for column, dtype in SALES_SCHEMA.items() if dtype != 'datetime64[ns]'
+}
+_CSV_DTYPES['Amount'] = 'float64'
+
+
+def _bytes_per_row(file_path, columns):
+    """
+    Estima la memoria de cada fila leída a partir de una muestra del archivo.
+
+    Args:
+        file_path (str): Ruta al archivo CSV.
+        columns (list): Columnas a leer.
+
+    Returns:
+        float: Bytes por fila.
+    """
+    sample = pd.read_csv(file_path, usecols=lambda c: c in columns, dtype=_CSV_DTYPES, nrows=_SAMPLE_ROWS)
+    if sample.empty:
+        return 1.0
+    # Una columna categórica de un fragmento grande ocupa como mucho lo mismo que la muestra por fila
+    return max(sample.memory_usage(deep=True).sum() / len(sample), 1.0)
+
+
+def _newest_rows(df, rows_per_partition):
+    """
+    Conserva las filas más recientes de cada partición (Product, License_Type, Region),
+    en orden de fecha ascendente (a igualdad de fecha, en el orden del archivo).
+
+    Args:
+        df (pd.DataFrame): Filas tipadas.
+        rows_per_partition (int): Filas a conservar por partición.
+
+    Returns:
+        pd.DataFrame: Filas conservadas.
+    """
+    ordered = df.take(np.argsort(df['Date'].to_numpy(), kind='stable'))
+    return ordered.groupby(RECENT_PARTITION_COLUMNS, observed=True, sort=False).tail(rows_per_partition)
+
+
+def stream_csv(file_path, columns, max_memory_mb=STREAM_MAX_MB, progress=None, recent_rows=STREAM_RECENT_ROWS):
+    """
+    Lee un CSV por fragmentos acotados sin materializar la tabla completa. Cada fragmento se
+    tipa con el esquema, se agrega en un cubo (src/cube.py) y se fusiona con el cubo acumulado;
+    de las filas individuales solo se conservan las más recientes de cada partición.
+
+    Args:
+        file_path (str): Ruta al archivo CSV.
+        columns (list): Columnas a leer (las demás se descartan en el parser).
+        max_memory_mb (float): Límite de memoria (fragmento en curso + agregados retenidos).
+        progress (callable): Función opcional progress(fraccion, filas_leidas) llamada tras cada fragmento.
+        recent_rows (int): Órdenes recientes a conservar por partición.
+
+    Returns:
+        tuple: (DataFrame de órdenes recientes con el esquema y claves de periodo, SalesCube de todo el archivo).
+
+    Raises:
+        MemoryError: Si los agregados retenidos no dejan memoria para fusionar otro fragmento.
+    """
+    budget = max_memory_mb * 1e6
+    bytes_per_row = _bytes_per_row(file_path, columns)
+    total_bytes = max(os.path.getsize(file_path), 1)
+    cube = None
+    recent = None
+    rows_read = 0
+    held_bytes = 0 # Memoria de los agregados retenidos
+    reserved_bytes = 0 # Agregados retenidos más las copias de su fusión con el siguiente fragmento
+
+    with open(file_path, 'rb') as handle:
+        reader = pd.read_csv(
+            handle, usecols=lambda c: c in columns, dtype=_CSV_DTYPES, parse_dates=['Date'], iterator=True
+        )
+        while True:
+            # El tamaño de cada fragmento se ajusta a la memoria que dejan libre los agregados
+            chunk_rows = max(int((budget - reserved_bytes) * _CHUNK_SHARE / bytes_per_row), _SAMPLE_ROWS)
+            try:
+                chunk = reader.get_chunk(chunk_rows)
+            except StopIteration:
+                break
+            if reserved_bytes > budget:
+                raise MemoryError(
+                    f"Los agregados ({held_bytes / 1e6:.0f} MB) no dejan memoria para seguir leyendo dentro del "
+                    f"límite de {max_memory_mb:.0f} MB tras {rows_read:,} filas."
+                )
+            typed = prepare_sales_data(enforce_schema(chunk))
+            chunk_cube = build_sales_cube(typed)
+            cube = chunk_cube if cube is None else cube.merged_with(chunk_cube)
+
+            # Las categorías de cada fragmento difieren: se re-tipan al unir (pocas filas)
+            newest = _newest_rows(typed, recent_rows)
+            recent = newest if recent is None else _newest_rows(enforce_schema(pd.concat([recent, newest])), recent_rows)
+            rows_read += len(chunk)
+
+            held_bytes = cube.nbytes + recent.memory_usage(deep=True).sum()
+            reserved_bytes = _MERGE_OVERHEAD * cube.nbytes + recent.memory_usage(deep=True).sum()
+            if progress is not None:
+                progress(min(handle.tell() / total_bytes, 1.0), rows_read)
+
+    if cube is None:
+        raise ValueError(f"El archivo CSV {file_path} no contiene filas.")
+    # Montos sin decimales: se mantienen enteros como en el resto de fuentes
+    amounts = cube.cells['Amount']
+    if np.all(np.mod(amounts.to_numpy(), 1) == 0):
+        cube.cells['Amount'] = amounts.astype(np.int64)
+    recent = prepare_sales_data(enforce_schema(recent.reset_index(drop=True)))
+    if recent['Amount'].dtype.kind == 'f' and np.all(np.mod(recent['Amount'].to_numpy(), 1) == 0):
+        recent['Amount'] = recent['Amount'].astype(np.int64)
+    return recent, cube
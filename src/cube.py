@@ -0,0 +1,338 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.utils import prepare_sales_data
+from src.filter_index import get_filter_index
+from src.frame_registry import FrameRegistry
+from src.distinct_sketch import estimate_entries, merge_entries, precision_for_error, sketch_entries
+
+# Grano del cubo: una celda por combinación de estas dimensiones y día
+CUBE_DIMENSIONS = ['Product', 'License_Type', 'Region', 'City', 'Sales_Manager']
+# Medidas aditivas que se suman en cada celda
+CUBE_MEASURES = ['Amount', 'Transactions', 'Admins', 'Designers', 'Servers']
+FILTERED_CUBES_MAX = 64 # Sub-cubos filtrados que recuerda cada cubo (LRU)
+
+_cubes = FrameRegistry() # DataFrame -> SalesCube
+
+
+class SalesCube:
+    """
+    Cubo OLAP materializado con las ventas agregadas al grano
+    (Product, License_Type, Region, City, Sales_Manager, día).
+
+    - cells: una fila por celda con las dimensiones, 'Date' (el día), las sumas de
+      CUBE_MEASURES, 'Rows' (número de transacciones) y las claves de periodo de
+      utils.prepare_sales_data. El índice de cells es el identificador de celda.
+    - companies: pares distintos (Cell, Company). Es el estado fusionable del conteo
+      exacto de clientes únicos: al combinar celdas basta con unir sus pares.
+      Sales_Manager es una dimensión del cubo, así que su conteo único sale de cells.
+    - sketches: estado HyperLogLog disperso por celda de 'Company' y 'Sales_Manager' para los
+      conteos únicos aproximados. Se calcula la primera vez que se pide y lo comparten todos
+      los sub-cubos del mismo cubo (los identificadores de celda son comunes).
+
+    Las funciones de src/utils.py aceptan un SalesCube en lugar del DataFrame de ventas
+    (excepto get_last_n_orders, que necesita las órdenes individuales). Como el grano
+    temporal es el día, los cortes por fecha se resuelven a nivel de día completo.
+    """
+
+    def __init__(self, cells, companies, sketches=None, precision=None):
+        self.cells = cells
+        self.companies = companies
+        self.sketches = {} if sketches is None else sketches # columna -> entradas (Partition = Cell)
+        self.precision = precision or precision_for_error()
+        self._filtered = OrderedDict() # filtros normalizados -> sub-cubo (ver filter)
+        self._filtered_lock = threading.Lock()
+
+    def __getstate__(self):
+        # El bloqueo no se puede serializar y los sub-cubos recordados no hacen falta en otro
+        # proceso (ej. los workers de src/report.py): se recrean vacíos al deserializar
+        state = self.__dict__.copy()
+        del state['_filtered'], state['_filtered_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._filtered = OrderedDict()
+        self._filtered_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.cells)
+
+    @property
+    def empty(self):
+        return self.cells.empty
+
+    @property
+    def nbytes(self):
+        # Memoria de las celdas y de los pares (celda, cliente)
+        return int(self.cells.memory_usage(deep=True).sum() + self.companies.memory_usage(deep=True).sum())
+
+    def take(self, positions):
+        """
+        Sub-cubo con las celdas en las posiciones indicadas.
+
+        Args:
+            positions (np.ndarray): Posiciones de celda (o máscara booleana).
+
+        Returns:
+            SalesCube: Sub-cubo.
+        """
+        if positions is not None and np.asarray(positions).dtype == bool:
+            positions = np.flatnonzero(positions)
+        cells = self.cells if positions is None else self.cells.take(positions)
+        if len(cells) == len(self.cells):
+            return SalesCube(cells, self.companies, self.sketches, self.precision)
+        companies = self.companies[self.companies['Cell'].isin(cells.index)]
+        return SalesCube(cells, companies, self.sketches, self.precision)
+
+    def filter(self, filters):
+        """
+        Sub-cubo con las celdas que cumplen los filtros globales, resueltos con el
+        índice invertido de las celdas (ver src/filter_index.py). Los mismos filtros devuelven
+        el mismo objeto mientras se recuerden (FILTERED_CUBES_MAX por cubo), de modo que lo
+        memorizado por sub-cubo (ej. el snapshot de paneles) sirve en las siguientes ejecuciones.
+
+        Args:
+            filters (dict): columna -> valor, lista de valores, o None para no filtrar.
+
+        Returns:
+            SalesCube: Sub-cubo filtrado.
+        """
+        key = _filters_key(filters)
+        with self._filtered_lock:
+            cube = self._filtered.get(key)
+            if cube is not None:
+                self._filtered.move_to_end(key)
+                return cube
+        cube = self.take(get_filter_index(self.cells).select(filters))
+        with self._filtered_lock:
+            # Si otra sesión lo calculó a la vez, se devuelve el suyo (un único objeto por filtros)
+            cube = self._filtered.setdefault(key, cube)
+            while len(self._filtered) > FILTERED_CUBES_MAX:
+                self._filtered.popitem(last=False)
+        return cube
+
+    def values(self, column):
+        """
+        Valores presentes de una dimensión (ej. para poblar un selector), leídos del índice
+        de las celdas en lugar de recorrer las filas.
+
+        Args:
+            column (str): Dimensión del cubo.
+
+        Returns:
+            list: Valores ordenados.
+        """
+        return get_filter_index(self.cells).values(column)
+
+    def merged_with(self, delta):
+        """
+        Combina este cubo con el cubo de un lote de transacciones nuevas (actualización
+        por delta): las celdas existentes suman las medidas del lote, las celdas nuevas se
+        añaden al final y los pares (celda, cliente) se unen. No modifica ninguno de los dos cubos.
+
+        Args:
+            delta (SalesCube): Cubo construido solo con las transacciones nuevas.
+
+        Returns:
+            SalesCube: Cubo equivalente al de la tabla completa con las transacciones añadidas.
+        """
+        key_columns = CUBE_DIMENSIONS + ['Date']
+        # Las categorías nuevas se añaden al final para no alterar los códigos existentes
+        cells = self.cells.copy()
+        delta_cells = delta.cells.copy()
+        for column in CUBE_DIMENSIONS:
+            cells[column], delta_cells[column] = _align_categoricals(cells[column], delta_cells[column])
+
+        existing = pd.MultiIndex.from_frame(cells[key_columns])
+        positions = existing.get_indexer(pd.MultiIndex.from_frame(delta_cells[key_columns]))
+        matched = positions >= 0
+
+        # Celdas existentes: se suman las medidas del lote (con el tipo que daría reconstruir el cubo)
+        measure_columns = CUBE_MEASURES + ['Rows']
+        for column in measure_columns:
+            dtype = np.result_type(cells[column].dtype, delta_cells[column].dtype)
+            values = cells[column].to_numpy(dtype=dtype, copy=True)
+            np.add.at(values, positions[matched], delta_cells[column].to_numpy(dtype=dtype)[matched])
+            cells[column] = values
+
+        # Celdas nuevas: se añaden con identificadores consecutivos
+        next_id = int(cells.index.max()) + 1 if len(cells) else 0
+        new_cells = delta_cells[~matched]
+        new_ids = np.arange(next_id, next_id + len(new_cells))
+        cells = pd.concat([cells, new_cells.set_axis(new_ids)])
+
+        # Identificador final de cada celda del lote, para re-etiquetar sus pares (celda, cliente)
+        delta_ids = np.empty(len(delta_cells), dtype=np.int64)
+        delta_ids[matched] = cells.index.to_numpy()[positions[matched]]
+        delta_ids[~matched] = new_ids
+        id_map = pd.Series(delta_ids, index=delta_cells.index)
+        delta_companies = pd.DataFrame({
+            'Cell': id_map.reindex(delta.companies['Cell']).to_numpy(),
+            'Company': delta.companies['Company'].to_numpy(),
+        })
+        old_company, new_company = _align_categoricals(self.companies['Company'], delta_companies['Company'])
+        companies = pd.concat([
+            pd.DataFrame({'Cell': self.companies['Cell'].to_numpy(), 'Company': old_company.to_numpy()}),
+            pd.DataFrame({'Cell': delta_companies['Cell'].to_numpy(), 'Company': new_company.to_numpy()}),
+        ], ignore_index=True).drop_duplicates(ignore_index=True)
+
+        # Los sketches ya calculados se fusionan con los del lote (máximo por registro)
+        merged = SalesCube(cells, companies, precision=self.precision)
+        for column, entries in list(self.sketches.items()):
+            delta_entries = delta.sketch(column).copy()
+            delta_entries['Partition'] = id_map.reindex(delta_entries['Partition']).to_numpy()
+            merged.sketches[column] = merge_entries(entries, delta_entries)
+        return merged
+
+    def sketch(self, column):
+        """
+        Entradas HyperLogLog por celda de 'Company' o de una dimensión, calculadas una vez
+        para el cubo completo.
+
+        Args:
+            column (str): 'Company' o una de CUBE_DIMENSIONS.
+
+        Returns:
+            pd.DataFrame: Entradas de distinct_sketch.sketch_entries con Partition = Cell.
+        """
+        entries = self.sketches.get(column)
+        if entries is None:
+            if column == 'Company':
+                source_cells, values = self.companies['Cell'].to_numpy(), self.companies['Company']
+            else:
+                source_cells, values = self.cells.index.to_numpy(), self.cells[column]
+            entries = sketch_entries(source_cells, values, self.precision)
+            self.sketches[column] = entries
+        return entries
+
+    def distinct_count(self, column, by=None, approximate=False):
+        """
+        Conteo de valores únicos de 'Company' o de una dimensión del cubo, total o por una
+        columna de las celdas (ej. 'Quarter_Key'). Es exacto salvo que se pida la
+        estimación HyperLogLog, que fusiona los sketches de las celdas seleccionadas.
+
+        Args:
+            column (str): 'Company' o una de CUBE_DIMENSIONS.
+            by (str): Columna de cells por la que agrupar, o None para el total.
+            approximate (bool): Si True, estima con HyperLogLog (error típico ver self.precision).
+
+        Returns:
+            int or pd.Series: Conteo total, o una serie indexada por los valores de 'by'.
+        """
+        if approximate:
+            active = self.cells.index[self.cells['Rows'] > 0]
+            entries = self.sketch(column)
+            entries = entries[entries['Partition'].isin(active)]
+            keys = self.cells[by].reindex(entries['Partition']).to_numpy() if by else None
+            return estimate_entries(entries, self.precision, keys)
+        if column == 'Company':
+            values = self.companies['Company']
+            keys = self.cells[by].reindex(self.companies['Cell']).to_numpy() if by else None
+        else:
+            active = self.cells[self.cells['Rows'] > 0]
+            values = active[column]
+            keys = active[by].to_numpy() if by else None
+        if by is None:
+            return int(values.nunique())
+        return pd.DataFrame({by: keys, column: values.to_numpy()}).groupby(by, observed=True)[column].nunique()
+
+
+def _filters_key(filters):
+    # Filtros normalizados: orden de columnas y de valores irrelevante, None = sin filtrar
+    return tuple(sorted(
+        (column, tuple(sorted(value, key=str)) if isinstance(value, (list, tuple, set)) else value)
+        for column, value in filters.items() if value is not None
+    ))
+
+
+def _align_categoricals(left, right):
+    """
+    Unifica las categorías de dos columnas para poder combinarlas. Si ambas son categóricas,
+    las categorías que solo aparecen en right se añaden al final de las de left, de modo que
+    los códigos de left no cambian.
+
+    Args:
+        left (pd.Series): Columna existente.
+        right (pd.Series): Columna nueva.
+
+    Returns:
+        tuple: (left, right) con el mismo tipo de datos.
+    """
+    if not isinstance(left.dtype, pd.CategoricalDtype):
+        return left, right
+    right_values = right.cat.categories if isinstance(right.dtype, pd.CategoricalDtype) else pd.Index(right.dropna().unique())
+    extra = right_values.difference(left.cat.categories)
+    if len(extra):
+        left = left.cat.add_categories(extra.sort_values())
+    # astype no recodifica entre categóricas con los mismos valores en otro orden
+    return left, pd.Series(pd.Categorical(right, dtype=left.dtype), index=right.index, name=right.name)
+
+
+def build_sales_cube(df, precision=None):
+    """
+    Materializa el cubo a partir de las transacciones.
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas (filas individuales).
+        precision (int): Precisión de los sketches HyperLogLog (por defecto, la de DISTINCT_ERROR).
+
+    Returns:
+        SalesCube: Cubo con las celdas y el estado de conteo único de clientes.
+    """
+    day = pd.to_datetime(df['Date']).dt.normalize().rename('Date')
+    grouped = df.groupby([df[c] for c in CUBE_DIMENSIONS] + [day], observed=True, sort=True)
+
+    cells = grouped[CUBE_MEASURES].sum()
+    cells['Rows'] = grouped.size()
+    cells = prepare_sales_data(cells.reset_index())
+
+    # Identificador de celda de cada fila, para guardar los pares distintos (celda, cliente)
+    cell_ids = grouped.ngroup().to_numpy()
+    companies = pd.DataFrame({'Cell': cell_ids, 'Company': df['Company'].to_numpy()}).drop_duplicates(ignore_index=True)
+    return SalesCube(cells, companies, precision=precision)
+
+
+def get_sales_cube(df):
+    """
+    Devuelve el cubo de un DataFrame de ventas, materializándolo la primera vez.
+    Como load_data entrega el mismo objeto para la misma versión de los datos, el cubo
+    se construye una vez por versión y se comparte entre todas las sesiones.
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas completo (sin filtrar).
+
+    Returns:
+        SalesCube: Cubo del DataFrame.
+    """
+    return _cubes.get(df, build_sales_cube)
+
+
+def register_sales_cube(df, cube):
+    """
+    Asocia a df un cubo construido por otra vía (ej. agregando un CSV por fragmentos, cuando
+    df solo contiene las órdenes recientes y no todas las filas agregadas en el cubo).
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas entregado por load_data.
+        cube (SalesCube): Cubo de todos los datos de la fuente.
+    """
+    _cubes.register(df, cube)
+
+
+def extend_sales_cube(df, combined_df, new_rows):
+    """
+    Si df ya tiene cubo, asocia a combined_df (df con new_rows añadidas al final) el cubo
+    actualizado por delta: solo se agregan las filas nuevas y se fusionan con las celdas existentes.
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas antes de añadir las filas.
+        combined_df (pd.DataFrame): DataFrame de ventas con las filas añadidas.
+        new_rows (pd.DataFrame): Filas añadidas.
+    """
+    cube = _cubes.peek(df)
+    if cube is not None:
+        _cubes.register(combined_df, cube.merged_with(build_sales_cube(new_rows, precision=cube.precision)))
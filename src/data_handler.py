@@ -1,7 +1,597 @@
+import os
+import glob
+import hashlib
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
-from src.utils import generate_simulated_data
+from src.frame_registry import FrameRegistry
+from src.utils import generate_simulated_data, prepare_sales_data
+from src.columnar_store import read_sidecar, write_sidecar
+from src.db_source import DEFAULT_DB_PATH, database_available, load_table, insert_sales_rows
+from src.schema import SALES_SCHEMA, concat_typed, enforce_schema, memory_report, reconcile_columns
+from src.cube import extend_sales_cube, register_sales_cube
+from src.csv_stream import STREAM_MAX_MB, stream_csv
+from src.filter_index import extend_filter_index
+from src.recent_orders import extend_recent_orders
+
+DEFAULT_FILE_PATH = os.environ.get("SALES_FILE_PATH", r"C:\Users\Usuario\Downloads\Sales_Dashboard\data\Dataset_Prueba.xlsx")
+# Carpeta (o patrón glob) con las exportaciones mensuales para la fuente 'folder'
+DEFAULT_FOLDER_PATH = os.environ.get("SALES_DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+PARTITION_EXTENSIONS = ('.csv', '.xlsx', '.xls') # Archivos de exportación reconocidos en una carpeta
+INGEST_WORKERS = int(os.environ.get("SALES_INGEST_WORKERS", str(os.cpu_count() or 1))) # Procesos para parsear archivos
+
+# Columnas que el dashboard utiliza realmente; el resto no se lee de los archivos de origen
+DASHBOARD_COLUMNS = [
+    'Date', 'Product', 'License_Type', 'Region', 'City', 'Company', 'Amount',
+    'Transactions', 'Sales_Manager', 'Admins', 'Designers', 'Servers',
+]
+
+# --- Caché de carga compartida ---
+# Streamlit re-ejecuta app.py completo en cada interacción, pero los módulos importados
+# viven durante todo el proceso del servidor. Esta caché a nivel de módulo es, por tanto,
+# compartida por todas las sesiones: el mismo DataFrame se reutiliza mientras el archivo
+# de origen no cambie. Cada versión cargada lleva un identificador de versión y las sesiones
+# la referencian sin copiarla: con copy-on-write, modificar el DataFrame (o una selección suya)
+# crea una copia privada en lugar de escribir sobre los datos de todas las sesiones.
+# Límite de memoria de la caché. La versión más reciente de cada fuente siempre se conserva,
+# aunque por sí sola lo supere (ver _store_in_cache).
+CACHE_MAX_BYTES = int(os.environ.get("SALES_CACHE_MAX_MB", "512")) * 1024 * 1024
+_HASH_BLOCK_SIZE = 1024 * 1024 # Tamaño de bloque para calcular el hash del contenido
+
+_cache_lock = threading.Lock() # Protege las estructuras de la caché (cada sesión corre en su propio hilo)
+_load_lock = threading.Lock() # Evita que dos sesiones carguen el mismo archivo a la vez
+_data_cache = OrderedDict() # clave -> (DataFrame, bytes); el orden refleja el uso reciente (LRU)
+_content_hashes = {} # (ruta, tamaño, mtime) -> hash del contenido, para no re-leer archivos sin cambios
+_live_frames = weakref.WeakValueDictionary() # clave -> DataFrame aún referenciado por alguna sesión (aunque expulsado)
+_versions = FrameRegistry() # DataFrame -> identificador de su versión
+_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_last_memory_report = None # Informe de memoria (por columna) de la última carga real
+_partition_cache = {} # carpeta o patrón -> {ruta: (hash, DataFrame tipado)} de la última carga
+
+if int(pd.__version__.split(".")[0]) < 3:
+    # Copy-on-write es el comportamiento fijo desde pandas 3; antes hay que activarlo
+    pd.set_option("mode.copy_on_write", True)
+
+
+def _file_fingerprint(file_path):
+    """
+    Calcula la huella de un archivo: tamaño, fecha de modificación y hash del contenido.
+    El hash solo se recalcula cuando cambian el tamaño o la fecha de modificación.
+
+    Args:
+        file_path (str): Ruta al archivo.
+
+    Returns:
+        tuple: (tamaño en bytes, mtime en nanosegundos, hash SHA-256 del contenido).
+
+    Raises:
+        OSError: Si el archivo no existe o no se puede leer.
+    """
+    stat = os.stat(file_path)
+    stat_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _cache_lock:
+        digest = _content_hashes.get(stat_key)
+    if digest is None:
+        hasher = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+                hasher.update(block)
+        digest = hasher.hexdigest()
+        with _cache_lock:
+            _content_hashes[stat_key] = digest
+    return stat.st_size, stat.st_mtime_ns, digest
+
+
+def _cache_key(source_type, file_path):
+    """
+    Construye la clave de caché para una fuente de datos.
+    Para fuentes basadas en archivo se usa la ruta, el tamaño y el hash del contenido,
+    de modo que un cambio de fecha sin cambio de contenido no provoca una recarga.
+
+    Args:
+        source_type (str): Tipo de fuente de datos.
+        file_path (str): Ruta al archivo de datos.
+
+    Returns:
+        tuple: Clave de caché.
+    """
+    if source_type == "database":
+        file_path = DEFAULT_DB_PATH # La versión de la base de datos local es la de su archivo
+    elif source_type == "folder":
+        # La versión de una carpeta es la de todos sus archivos: se combinan sus huellas
+        files = resolve_partition_files(file_path)
+        combined = hashlib.sha256()
+        for path in files:
+            combined.update(f"{path}:{_file_fingerprint(path)[2]};".encode())
+        return (source_type, os.path.abspath(file_path), len(files), combined.hexdigest())
+    elif source_type not in ("csv", "excel", "csv_stream"):
+        return (source_type, None, None, None)
+    try:
+        size, _, digest = _file_fingerprint(file_path)
+    except OSError:
+        # Archivo inexistente: se cachea el fallback hasta que el archivo aparezca
+        return (source_type, os.path.abspath(file_path), None, None)
+    return (source_type, os.path.abspath(file_path), size, digest)
+
+
+def _store_in_cache(key, df):
+    """
+    Publica una versión de los datos: le asigna un identificador de versión y la guarda en
+    la caché, expulsando las entradas menos usadas recientemente hasta respetar CACHE_MAX_BYTES.
+    La versión recién guardada queda fijada aunque por sí sola supere el límite: sin ella, cada
+    sesión volvería a cargar su propia copia y el uso de memoria sería mayor. El DataFrame no
+    se congela: copy-on-write garantiza que ninguna sesión modifique los datos compartidos.
+
+    Args:
+        key (tuple): Clave de caché.
+        df (pd.DataFrame): DataFrame cargado.
+    """
+    _versions.register(df, uuid.uuid4().hex)
+    df_bytes = int(df.memory_usage(deep=True).sum())
+    if df_bytes > CACHE_MAX_BYTES:
+        print(f"Aviso: los datos ({df_bytes / 1e6:.1f} MB) superan el límite de la caché; se conserva igualmente (solo esta versión).")
+    with _cache_lock:
+        # Las versiones anteriores del mismo origen ya no son válidas
+        for old_key in [k for k in _data_cache if k[:2] == key[:2] and k != key]:
+            del _data_cache[old_key]
+        _data_cache[key] = (df, df_bytes)
+        _live_frames[key] = df
+        total_bytes = sum(entry_bytes for _, entry_bytes in _data_cache.values())
+        while total_bytes > CACHE_MAX_BYTES and len(_data_cache) > 1:
+            _, (_, evicted_bytes) = _data_cache.popitem(last=False)
+            total_bytes -= evicted_bytes
+            _cache_stats["evictions"] += 1
+
+
+def _cached_frame(key):
+    """
+    Busca una versión ya cargada (llamar con _cache_lock adquirido). Una versión expulsada
+    de la caché que alguna sesión sigue usando se reutiliza en lugar de cargar otra copia.
+
+    Args:
+        key (tuple): Clave de caché.
+
+    Returns:
+        pd.DataFrame or None: DataFrame compartido, o None si hay que cargarlo.
+    """
+    if key in _data_cache:
+        _data_cache.move_to_end(key)
+        _cache_stats["hits"] += 1
+        return _data_cache[key][0]
+    df = _live_frames.get(key)
+    if df is not None:
+        _cache_stats["hits"] += 1
+    return df
+
+
+def get_data_version(df):
+    """
+    Identificador de la versión de los datos de un DataFrame entregado por load_data
+    (cambia cuando se recarga el origen o se añaden transacciones).
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas.
+
+    Returns:
+        str: Identificador de versión.
+    """
+    # Los DataFrames cargados sin caché reciben su propio identificador
+    return _versions.get(df, lambda _: uuid.uuid4().hex)
+
+
+def clear_data_cache():
+    """
+    Vacía la caché de carga de datos (por ejemplo, para forzar una recarga manual).
+    """
+    with _cache_lock:
+        _data_cache.clear()
+        _live_frames.clear()
+        _content_hashes.clear()
+
+
+def get_data_cache_info():
+    """
+    Devuelve estadísticas de uso de la caché de carga.
+
+    Returns:
+        dict: Número de entradas, versiones aún en uso, bytes ocupados, límite y contadores de
+              aciertos/fallos/expulsiones.
+    """
+    with _cache_lock:
+        return {
+            "entries": len(_data_cache),
+            "live_versions": len(_live_frames),
+            "bytes": sum(entry_bytes for _, entry_bytes in _data_cache.values()),
+            "max_bytes": CACHE_MAX_BYTES,
+            **_cache_stats,
+        }
+
+
+def get_memory_report():
+    """
+    Devuelve el informe de memoria por columna (antes/después de aplicar el esquema)
+    de la última carga que no se sirvió desde la caché.
+
+    Returns:
+        pd.DataFrame or None: Informe generado por schema.memory_report, o None si aún no hay cargas.
+    """
+    return _last_memory_report
+
+
+def _load_typed(source_type, file_path, progress=None):
+    """
+    Carga los datos desde la fuente, les aplica el esquema tipado (src/schema.py),
+    registra el informe de memoria antes/después y precalcula las claves de periodo
+    (utils.prepare_sales_data) una sola vez por carga.
+
+    Args:
+        source_type (str): Tipo de fuente de datos.
+        file_path (str): Ruta al archivo de datos si source_type es 'csv', 'csv_stream' o 'excel'.
+        progress (callable): Función opcional progress(fraccion, filas_leidas) para 'csv_stream'.
+
+    Returns:
+        pd.DataFrame: DataFrame de ventas con el esquema aplicado y las claves de periodo.
+    """
+    global _last_memory_report
+    if source_type == "csv_stream":
+        return _load_streamed(file_path, progress)
+    raw_df = _load_data_uncached(source_type, file_path)
+    df = enforce_schema(raw_df)
+    report = memory_report(raw_df, df)
+    _last_memory_report = report
+    total = report.iloc[-1]
+    print(f"Memoria de los datos: {total['Bytes_Before'] / 1e6:.1f} MB -> {total['Bytes_After'] / 1e6:.1f} MB.")
+    return prepare_sales_data(df)
+
 
-def load_data(source_type="simulated", file_path=r"C:\Users\Usuario\Downloads\Sales_Dashboard\data\Dataset_Prueba.xlsx"):
+def _load_streamed(file_path, progress=None):
+    """
+    Carga un CSV por fragmentos (src/csv_stream.py) sin materializar la tabla completa.
+    El DataFrame devuelto solo contiene las órdenes más recientes de cada partición; el cubo
+    con los agregados de todo el archivo queda asociado a él, de modo que get_sales_cube(df)
+    sirve los paneles agregados como con el resto de fuentes.
+
+    Args:
+        file_path (str): Ruta al archivo CSV.
+        progress (callable): Función opcional progress(fraccion, filas_leidas).
+
+    Returns:
+        pd.DataFrame: Órdenes recientes con el esquema aplicado y las claves de periodo.
+    """
+    try:
+        recent, cube = stream_csv(file_path, DASHBOARD_COLUMNS, STREAM_MAX_MB, progress)
+    except FileNotFoundError:
+        print(f"Error: Archivo CSV no encontrado en {file_path}. Generando datos simulados como fallback.")
+        return prepare_sales_data(enforce_schema(generate_simulated_data()))
+    except Exception as e:
+        print(f"Error al leer el CSV por fragmentos: {e}. Generando datos simulados como fallback.")
+        return prepare_sales_data(enforce_schema(generate_simulated_data()))
+    register_sales_cube(recent, cube)
+    print(f"CSV agregado por fragmentos: {int(cube.cells['Rows'].sum()):,} filas en {len(cube):,} celdas ({cube.nbytes / 1e6:.1f} MB).")
+    return recent
+
+
+def _source_path(source_type, file_path):
+    """
+    Ruta por defecto de una fuente cuando no se indica: la carpeta de exportaciones para
+    'folder' y el archivo configurado para el resto.
+
+    Args:
+        source_type (str): Tipo de fuente de datos.
+        file_path (str): Ruta indicada, o None.
+
+    Returns:
+        str: Ruta a usar.
+    """
+    if file_path is not None:
+        return file_path
+    return DEFAULT_FOLDER_PATH if source_type == "folder" else DEFAULT_FILE_PATH
+
+
+def load_data(source_type="simulated", file_path=None, use_cache=True, progress=None):
+    """
+    Carga los datos de ventas usando la caché compartida entre sesiones.
+    Solo se vuelve a leer el archivo cuando su contenido cambia; en caso contrario se
+    devuelve el mismo DataFrame ya procesado. Todas las fuentes se entregan con el
+    esquema tipado de src/schema.py (dimensiones categóricas y contadores estrechos). El DataFrame
+    devuelto es compartido por todas las sesiones y de solo lectura: para añadir columnas basta
+    con df.assign(...), que comparte las columnas existentes sin copiarlas (copy-on-write).
+
+    Args:
+        source_type (str): Tipo de fuente de datos (ver _load_data_uncached).
+        file_path (str): Ruta al archivo de datos si source_type es 'csv', 'csv_stream' o 'excel'
+                         (por defecto DEFAULT_FILE_PATH), o carpeta/patrón glob si es 'folder'
+                         (por defecto DEFAULT_FOLDER_PATH).
+        use_cache (bool): Si es False, se ignora la caché y se cargan los datos de nuevo.
+        progress (callable): Función opcional progress(fraccion, filas_leidas) que informa del
+                             avance de la lectura por fragmentos ('csv_stream').
+
+    Returns:
+        pd.DataFrame: DataFrame de Pandas con los datos de ventas cargados.
+    """
+    file_path = _source_path(source_type, file_path)
+    if not use_cache:
+        return _load_typed(source_type, file_path, progress)
+
+    key = _cache_key(source_type, file_path)
+    with _cache_lock:
+        df = _cached_frame(key)
+    if df is not None:
+        return df
+
+    with _load_lock:
+        return _load_and_cache(key, source_type, file_path, progress)
+
+
+def _load_and_cache(key, source_type, file_path, progress=None):
+    """
+    Devuelve la versión en caché de una fuente o la carga y la publica. Debe llamarse con
+    _load_lock adquirido (el bloqueo no es reentrante: load_data y append_transactions lo
+    toman una sola vez y llaman aquí).
+
+    Args:
+        key (tuple): Clave de caché de la fuente.
+        source_type (str): Tipo de fuente de datos.
+        file_path (str): Ruta ya resuelta de la fuente.
+        progress (callable): Función opcional de avance (ver load_data).
+
+    Returns:
+        pd.DataFrame: DataFrame compartido de la fuente.
+    """
+    # Otra sesión pudo haber cargado los datos mientras esperábamos el bloqueo
+    with _cache_lock:
+        df = _cached_frame(key)
+        if df is not None:
+            return df
+        _cache_stats["misses"] += 1
+    df = _load_typed(source_type, file_path, progress)
+    _store_in_cache(key, df)
+    return df
+
+
+def validate_transactions(df_new):
+    """
+    Valida un lote de transacciones nuevas antes de añadirlas.
+
+    Args:
+        df_new (pd.DataFrame): Transacciones nuevas con las columnas de DASHBOARD_COLUMNS.
+
+    Returns:
+        pd.DataFrame: Copia del lote con 'Date' como datetime y los contadores numéricos.
+
+    Raises:
+        ValueError: Si faltan columnas, hay fechas o dimensiones vacías, o valores numéricos no válidos.
+    """
+    missing = [c for c in DASHBOARD_COLUMNS if c not in df_new.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas en las transacciones nuevas: {missing}")
+    rows = df_new.reset_index(drop=True).copy()
+    rows['Date'] = pd.to_datetime(rows['Date'], errors='coerce')
+    if rows['Date'].isna().any():
+        raise ValueError("Hay transacciones con fecha vacía o no válida.")
+    for column in ['Product', 'License_Type', 'Region', 'City', 'Company', 'Sales_Manager']:
+        if rows[column].isna().any():
+            raise ValueError(f"Hay transacciones sin valor en '{column}'.")
+    for column in ['Amount', 'Transactions', 'Admins', 'Designers', 'Servers']:
+        values = pd.to_numeric(rows[column], errors='coerce')
+        if values.isna().any() or (values < 0).any():
+            raise ValueError(f"La columna '{column}' debe contener números no negativos.")
+        rows[column] = values
+    return rows
+
+
+def append_transactions(df_new, source_type="simulated", file_path=None):
+    """
+    Añade transacciones nuevas a los datos de una fuente sin recargar ni recalcular el histórico.
+
+    - 'database': las filas se insertan en la tabla SQLite (las consultas agregan en SQL).
+    - resto de fuentes: las filas se añaden al DataFrame compartido en la caché de carga, y las
+      estructuras mantenidas (cubo, índice de filtros y órdenes recientes) se actualizan por
+      delta a partir solo de las filas nuevas. Todas las sesiones ven la nueva versión en su
+      siguiente ejecución. Las filas añadidas viven en memoria: si el archivo de origen cambia,
+      se recarga desde él.
+
+    Args:
+        df_new (pd.DataFrame): Transacciones nuevas (ver validate_transactions).
+        source_type (str): Tipo de fuente de datos a la que se añaden.
+        file_path (str): Ruta de la fuente (ver load_data), o None para la ruta por defecto.
+
+    Returns:
+        pd.DataFrame or None: El DataFrame de ventas ampliado, o None para 'database'.
+    """
+    rows = validate_transactions(df_new)
+    if source_type == "database":
+        insert_sales_rows(rows)
+        print(f"{len(rows)} transacciones añadidas a la base de datos {DEFAULT_DB_PATH}.")
+        return None
+
+    file_path = _source_path(source_type, file_path)
+    with _load_lock:
+        key = _cache_key(source_type, file_path)
+        current = _load_and_cache(key, source_type, file_path)
+        # Las filas nuevas se tipan como las existentes: las categorías nuevas se añaden al
+        # final para no cambiar los códigos de las filas ya cargadas
+        new_rows = prepare_sales_data(enforce_schema(rows))
+        aligned_current = {}
+        aligned_new = {}
+        for column in current.columns:
+            existing = current[column]
+            if column not in new_rows.columns:
+                # Columna opcional ausente en el lote (ej. 'Active_Clients'): 0 o vacío
+                fill = 0 if existing.dtype.kind in 'iuf' else pd.NA
+                aligned_new[column] = pd.Series(fill, index=new_rows.index).astype(existing.dtype)
+                aligned_current[column] = existing
+            elif isinstance(existing.dtype, pd.CategoricalDtype):
+                extra = pd.Index(new_rows[column].astype(str).unique()).difference(existing.cat.categories)
+                if len(extra):
+                    existing = existing.cat.add_categories(extra.sort_values())
+                aligned_current[column] = existing
+                # astype no recodifica entre categóricas con las mismas categorías en otro orden
+                # (las considera iguales): el constructor sí respeta el orden de existing
+                aligned_new[column] = pd.Series(pd.Categorical(new_rows[column], dtype=existing.dtype), index=new_rows.index)
+            else:
+                aligned_current[column] = existing
+                aligned_new[column] = new_rows[column].astype(existing.dtype) if SALES_SCHEMA.get(column) else new_rows[column]
+        current_aligned = pd.DataFrame(aligned_current, index=current.index)
+        new_aligned = pd.DataFrame(aligned_new, index=new_rows.index)
+        combined = pd.concat([current_aligned, new_aligned], ignore_index=True)
+
+        # Actualización por delta de las estructuras derivadas ya construidas
+        extend_sales_cube(current, combined, new_aligned)
+        extend_filter_index(current, combined, new_aligned)
+        extend_recent_orders(current, combined, new_aligned)
+
+        _store_in_cache(key, combined)
+    print(f"{len(rows)} transacciones añadidas ({len(combined)} en total).")
+    return combined
+
+
+def resolve_partition_files(path_or_pattern):
+    """
+    Lista los archivos de exportación de una carpeta o de un patrón glob (ej. 'data/ventas_*.xlsx').
+
+    Args:
+        path_or_pattern (str): Carpeta o patrón glob.
+
+    Returns:
+        list: Rutas absolutas ordenadas de los archivos con extensión de PARTITION_EXTENSIONS.
+    """
+    pattern = os.path.join(path_or_pattern, "*") if os.path.isdir(path_or_pattern) else path_or_pattern
+    return sorted(
+        os.path.abspath(path) for path in glob.glob(pattern)
+        if os.path.isfile(path) and path.lower().endswith(PARTITION_EXTENSIONS)
+    )
+
+
+def _parse_partition_file(file_path):
+    """
+    Parsea un archivo de exportación (CSV o todas las hojas de un Excel) y reconcilia cada
+    tabla con las columnas del dashboard. Es una función de nivel de módulo para poder
+    ejecutarse en otro proceso.
+
+    Args:
+        file_path (str): Ruta al archivo.
+
+    Returns:
+        pd.DataFrame: Filas del archivo con las columnas de DASHBOARD_COLUMNS y el esquema aplicado.
+
+    Raises:
+        ValueError: Si ninguna tabla del archivo tiene columna de fecha.
+    """
+    if file_path.lower().endswith('.csv'):
+        tables = {'csv': pd.read_csv(file_path)}
+    else:
+        tables = pd.read_excel(file_path, sheet_name=None) # Todas las hojas del libro
+    parts = []
+    for sheet_name, table in tables.items():
+        try:
+            parts.append(reconcile_columns(table, DASHBOARD_COLUMNS))
+        except ValueError as e:
+            print(f"Aviso: se omite la hoja '{sheet_name}' de {file_path}: {e}.")
+    if not parts:
+        raise ValueError(f"{file_path} no contiene ninguna tabla de ventas")
+    df = pd.concat(parts, ignore_index=True)
+    df['Date'] = pd.to_datetime(df['Date'])
+    return enforce_schema(df)
+
+
+def _load_partitioned(path_or_pattern):
+    """
+    Carga todos los archivos de una carpeta o patrón glob. Solo se parsean los archivos nuevos
+    o modificados: los demás se reutilizan de la carga anterior (misma huella) o de su copia
+    columnar. Los archivos a parsear se reparten entre varios procesos (el parseo de Excel usa
+    CPU y no libera el GIL), y las tablas se concatenan unificando sus categorías.
+
+    Args:
+        path_or_pattern (str): Carpeta o patrón glob de archivos CSV/Excel.
+
+    Returns:
+        pd.DataFrame: Filas de todos los archivos con el esquema aplicado.
+
+    Raises:
+        FileNotFoundError: Si no hay archivos que coincidan.
+    """
+    files = resolve_partition_files(path_or_pattern)
+    if not files:
+        raise FileNotFoundError(path_or_pattern)
+    previous = _partition_cache.get(os.path.abspath(path_or_pattern), {})
+    parts = {}
+    to_parse = []
+    for path in files:
+        digest = _file_fingerprint(path)[2]
+        if path in previous and previous[path][0] == digest:
+            parts[path] = previous[path] # Sin cambios desde la carga anterior
+            continue
+        try:
+            df = read_sidecar(path, digest, columns=DASHBOARD_COLUMNS)
+        except ImportError:
+            df = None
+        if df is not None:
+            parts[path] = (digest, df) # Sin cambios desde que se generó su copia columnar
+        else:
+            to_parse.append((path, digest))
+
+    paths = [path for path, _ in to_parse]
+    workers = min(INGEST_WORKERS, len(paths))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_parse_partition_file, paths))
+    else:
+        parsed = [_parse_partition_file(path) for path in paths]
+    for (path, digest), df in zip(to_parse, parsed):
+        try:
+            write_sidecar(df, path, digest)
+        except ImportError:
+            pass # Sin 'pyarrow' el archivo se vuelve a parsear en el siguiente arranque
+        parts[path] = (digest, df)
+
+    _partition_cache[os.path.abspath(path_or_pattern)] = parts
+    print(f"{len(files)} archivos de {path_or_pattern}: {len(to_parse)} procesados, {len(files) - len(to_parse)} sin cambios.")
+    return concat_typed(parts[path][1] for path in files)
+
+
+def _load_file_via_sidecar(file_path, parse_source):
+    """
+    Carga un archivo Excel/CSV a través de su copia columnar.
+    Si existe una copia Arrow con la misma huella que el archivo de origen se lee
+    mediante memory-map; si no, se parsea el origen una vez y se escribe la copia
+    para las siguientes cargas.
+
+    Args:
+        file_path (str): Ruta al archivo de origen.
+        parse_source (callable): Función sin argumentos que parsea el archivo de origen
+                                 y devuelve un DataFrame.
+
+    Returns:
+        pd.DataFrame: DataFrame con las columnas del dashboard y 'Date' como datetime.
+    """
+    fingerprint = _file_fingerprint(file_path)[2] # Lanza FileNotFoundError si el archivo no existe
+    try:
+        df = read_sidecar(file_path, fingerprint, columns=DASHBOARD_COLUMNS)
+    except ImportError:
+        df = None # 'pyarrow' no está instalado: se parsea siempre el origen
+    if df is not None:
+        print(f"Datos cargados desde la copia columnar de {file_path}.")
+        return df
+
+    df = parse_source()
+    # Asegura que la columna 'Date' sea de tipo datetime
+    df['Date'] = pd.to_datetime(df['Date'])
+    # La copia se guarda ya tipada: las categóricas se almacenan como diccionarios Arrow
+    df = enforce_schema(df)
+    try:
+        write_sidecar(df, file_path, fingerprint)
+    except ImportError:
+        print("Aviso: la librería 'pyarrow' no está instalada; no se genera la copia columnar. Para cargas más rápidas instala: pip install pyarrow")
+    print(f"Datos cargados desde {file_path}.")
+    return df
+
+
+def _load_data_uncached(source_type="simulated", file_path=DEFAULT_FILE_PATH):
     """
     Carga los datos de ventas desde diferentes fuentes configurables.
     Esto permite cambiar fácilmente entre datos simulados, CSV, hardcodeados o de una base de datos.
@@ -10,10 +600,16 @@ def load_data(source_type="simulated", file_path=r"C:\Users\Usuario\Downloads\Sa
         source_type (str): Tipo de fuente de datos a utilizar. Puede ser:
                            'simulated': Genera datos aleatorios.
                            'csv': Carga datos desde un archivo CSV.
-                           'database': (No implementado en este ejemplo) Conexión a una base de datos.
+                           'csv_stream': Agrega un CSV grande por fragmentos (ver _load_streamed;
+                                         no pasa por esta función).
+                           'database': Carga la tabla de ventas de la base de datos SQLite local
+                                       (ver src/db_source.py; el dashboard usa consultas agregadas).
                            'hardcoded': Utiliza un pequeño conjunto de datos definidos directamente en el código.
                            'excel': Carga datos desde un archivo Excel (.xlsx).
-        file_path (str): Ruta al archivo de datos si source_type es 'csv' o 'excel'.
+                           'folder': Carga todos los CSV/Excel (y todas sus hojas) de una carpeta
+                                     o patrón glob, reconciliando sus columnas.
+        file_path (str): Ruta al archivo de datos si source_type es 'csv' o 'excel', o carpeta/patrón
+                         glob si es 'folder'.
 
     Returns:
         pd.DataFrame: DataFrame de Pandas con los datos de ventas cargados.
@@ -25,12 +621,11 @@ def load_data(source_type="simulated", file_path=r"C:\Users\Usuario\Downloads\Sa
         return df
     elif source_type == "csv":
         try:
-            # Intenta cargar datos desde un archivo CSV.
-            df = pd.read_csv(file_path)
-            # Asegura que la columna 'Date' sea de tipo datetime para operaciones de fecha/hora
-            df['Date'] = pd.to_datetime(df['Date'])
-            print(f"Datos cargados desde {file_path}.")
-            return df
+            # Intenta cargar datos desde un archivo CSV (o su copia columnar), leyendo solo las columnas usadas.
+            return _load_file_via_sidecar(
+                file_path,
+                lambda: pd.read_csv(file_path, usecols=lambda c: c in DASHBOARD_COLUMNS)
+            )
         except FileNotFoundError:
             # Si el archivo CSV no se encuentra, imprime un error y genera datos simulados como fallback.
             print(f"Error: Archivo CSV no encontrado en {file_path}. Generando datos simulados como fallback.")
@@ -43,11 +638,11 @@ def load_data(source_type="simulated", file_path=r"C:\Users\Usuario\Downloads\Sa
         try:
             # Carga datos desde un archivo Excel (.xlsx)
             # Es posible que necesites instalar 'openpyxl': pip install openpyxl
-            df = pd.read_excel(file_path) 
-            # Asegura que la columna 'Date' sea de tipo datetime
-            df['Date'] = pd.to_datetime(df['Date'])
-            print(f"Datos cargados desde {file_path}.")
-            return df
+            # Solo la primera carga pasa por openpyxl; las siguientes usan la copia columnar.
+            return _load_file_via_sidecar(
+                file_path,
+                lambda: pd.read_excel(file_path, usecols=lambda c: c in DASHBOARD_COLUMNS)
+            )
         except FileNotFoundError:
             print(f"Error: Archivo Excel no encontrado en {file_path}. Generando datos simulados como fallback.")
             return generate_simulated_data()
@@ -57,6 +652,16 @@ def load_data(source_type="simulated", file_path=r"C:\Users\Usuario\Downloads\Sa
         except Exception as e:
             print(f"Error al cargar datos desde Excel: {e}. Generando datos simulados como fallback.")
             return generate_simulated_data()
+    elif source_type == "folder":
+        try:
+            # Exportaciones particionadas (ej. un archivo por mes): solo se parsean los archivos nuevos o modificados
+            return _load_partitioned(file_path)
+        except FileNotFoundError:
+            print(f"Error: No hay archivos CSV/Excel en {file_path}. Generando datos simulados como fallback.")
+            return generate_simulated_data()
+        except Exception as e:
+            print(f"Error al cargar los archivos de {file_path}: {e}. Generando datos simulados como fallback.")
+            return generate_simulated_data()
     elif source_type == "hardcoded":
         # Datos hardcodeados: un pequeño conjunto de datos de ejemplo para pruebas rápidas.
         data = {
@@ -78,9 +683,18 @@ def load_data(source_type="simulated", file_path=r"C:\Users\Usuario\Downloads\Sa
         print("Datos hardcodeados cargados.")
         return df
     elif source_type == "database":
-        # Este bloque está reservado para la lógica de carga desde una base de datos.
-        print("Carga desde base de datos no implementada en este ejemplo. Generando datos simulados como fallback.")
-        return generate_simulated_data()
+        # Carga el detalle completo desde la base de datos SQLite local.
+        # El dashboard no pasa por aquí: usa las consultas con filtros y agregaciones de src/db_source.py.
+        if not database_available():
+            print(f"Error: Base de datos no encontrada en {DEFAULT_DB_PATH}. Generando datos simulados como fallback.")
+            return generate_simulated_data()
+        try:
+            df = load_table()
+            print(f"Datos cargados desde la base de datos {DEFAULT_DB_PATH}.")
+            return df
+        except Exception as e:
+            print(f"Error al cargar datos desde la base de datos: {e}. Generando datos simulados como fallback.")
+            return generate_simulated_data()
     else:
         print("Tipo de fuente de datos no válido. Generando datos simulados.")
         return generate_simulated_data()
@@ -0,0 +1,528 @@
+import os
+import queue
+import sqlite3
+import argparse
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.utils import DashboardSnapshot, RunningCurves, format_amount
+
+# Ruta de la base de datos SQLite local (configurable con la variable de entorno SALES_DB_PATH)
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB_PATH = os.environ.get("SALES_DB_PATH", os.path.join(_PROJECT_ROOT, "data", "sales.db"))
+TABLE_NAME = "sales"
+POOL_SIZE = int(os.environ.get("SALES_DB_POOL_SIZE", "4")) # Conexiones por base de datos
+
+# Columnas de la tabla de ventas y su tipo SQL
+_TABLE_COLUMNS = {
+    'Date': 'TEXT', # Fecha ISO 'YYYY-MM-DD HH:MM:SS' (ordenable lexicográficamente)
+    'Product': 'TEXT',
+    'License_Type': 'TEXT',
+    'Region': 'TEXT',
+    'City': 'TEXT',
+    'Company': 'TEXT',
+    'Amount': 'NUMERIC', # Conserva enteros como enteros y decimales como REAL
+    'Transactions': 'INTEGER',
+    'Sales_Manager': 'TEXT',
+    'Admins': 'INTEGER',
+    'Designers': 'INTEGER',
+    'Servers': 'INTEGER',
+}
+# Columnas por las que se filtra; se indexan para que los filtros no recorran la tabla completa
+_INDEXED_COLUMNS = ['Product', 'License_Type', 'Region', 'Date']
+
+# Expresiones SQL para los periodos. Producen las mismas etiquetas que
+# pandas .dt.to_period('Q'/'M').astype(str): '2016Q2' y '2016-04'.
+_QUARTER_NUM_SQL = "((CAST(strftime('%m', Date) AS INTEGER) + 2) / 3)"
+_QUARTER_SQL = f"(strftime('%Y', Date) || 'Q' || {_QUARTER_NUM_SQL})"
+_MONTH_SQL = "strftime('%Y-%m', Date)"
+_QUARTER_START_SQL = f"(strftime('%Y', Date) || '-' || printf('%02d', ({_QUARTER_NUM_SQL} - 1) * 3 + 1) || '-01')"
+
+SNAPSHOT_CACHE_MAX_ENTRIES = 64 # Snapshots de paneles recordados (LRU), ver query_dashboard_snapshot
+
+_pools = {} # ruta de la base de datos -> ConnectionPool
+_pools_lock = threading.Lock()
+_snapshot_lock = threading.Lock()
+_snapshot_cache = OrderedDict() # (ruta, mtime, filtros, trimestres, fecha) -> DashboardSnapshot
+
+
+class ConnectionPool:
+    """
+    Pool sencillo de conexiones SQLite de solo lectura reutilizables entre hilos
+    (cada sesión de Streamlit corre en su propio hilo).
+    Cada conexión mantiene su propia caché de sentencias preparadas, por lo que las
+    consultas parametrizadas repetidas no se vuelven a compilar.
+    """
+
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = db_path
+        self._connections = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(None) # Las conexiones se abren de forma perezosa
+
+    def _connect(self):
+        uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256)
+
+    @contextmanager
+    def connection(self):
+        conn = self._connections.get() # Bloquea si todas las conexiones están en uso
+        try:
+            if conn is None:
+                conn = self._connect()
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+
+def get_pool(db_path=None):
+    """
+    Devuelve el pool de conexiones de una base de datos, creándolo la primera vez.
+
+    Args:
+        db_path (str): Ruta al archivo SQLite. Por defecto DEFAULT_DB_PATH.
+
+    Returns:
+        ConnectionPool: Pool compartido para esa base de datos.
+    """
+    db_path = db_path or DEFAULT_DB_PATH
+    # Sesiones simultáneas en frío: un único pool por ruta (sin él, cada hilo crearía el suyo)
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = ConnectionPool(db_path)
+    return pool
+
+
+def database_available(db_path=None):
+    """
+    Indica si la base de datos existe y contiene la tabla de ventas.
+
+    Args:
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        bool: True si la base de datos se puede consultar.
+    """
+    db_path = db_path or DEFAULT_DB_PATH
+    if not os.path.exists(db_path):
+        return False
+    try:
+        with get_pool(db_path).connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLE_NAME,)
+            ).fetchone()
+        return row is not None
+    except sqlite3.Error:
+        return False
+
+
+def write_sales_table(df, db_path=None):
+    """
+    Crea (o reemplaza) la tabla de ventas en la base de datos SQLite a partir de un DataFrame,
+    con índices sobre las columnas de filtro.
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas.
+        db_path (str): Ruta al archivo SQLite.
+    """
+    db_path = db_path or DEFAULT_DB_PATH
+    columns = [c for c in _TABLE_COLUMNS if c in df.columns]
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
+        column_defs = ", ".join(f"{c} {_TABLE_COLUMNS[c]}" for c in columns)
+        conn.execute(f"CREATE TABLE {TABLE_NAME} ({column_defs})")
+        _insert_rows(conn, df[columns])
+        for column in _INDEXED_COLUMNS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_{column} ON {TABLE_NAME} ({column})")
+    print(f"Tabla '{TABLE_NAME}' escrita en {db_path} ({len(df)} registros).")
+
+
+def insert_sales_rows(df, db_path=None):
+    """
+    Añade transacciones a la tabla de ventas existente. Las consultas del dashboard agregan
+    en SQL en cada ejecución, por lo que las filas nuevas se reflejan sin más mantenimiento.
+
+    Args:
+        df (pd.DataFrame): Transacciones nuevas (ya validadas).
+        db_path (str): Ruta al archivo SQLite.
+    """
+    db_path = db_path or DEFAULT_DB_PATH
+    with sqlite3.connect(db_path) as conn:
+        _insert_rows(conn, df[[c for c in _TABLE_COLUMNS if c in df.columns]])
+
+
+def _insert_rows(conn, df):
+    """
+    Inserta filas en la tabla de ventas con una sentencia preparada (executemany).
+
+    Args:
+        conn (sqlite3.Connection): Conexión de escritura.
+        df (pd.DataFrame): Filas a insertar, con columnas de la tabla de ventas.
+    """
+    rows = df.copy()
+    rows['Date'] = pd.to_datetime(rows['Date']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    for column in rows.columns:
+        if isinstance(rows[column].dtype, pd.CategoricalDtype):
+            rows[column] = rows[column].astype(object)
+    placeholders = ", ".join("?" for _ in rows.columns)
+    conn.executemany(
+        f"INSERT INTO {TABLE_NAME} ({', '.join(rows.columns)}) VALUES ({placeholders})",
+        rows.astype(object).itertuples(index=False, name=None)
+    )
+
+
+def _build_where(filters):
+    """
+    Traduce los filtros de la barra lateral a una cláusula WHERE parametrizada.
+
+    Args:
+        filters (dict): Filtros opcionales con claves 'Product', 'License_Type', 'Region'
+                        (valor único o None para no filtrar) y 'Quarters' (lista de
+                        etiquetas como '2016Q2' o None).
+
+    Returns:
+        tuple: (cláusula WHERE como string, lista de parámetros).
+    """
+    clauses = []
+    params = []
+    filters = filters or {}
+    for column in ('Product', 'License_Type', 'Region'):
+        value = filters.get(column)
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    quarters = filters.get('Quarters')
+    if quarters is not None:
+        placeholders = ", ".join("?" for _ in quarters) or "NULL"
+        clauses.append(f"{_QUARTER_SQL} IN ({placeholders})")
+        params.extend(quarters)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    return where, params
+
+
+def _query(sql, params, db_path=None):
+    """
+    Ejecuta una consulta parametrizada usando una conexión del pool.
+
+    Args:
+        sql (str): Consulta SQL con marcadores '?'.
+        params (list): Parámetros de la consulta.
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        pd.DataFrame: Resultado de la consulta.
+    """
+    with get_pool(db_path).connection() as conn:
+        cursor = conn.execute(sql, params)
+        columns = [d[0] for d in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+
+def query_distinct_values(column, filters=None, db_path=None):
+    """
+    Obtiene los valores distintos de una columna (ej. las regiones para la barra lateral).
+
+    Args:
+        column (str): Nombre de la columna (debe ser una columna de la tabla de ventas).
+        filters (dict): Filtros a aplicar (ver _build_where).
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        list: Valores distintos ordenados.
+    """
+    if column not in _TABLE_COLUMNS:
+        raise ValueError(f"Columna no válida: {column}")
+    where, params = _build_where(filters)
+    df = _query(f"SELECT DISTINCT {column} AS value FROM {TABLE_NAME} {where} ORDER BY value", params, db_path)
+    return df['value'].tolist()
+
+
+def query_available_quarters(filters=None, db_path=None):
+    """
+    Equivalente SQL de utils.get_available_quarters.
+
+    Args:
+        filters (dict): Filtros a aplicar (ver _build_where).
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        list: Lista de trimestres ordenados cronológicamente (ej. ['2012Q1', ...]).
+    """
+    where, params = _build_where(filters)
+    sql = (f"SELECT DISTINCT {_QUARTER_SQL} AS Quarter, strftime('%Y', Date) AS Year, {_QUARTER_NUM_SQL} AS Q_Num "
+           f"FROM {TABLE_NAME} {where} ORDER BY Year, Q_Num")
+    return _query(sql, params, db_path)['Quarter'].tolist()
+
+
+def query_qtd_metrics(filters, current_date, db_path=None):
+    """
+    Equivalente SQL de utils.calculate_qtd_metrics: las sumas y conteos únicos
+    del trimestre hasta la fecha se calculan en la base de datos.
+
+    Args:
+        filters (dict): Filtros a aplicar (ver _build_where).
+        current_date (datetime.date): Fecha actual para calcular el QTD.
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        dict: Un diccionario con las métricas QTD calculadas.
+    """
+    current_datetime = pd.to_datetime(current_date)
+    quarter = current_datetime.to_period('Q')
+    qtd_start = quarter.start_time
+    qtd_end = quarter.end_time.normalize()
+
+    where, params = _build_where(filters)
+    range_clause = "Date >= ? AND Date <= ?"
+    where = f"{where} AND {range_clause}" if where else f"WHERE {range_clause}"
+    params = params + [qtd_start.strftime('%Y-%m-%d %H:%M:%S'), current_datetime.strftime('%Y-%m-%d %H:%M:%S')]
+    sql = (f"SELECT COALESCE(SUM(Transactions), 0) AS Transactions, COUNT(DISTINCT Company) AS Active_Clients, "
+           f"COUNT(DISTINCT Sales_Manager) AS SAMs, COALESCE(SUM(Amount), 0) AS Amount, "
+           f"COALESCE(SUM(Admins), 0) AS Admins, COALESCE(SUM(Designers), 0) AS Designers, "
+           f"COALESCE(SUM(Servers), 0) AS Servers FROM {TABLE_NAME} {where}")
+    row = _query(sql, params, db_path).iloc[0]
+
+    days_left_eoq = (qtd_end.date() - current_date).days if current_date <= qtd_end.date() else 0
+    return {
+        "Days Left EOQ": days_left_eoq,
+        "QTD Transactions": int(row['Transactions']),
+        "QTD Active Clients": int(row['Active_Clients']),
+        "QTD SAMs": int(row['SAMs']),
+        "QTD Sales": row['Amount'],
+        "Admins": int(row['Admins']),
+        "Designers": int(row['Designers']),
+        "Servers": int(row['Servers'])
+    }
+
+
+def query_last_n_orders(filters=None, n=5, db_path=None, offset=0):
+    """
+    Equivalente SQL de utils.get_last_n_orders (ORDER BY ... LIMIT sobre el índice de Date).
+
+    Args:
+        filters (dict): Filtros a aplicar (ver _build_where).
+        n (int): Número de órdenes más recientes a retornar.
+        db_path (str): Ruta al archivo SQLite.
+        offset (int): Órdenes más recientes a saltar (paginación).
+
+    Returns:
+        pd.DataFrame: DataFrame con las últimas N órdenes ('Company' y 'Amount').
+    """
+    where, params = _build_where(filters)
+    sql = f"SELECT Company, Amount FROM {TABLE_NAME} {where} ORDER BY Date DESC, rowid DESC LIMIT ? OFFSET ?"
+    return _query(sql, params + [n, offset], db_path)
+
+
+def _query_location_performance(column, filters, db_path):
+    where, params = _build_where(filters)
+    sql = f"SELECT {column}, SUM(Amount) AS Amount FROM {TABLE_NAME} {where} GROUP BY {column} ORDER BY Amount DESC"
+    perf = _query(sql, params, db_path)
+    perf['Formatted_Amount'] = perf['Amount'].apply(format_amount)
+    return perf
+
+
+def query_country_performance(filters=None, db_path=None):
+    """
+    Equivalente SQL de utils.calculate_country_performance.
+
+    Args:
+        filters (dict): Filtros a aplicar (ver _build_where).
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        pd.DataFrame: Total de ventas por región ordenado de mayor a menor, con 'Formatted_Amount'.
+    """
+    return _query_location_performance('Region', filters, db_path)
+
+
+def query_city_performance(filters=None, db_path=None):
+    """
+    Equivalente SQL de utils.calculate_city_performance.
+
+    Args:
+        filters (dict): Filtros a aplicar (ver _build_where).
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        pd.DataFrame: Total de ventas por ciudad ordenado de mayor a menor, con 'Formatted_Amount'.
+    """
+    return _query_location_performance('City', filters, db_path)
+
+
+def query_quarterly_data(filters=None, db_path=None):
+    """
+    Equivalente SQL de utils.get_quarterly_data.
+
+    Args:
+        filters (dict): Filtros a aplicar (ver _build_where).
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        pd.DataFrame: DataFrame con métricas agregadas por trimestre, en orden cronológico.
+    """
+    where, params = _build_where(filters)
+    sql = (f"SELECT {_QUARTER_SQL} AS Quarter, SUM(Amount) AS Amount, SUM(Transactions) AS Transactions, "
+           f"COUNT(DISTINCT Company) AS Active_Clients, COUNT(DISTINCT Sales_Manager) AS SAMs, "
+           f"SUM(Admins) AS Admins, SUM(Designers) AS Designers, SUM(Servers) AS Servers "
+           f"FROM {TABLE_NAME} {where} GROUP BY Quarter ORDER BY MIN(Date)")
+    return _query(sql, params, db_path)
+
+
+def query_running_totals_by_week(filters, selected_quarters_labels, db_path=None):
+    """
+    Equivalente SQL de utils.get_running_totals_by_week. La agregación semanal se
+    resuelve en la base de datos; solo la suma acumulada (unas pocas filas) se hace en pandas.
+
+    Args:
+        filters (dict): Filtros a aplicar (ver _build_where); se ignora su clave 'Quarters'.
+        selected_quarters_labels (list): Lista de etiquetas de trimestre a visualizar, o None
+                                         para todos los trimestres.
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        pd.DataFrame: Ventas acumuladas por semana y trimestre, con 'Comparison_Type'.
+    """
+    quarters = None if selected_quarters_labels is None else list(selected_quarters_labels)
+    where, params = _build_where({**(filters or {}), 'Quarters': quarters})
+    week_sql = f"(CAST(julianday(date(Date)) - julianday({_QUARTER_START_SQL}) AS INTEGER) / 7 + 1)"
+    sql = (f"SELECT Week_Number, SUM(Amount) AS Amount, Quarter_Label FROM ("
+           f"SELECT {week_sql} AS Week_Number, Amount, {_QUARTER_SQL} AS Quarter_Label FROM {TABLE_NAME} {where}"
+           f") WHERE Week_Number <= 14 GROUP BY Quarter_Label, Week_Number ORDER BY Quarter_Label, Week_Number")
+    weekly_sales = _query(sql, params, db_path)
+    if weekly_sales.empty:
+        return pd.DataFrame()
+    weekly_sales['Running_Total'] = weekly_sales.groupby('Quarter_Label')['Amount'].cumsum()
+    weekly_sales = weekly_sales[['Week_Number', 'Amount', 'Running_Total', 'Quarter_Label']]
+    weekly_sales['Comparison_Type'] = 'Selected'
+    return weekly_sales
+
+
+def query_seller_performance_data(filters=None, db_path=None):
+    """
+    Equivalente SQL de utils.get_seller_performance_data.
+
+    Args:
+        filters (dict): Filtros a aplicar (ver _build_where).
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        pd.DataFrame: Ventas totales por Sales_Manager, Region, Product y License_Type.
+    """
+    where, params = _build_where(filters)
+    sql = (f"SELECT Sales_Manager, Region, Product, License_Type, SUM(Amount) AS Amount FROM {TABLE_NAME} {where} "
+           f"GROUP BY Sales_Manager, Region, Product, License_Type ORDER BY Amount DESC")
+    return _query(sql, params, db_path)
+
+
+def query_seller_performance_over_time_data(filters=None, time_granularity='quarter', db_path=None):
+    """
+    Equivalente SQL de utils.get_seller_performance_over_time_data.
+
+    Args:
+        filters (dict): Filtros a aplicar (ver _build_where).
+        time_granularity (str): 'month' o 'quarter' para la agregación temporal.
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        pd.DataFrame: Ventas totales por Sales_Manager y periodo, en orden cronológico.
+    """
+    where, params = _build_where(filters)
+    period_sql = _MONTH_SQL if time_granularity == 'month' else _QUARTER_SQL
+    sql = (f"SELECT Sales_Manager, {period_sql} AS Period, SUM(Amount) AS Amount FROM {TABLE_NAME} {where} "
+           f"GROUP BY Sales_Manager, Period ORDER BY Sales_Manager, MIN(Date)")
+    return _query(sql, params, db_path)
+
+
+def query_dashboard_snapshot(filters, selected_quarters_labels, current_date, db_path=None):
+    """
+    Equivalente SQL de utils.compute_dashboard_snapshot: las consultas de los paneles son
+    independientes y se lanzan a la vez en hilos (una conexión del pool por consulta).
+    El resultado se recuerda por versión del archivo (fecha de modificación), filtros y
+    parámetros: las re-ejecuciones sin cambios reciben el mismo objeto (y los mismos
+    DataFrames, que la caché de figuras de src/plots.py reconoce).
+
+    Args:
+        filters (dict): Filtros a aplicar (ver _build_where).
+        selected_quarters_labels (list): Trimestres del gráfico de totales acumulados.
+        current_date (datetime.date): Fecha actual para calcular el QTD.
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        DashboardSnapshot: Resultados de todos los paneles (last_orders es None: se consulta
+                           aparte porque depende de la paginación). Las curvas acumuladas son
+                           semanales y de todos los trimestres (para las curvas de referencia).
+    """
+    db_path = db_path or DEFAULT_DB_PATH
+    key = (
+        db_path, os.stat(db_path).st_mtime_ns, tuple(sorted((k, tuple(v) if isinstance(v, (list, tuple, set)) else v) for k, v in filters.items())),
+        tuple(selected_quarters_labels), current_date,
+    )
+    with _snapshot_lock:
+        snapshot = _snapshot_cache.get(key)
+        if snapshot is not None:
+            _snapshot_cache.move_to_end(key)
+            return snapshot
+
+    queries = {
+        'qtd_metrics': lambda: query_qtd_metrics(filters, current_date, db_path),
+        'country_performance': lambda: query_country_performance(filters, db_path),
+        'city_performance': lambda: query_city_performance(filters, db_path),
+        'quarterly': lambda: query_quarterly_data(filters, db_path),
+        'running_totals': lambda: query_running_totals_by_week(filters, None, db_path),
+        'seller_performance': lambda: query_seller_performance_data(filters, db_path),
+        'seller_performance_by_month': lambda: query_seller_performance_over_time_data(filters, 'month', db_path),
+        'seller_performance_by_quarter': lambda: query_seller_performance_over_time_data(filters, 'quarter', db_path),
+    }
+    with ThreadPoolExecutor(max_workers=POOL_SIZE) as executor:
+        futures = {name: executor.submit(query) for name, query in queries.items()}
+        results = {name: future.result() for name, future in futures.items()}
+    running_curves = RunningCurves.from_running_totals(results.pop('running_totals'))
+    snapshot = DashboardSnapshot(
+        last_orders=None,
+        running_totals=running_curves.running_totals(selected_quarters_labels),
+        running_curves=running_curves,
+        **results
+    )
+    with _snapshot_lock:
+        # Los snapshots de versiones anteriores del archivo ya no son válidos
+        for old_key in [k for k in _snapshot_cache if k[0] == db_path and k[1] != key[1]]:
+            del _snapshot_cache[old_key]
+        snapshot = _snapshot_cache.setdefault(key, snapshot)
+        while len(_snapshot_cache) > SNAPSHOT_CACHE_MAX_ENTRIES:
+            _snapshot_cache.popitem(last=False)
+    return snapshot
+
+
+def load_table(db_path=None):
+    """
+    Carga la tabla de ventas completa en un DataFrame (usado por load_data('database')
+    cuando se necesita el detalle de filas; el dashboard usa las consultas agregadas).
+
+    Args:
+        db_path (str): Ruta al archivo SQLite.
+
+    Returns:
+        pd.DataFrame: DataFrame de ventas con 'Date' como datetime.
+    """
+    df = _query(f"SELECT * FROM {TABLE_NAME}", [], db_path)
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df
+
+
+if __name__ == "__main__":
+    # Crea la base de datos local a partir de otra fuente: python -m src.db_source --source simulated
+    from src.data_handler import load_data
+
+    parser = argparse.ArgumentParser(description="Crea la base de datos SQLite local de ventas.")
+    parser.add_argument("--source", default="simulated", help="Fuente de datos de origen (ver load_data).")
+    parser.add_argument("--file", default=None, help="Ruta al archivo de origen si la fuente es 'csv' o 'excel'.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Ruta del archivo SQLite a crear.")
+    args = parser.parse_args()
+
+    load_kwargs = {"file_path": args.file} if args.file else {}
+    write_sales_table(load_data(source_type=args.source, use_cache=False, **load_kwargs), args.db)
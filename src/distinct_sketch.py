@@ -0,0 +1,162 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# Error relativo típico objetivo de los conteos únicos aproximados (1.04 / sqrt(registros))
+DISTINCT_ERROR = float(os.environ.get("SALES_HLL_ERROR", "0.02"))
+# Modo por defecto de los conteos únicos del dashboard: 'exact' o 'approx'
+DISTINCT_MODE = os.environ.get("SALES_DISTINCT_MODE", "exact")
+
+_MIN_PRECISION = 4
+_MAX_PRECISION = 16
+
+
+def precision_for_error(error=DISTINCT_ERROR):
+    """
+    Número de bits de registro (precisión) de HyperLogLog para un error relativo típico.
+
+    Args:
+        error (float): Error relativo típico deseado (ej. 0.02 para ±2%).
+
+    Returns:
+        int: Precisión p (el sketch usa 2**p registros de un byte).
+    """
+    p = math.ceil(math.log2((1.04 / error) ** 2))
+    return min(max(p, _MIN_PRECISION), _MAX_PRECISION)
+
+
+def relative_error(precision):
+    """
+    Error relativo típico (desviación estándar) de un sketch con la precisión indicada.
+
+    Args:
+        precision (int): Precisión p del sketch.
+
+    Returns:
+        float: Error relativo típico.
+    """
+    return 1.04 / math.sqrt(2 ** precision)
+
+
+def hash_values(values):
+    """
+    Hash estable de 64 bits de cada valor. En columnas categóricas solo se calculan los
+    hashes de las categorías y se reparten por código.
+
+    Args:
+        values (pd.Series): Valores a contar.
+
+    Returns:
+        np.ndarray: Hashes uint64 (uno por valor).
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        category_hashes = pd.util.hash_array(values.cat.categories.astype(str).to_numpy(dtype=object))
+        return category_hashes[values.cat.codes.to_numpy()]
+    return pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+
+
+def sketch_entries(partitions, values, precision):
+    """
+    Estado fusionable de HyperLogLog por partición, en forma dispersa: para cada partición
+    y registro se guarda el rango máximo observado. Fusionar particiones (trimestres,
+    regiones, productos...) es tomar el máximo por registro.
+
+    Args:
+        partitions (np.ndarray): Identificador de partición de cada valor.
+        values (pd.Series): Valores a contar (alineados con partitions).
+        precision (int): Precisión p del sketch.
+
+    Returns:
+        pd.DataFrame: Columnas 'Partition', 'Register' (uint16) y 'Rank' (uint8).
+    """
+    hashes = hash_values(values)
+    registers = (hashes & np.uint64((1 << precision) - 1)).astype(np.uint16)
+    remaining = hashes >> np.uint64(precision)
+    # Rango = posición del primer bit a 1 (ceros finales + 1); el bit aislado es potencia de 2
+    # y su log2 es exacto en coma flotante
+    lowest_bit = remaining & (~remaining + np.uint64(1))
+    with np.errstate(divide='ignore'):
+        ranks = np.where(remaining == 0, 64 - precision + 1, np.log2(lowest_bit.astype(np.float64)) + 1)
+    entries = pd.DataFrame({
+        'Partition': np.asarray(partitions),
+        'Register': registers,
+        'Rank': ranks.astype(np.uint8),
+    })
+    return entries.groupby(['Partition', 'Register'], sort=False)['Rank'].max().reset_index()
+
+
+def merge_entries(*entries):
+    """
+    Une varios estados dispersos con las mismas particiones (ej. el histórico y un lote nuevo).
+
+    Args:
+        *entries (pd.DataFrame): Estados de sketch_entries.
+
+    Returns:
+        pd.DataFrame: Estado combinado (máximo por partición y registro).
+    """
+    combined = pd.concat(entries, ignore_index=True)
+    return combined.groupby(['Partition', 'Register'], sort=False)['Rank'].max().reset_index()
+
+
+def estimate(registers):
+    """
+    Estimación HyperLogLog del número de valores distintos de cada fila de registros,
+    con la corrección de rango bajo (conteo lineal) para conjuntos pequeños.
+
+    Args:
+        registers (np.ndarray): Matriz (grupos, 2**p) de rangos máximos.
+
+    Returns:
+        np.ndarray: Estimación por grupo.
+    """
+    m = registers.shape[1]
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    raw = alpha * m * m / np.exp2(-registers.astype(np.float64)).sum(axis=1)
+    zeros = (registers == 0).sum(axis=1)
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+def estimate_entries(entries, precision, keys=None):
+    """
+    Fusiona las entradas de las particiones seleccionadas y estima los valores distintos,
+    en total o por grupo.
+
+    Args:
+        entries (pd.DataFrame): Entradas de sketch_entries de las particiones a fusionar.
+        precision (int): Precisión p del sketch.
+        keys (np.ndarray): Grupo de cada entrada (ej. 'Quarter_Key' de su partición), o None.
+
+    Returns:
+        int or pd.Series: Estimación total, o una serie indexada por grupo.
+    """
+    if keys is None:
+        registers = np.zeros((1, 2 ** precision), dtype=np.uint8)
+        np.maximum.at(registers[0], entries['Register'].to_numpy(), entries['Rank'].to_numpy())
+        return int(round(estimate(registers)[0])) if len(entries) else 0
+    groups, labels = pd.factorize(keys, sort=True)
+    registers = np.zeros((len(labels), 2 ** precision), dtype=np.uint8)
+    np.maximum.at(registers, (groups, entries['Register'].to_numpy()), entries['Rank'].to_numpy())
+    return pd.Series(np.round(estimate(registers)).astype(np.int64), index=labels)
+
+
+def approx_distinct(values, keys=None, precision=None):
+    """
+    Conteo aproximado de valores distintos directamente sobre una columna de transacciones.
+
+    Args:
+        values (pd.Series): Valores a contar.
+        keys (pd.Series): Grupo de cada valor (ej. 'Quarter_Key'), o None para el total.
+        precision (int): Precisión p del sketch (por defecto, la de DISTINCT_ERROR).
+
+    Returns:
+        int or pd.Series: Estimación total, o una serie indexada por grupo.
+    """
+    precision = precision or precision_for_error()
+    partitions = np.zeros(len(values), dtype=np.int64) if keys is None else np.asarray(keys)
+    entries = sketch_entries(partitions, values, precision)
+    return estimate_entries(entries, precision, None if keys is None else entries['Partition'].to_numpy())
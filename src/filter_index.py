@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+from src.frame_registry import FrameRegistry
+
+# Columnas indexadas: cualquier combinación de filtros sobre ellas se resuelve por intersección
+INDEXED_COLUMNS = ['Product', 'License_Type', 'Region', 'City', 'Sales_Manager', 'Quarter_Key']
+
+_indexes = FrameRegistry() # DataFrame -> FilterIndex
+
+
+class FilterIndex:
+    """
+    Índice invertido sobre un DataFrame de ventas: para cada valor de cada columna indexada
+    guarda la lista ordenada de posiciones de fila donde aparece. Una combinación de filtros
+    se resuelve intersectando listas (proporcional al tamaño de las listas, no de la tabla).
+    """
+
+    def __init__(self, df, columns=INDEXED_COLUMNS):
+        self.num_rows = len(df)
+        self.postings = {} # columna -> {valor: np.ndarray de posiciones ordenadas}
+        for column in columns:
+            if column in df.columns:
+                self.postings[column] = self._build_postings(df[column])
+
+    def extended(self, new_rows):
+        """
+        Devuelve un índice nuevo que incluye filas añadidas al final de la tabla, sin
+        recorrer las filas existentes: las posiciones nuevas (desplazadas por el número de
+        filas actual) se concatenan a cada lista, que sigue ordenada.
+
+        Args:
+            new_rows (pd.DataFrame): Filas añadidas, en el orden en que se agregan a la tabla.
+
+        Returns:
+            FilterIndex: Índice de la tabla ampliada (el índice actual no se modifica).
+        """
+        delta = FilterIndex(new_rows, columns=list(self.postings))
+        extended = FilterIndex.__new__(FilterIndex)
+        extended.num_rows = self.num_rows + delta.num_rows
+        extended.postings = {}
+        for column, postings in self.postings.items():
+            merged = dict(postings)
+            for value, positions in delta.postings.get(column, {}).items():
+                shifted = positions + self.num_rows
+                merged[value] = np.concatenate((merged[value], shifted)) if value in merged else shifted
+            # Mismo orden de valores que al reconstruir el índice: el de las categorías (las
+            # nuevas van al final) o el orden natural en columnas no categóricas
+            column_values = new_rows[column] if column in new_rows.columns else None
+            if column_values is not None and isinstance(column_values.dtype, pd.CategoricalDtype):
+                order = [value for value in column_values.cat.categories if value in merged]
+            else:
+                order = sorted(merged)
+            extended.postings[column] = {value: merged[value] for value in order}
+        return extended
+
+    @staticmethod
+    def _build_postings(series):
+        # Se factoriza la columna (en categóricas, sus códigos) y un argsort estable agrupa
+        # las posiciones de cada valor manteniéndolas en orden ascendente
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            values = series.cat.categories
+        else:
+            codes, values = pd.factorize(series, sort=True)
+        order = np.argsort(codes, kind='stable').astype(np.int64)
+        counts = np.bincount(codes[codes >= 0], minlength=len(values))
+        first_valid = int(np.searchsorted(codes[order], 0)) # Salta los valores ausentes (código -1)
+        bounds = first_valid + np.concatenate(([0], np.cumsum(counts)))
+        return {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(values) if counts[i] > 0}
+
+    def rows_for(self, column, values):
+        """
+        Posiciones de fila donde la columna toma alguno de los valores indicados.
+
+        Args:
+            column (str): Columna indexada.
+            values (list): Valores aceptados.
+
+        Returns:
+            np.ndarray: Posiciones ordenadas.
+        """
+        postings = self.postings[column]
+        lists = [postings[v] for v in values if v in postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        if len(lists) == 1:
+            return lists[0]
+        return np.sort(np.concatenate(lists)) # Los valores son disjuntos: basta con ordenar
+
+    def select(self, filters):
+        """
+        Resuelve una combinación de filtros a posiciones de fila.
+
+        Args:
+            filters (dict): columna -> valor, lista de valores, o None para no filtrar.
+
+        Returns:
+            np.ndarray or None: Posiciones ordenadas que cumplen todos los filtros,
+                                o None si no hay ningún filtro activo (todas las filas).
+        """
+        candidates = []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            candidates.append(self.rows_for(column, values))
+        if not candidates:
+            return None
+        # Se intersecta empezando por la lista más corta para reducir el trabajo
+        candidates.sort(key=len)
+        rows = candidates[0]
+        for other in candidates[1:]:
+            if len(rows) == 0:
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def values(self, column):
+        """
+        Valores presentes de una columna indexada (ej. para poblar un selector).
+
+        Args:
+            column (str): Columna indexada.
+
+        Returns:
+            list: Valores ordenados.
+        """
+        return list(self.postings[column].keys())
+
+
+def get_filter_index(df):
+    """
+    Devuelve el índice de filtros de un DataFrame, construyéndolo la primera vez.
+    Como load_data entrega el mismo objeto para la misma versión de los datos, el índice
+    se construye una vez por versión y se comparte entre todas las sesiones.
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas completo (sin filtrar).
+
+    Returns:
+        FilterIndex: Índice del DataFrame.
+    """
+    return _indexes.get(df, FilterIndex)
+
+
+def extend_filter_index(df, combined_df, new_rows):
+    """
+    Si df ya tiene índice, asocia a combined_df (df con new_rows añadidas al final)
+    el índice ampliado por delta, para no reconstruirlo desde cero.
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas antes de añadir las filas.
+        combined_df (pd.DataFrame): DataFrame de ventas con las filas añadidas.
+        new_rows (pd.DataFrame): Filas añadidas.
+    """
+    index = _indexes.peek(df)
+    if index is not None:
+        _indexes.register(combined_df, index.extended(new_rows))
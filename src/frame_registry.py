@@ -0,0 +1,60 @@
+import threading
+import weakref
+
+
+class FrameRegistry:
+    """
+    Asocia estructuras derivadas (índices, cubos, ...) a un DataFrame concreto.
+    Como load_data entrega el mismo objeto para la misma versión de los datos, cada
+    estructura se construye una vez por versión y se comparte entre todas las sesiones.
+    La entrada se descarta automáticamente cuando el DataFrame deja de existir.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {} # id(DataFrame) -> (weakref al DataFrame, estructura)
+
+    def get(self, df, build):
+        """
+        Devuelve la estructura asociada a df, construyéndola con build(df) si no existe.
+
+        Args:
+            df (pd.DataFrame): DataFrame de ventas.
+            build (callable): Función que construye la estructura a partir de df.
+
+        Returns:
+            object: Estructura asociada a df.
+        """
+        with self._lock:
+            entry = self._entries.get(id(df))
+            if entry is not None and entry[0]() is df:
+                return entry[1]
+        value = build(df)
+        self.register(df, value)
+        return value
+
+    def register(self, df, value):
+        """
+        Asocia una estructura ya construida a df (ej. una versión actualizada por delta).
+
+        Args:
+            df (pd.DataFrame): DataFrame de ventas.
+            value (object): Estructura a asociar.
+        """
+        key = id(df)
+        with self._lock:
+            self._entries[key] = (weakref.ref(df, lambda _, key=key: self._entries.pop(key, None)), value)
+
+    def peek(self, df):
+        """
+        Devuelve la estructura asociada a df sin construirla.
+
+        Args:
+            df (pd.DataFrame): DataFrame de ventas.
+
+        Returns:
+            object or None: Estructura asociada, o None si aún no se ha construido.
+        """
+        with self._lock:
+            entry = self._entries.get(id(df))
+            return entry[1] if entry is not None and entry[0]() is df else None
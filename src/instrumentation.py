@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import functools
+import threading
+import tracemalloc
+import contextlib
+from collections import deque
+
+# Instrumentación de las etapas del dashboard: "off" (sin coste), "time" (solo tiempos)
+# o "memory" (tiempos + pico de memoria con tracemalloc, que ralentiza las asignaciones)
+PROFILE_MODE = os.environ.get("SALES_PROFILE", "off").lower()
+PROFILE_ENABLED = PROFILE_MODE in ("time", "memory", "1", "on")
+PROFILE_MEMORY = PROFILE_MODE == "memory"
+# Registro JSON lines (una línea por etapa) para agregar tiempos entre sesiones; vacío = sin registro
+PROFILE_LOG_PATH = os.environ.get(
+    "SALES_PROFILE_LOG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profile_log.jsonl")
+)
+# Una sesión cuenta como activa si ha ejecutado el script en los últimos N segundos
+SESSION_IDLE_SECONDS = float(os.environ.get("SALES_SESSION_IDLE_SECONDS", "900"))
+_MEMORY_SAMPLES = 500 # Muestras (sesiones, memoria residente) conservadas para el indicador
+
+_local = threading.local() # Ejecución en curso del hilo (Streamlit ejecuta cada sesión en su hilo)
+_log_lock = threading.Lock()
+_rerun_counts = {} # sesión -> ejecuciones del script (cada ejecución puede correr en un hilo distinto)
+_sessions = {} # sesión -> instante de su última ejecución del script
+_memory_samples = deque(maxlen=_MEMORY_SAMPLES) # (instante, sesiones activas, bytes residentes)
+_NO_STAGE = contextlib.nullcontext() # Contexto compartido cuando la instrumentación está desactivada
+
+
+class _Rerun:
+    """
+    Etapas medidas durante una ejecución del script de Streamlit, en orden de inicio.
+    Las etapas anidadas (ej. una agregación dentro del cálculo del snapshot) llevan su profundidad.
+    """
+
+    def __init__(self, session_id, rerun_id):
+        self.session_id = session_id
+        self.rerun_id = rerun_id
+        self.started = time.perf_counter()
+        self.stages = [] # Diccionarios {stage, parent, depth, seconds, peak_bytes}
+        self.stack = [] # Etapas abiertas: [registro, memoria al entrar, pico observado]
+
+
+def start_rerun(session_id=None):
+    """
+    Empieza a recoger las etapas de una ejecución del script en el hilo actual. La actividad
+    de la sesión se registra siempre (indicador de memoria), con o sin instrumentación.
+
+    Args:
+        session_id (str): Identificador de la sesión de Streamlit (para el registro).
+    """
+    touch_session(session_id)
+    if not PROFILE_ENABLED:
+        return
+    with _log_lock:
+        _rerun_counts[session_id] = _rerun_counts.get(session_id, 0) + 1
+        rerun_id = _rerun_counts[session_id]
+    _local.rerun = _Rerun(session_id, rerun_id)
+    if PROFILE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def finish_rerun():
+    """
+    Cierra la ejecución en curso del hilo y la añade al registro JSON lines.
+
+    Returns:
+        list: Etapas medidas ({stage, parent, depth, seconds, peak_bytes}); vacía si la
+              instrumentación está desactivada.
+    """
+    rerun = getattr(_local, 'rerun', None) if PROFILE_ENABLED else None
+    if rerun is None:
+        return []
+    _local.rerun = None
+    total = {'stage': 'total', 'parent': None, 'depth': 0,
+             'seconds': time.perf_counter() - rerun.started, 'peak_bytes': None}
+    stages = rerun.stages + [total]
+    if PROFILE_LOG_PATH:
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%S')
+        lines = [
+            json.dumps({'timestamp': timestamp, 'session': rerun.session_id, 'rerun': rerun.rerun_id, **record})
+            for record in stages
+        ]
+        try:
+            with _log_lock, open(PROFILE_LOG_PATH, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        except OSError as e:
+            print(f"No se pudo escribir el registro de rendimiento en {PROFILE_LOG_PATH}: {e}")
+    return stages
+
+
+@contextlib.contextmanager
+def _measured_stage(name):
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is None: # Llamada fuera de una ejecución del dashboard (ej. scripts, benchmarks)
+        yield
+        return
+    parent = rerun.stack[-1][0]['stage'] if rerun.stack else None
+    record = {'stage': name, 'parent': parent, 'depth': len(rerun.stack), 'seconds': None, 'peak_bytes': None}
+    rerun.stages.append(record)
+    if PROFILE_MEMORY:
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in rerun.stack: # El pico hasta ahora pertenece a las etapas abiertas
+            frame[2] = max(frame[2], peak)
+        tracemalloc.reset_peak()
+        frame = [record, current, current]
+    else:
+        frame = [record, 0, 0]
+    rerun.stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        rerun.stack.pop()
+        if PROFILE_MEMORY:
+            _, peak = tracemalloc.get_traced_memory()
+            frame[2] = max(frame[2], peak)
+            record['peak_bytes'] = frame[2] - frame[1]
+            if rerun.stack:
+                rerun.stack[-1][2] = max(rerun.stack[-1][2], frame[2])
+
+
+def stage(name):
+    """
+    Contexto que mide una etapa del dashboard (ej. with stage('load_data'): ...).
+    Con la instrumentación desactivada devuelve un contexto vacío compartido.
+
+    Args:
+        name (str): Nombre de la etapa.
+
+    Returns:
+        contextlib.AbstractContextManager: Contexto de la etapa.
+    """
+    if not PROFILE_ENABLED:
+        return _NO_STAGE
+    return _measured_stage(name)
+
+
+def profiled(function):
+    """
+    Decorador que mide cada llamada a una función como una etapa con el nombre módulo.función.
+    Con la instrumentación desactivada devuelve la función sin envolver (coste nulo).
+
+    Args:
+        function (callable): Función a medir.
+
+    Returns:
+        callable: Función instrumentada (o la misma función).
+    """
+    if not PROFILE_ENABLED:
+        return function
+    name = f"{function.__module__.rsplit('.', 1)[-1]}.{function.__name__}"
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with _measured_stage(name):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def stages_table(stages):
+    """
+    Tabla de las etapas de una ejecución para el panel "Rendimiento" de la barra lateral.
+
+    Args:
+        stages (list): Etapas devueltas por finish_rerun.
+
+    Returns:
+        pd.DataFrame: Una fila por etapa (sangrada según su anidamiento) con tiempo, porcentaje
+                      del total y, en modo "memory", el pico de memoria.
+    """
+    import pandas as pd # Solo se necesita al mostrar el panel
+
+    total = stages[-1]['seconds'] if stages else 0
+    table = pd.DataFrame({
+        'Etapa': ['  ' * s['depth'] + s['stage'] for s in stages],
+        'Tiempo (ms)': [round(s['seconds'] * 1000, 1) for s in stages],
+        '% del total': [round(100 * s['seconds'] / total, 1) if total else 0.0 for s in stages],
+    })
+    if PROFILE_MEMORY:
+        table['Pico memoria (MB)'] = [
+            None if s['peak_bytes'] is None else round(s['peak_bytes'] / 1e6, 2) for s in stages
+        ]
+    return table
+
+
+def touch_session(session_id):
+    """
+    Registra actividad de una sesión (para el recuento de sesiones activas del indicador de memoria).
+
+    Args:
+        session_id (str): Identificador de la sesión de Streamlit.
+    """
+    now = time.time()
+    with _log_lock:
+        _sessions[session_id] = now
+        for idle in [s for s, seen in _sessions.items() if now - seen > SESSION_IDLE_SECONDS]:
+            del _sessions[idle]
+
+
+def process_memory_bytes():
+    """
+    Memoria residente (RSS) del proceso del servidor.
+
+    Returns:
+        int or None: Bytes residentes, o None si no se puede medir en esta plataforma.
+    """
+    try:
+        with open('/proc/self/statm') as f: # Linux: segundo campo = páginas residentes
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil # Dependencia opcional (Windows y macOS)
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+def memory_gauge():
+    """
+    Memoria residente del proceso frente al número de sesiones activas. Cada llamada añade
+    una muestra al historial del indicador.
+
+    Returns:
+        dict: {'rss_bytes', 'sessions', 'samples'}, donde samples es un pd.DataFrame con una fila
+              por muestra (Sesiones, Memoria residente (MB)).
+    """
+    import pandas as pd # Solo se necesita al mostrar el indicador
+
+    rss = process_memory_bytes()
+    with _log_lock:
+        sessions = len(_sessions)
+        if rss is not None:
+            _memory_samples.append((time.time(), sessions, rss))
+        samples = list(_memory_samples)
+    table = pd.DataFrame({
+        'Sesiones': [n for _, n, _ in samples],
+        'Memoria residente (MB)': [round(b / 1e6, 1) for _, _, b in samples],
+    })
+    return {'rss_bytes': rss, 'sessions': sessions, 'samples': table}
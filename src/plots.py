@@ -1,44 +1,277 @@
+import os
+import inspect
+import functools
+import itertools
+import threading
+from collections import OrderedDict
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import numpy as np
 
+from src.frame_registry import FrameRegistry
+from src.instrumentation import profiled, stage
+from src.utils import OTHERS_LABEL, bucket_top_k, bucket_top_n
+
+# Ubicaciones (países o ciudades) mostradas en los gráficos de rendimiento; el resto va a "Otros"
+LOCATION_TOP_K = int(os.environ.get("SALES_LOCATION_TOP_K", "15"))
+# Vendedores con serie propia en los gráficos de desempeño; el resto va a "Otros"
+SELLER_TOP_N = int(os.environ.get("SALES_SELLER_TOP_N", "10"))
+SELLER_TOP_REGIONS = 9 # Facetas de región del gráfico de desempeño (3 x 3); el resto va a "Otros"
+# Puntos máximos de un gráfico de líneas; por encima se reduce cada serie con LTTB
+LINE_POINT_BUDGET = int(os.environ.get("SALES_LINE_POINT_BUDGET", "2000"))
+WEBGL_MIN_POINTS = 1000 # A partir de estos puntos las líneas se dibujan con WebGL
+# Límite de memoria de la caché de figuras (compartida entre sesiones)
+FIGURE_CACHE_MAX_BYTES = int(float(os.environ.get("SALES_FIGURE_CACHE_MB", "64")) * 1024 * 1024)
+
+_figure_cache_lock = threading.Lock() # Cada sesión de Streamlit corre en su propio hilo
+_figure_cache = OrderedDict() # clave -> (lista de figuras, bytes aproximados); orden = uso reciente (LRU)
+_figure_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_capture = threading.local() # Figuras mostradas por el gráfico en construcción (hilo actual)
+_frame_versions = FrameRegistry() # DataFrame de un gráfico -> número de versión (mientras exista)
+_next_frame_version = itertools.count()
+
+
+def _show(fig):
+    # La serialización de la figura a JSON ocurre dentro de st.plotly_chart: se mide aparte
+    figures = getattr(_capture, 'figures', None)
+    if figures is not None: # Gráfico en construcción: se guarda la figura para la caché
+        figures.append(fig)
+    with stage('st.plotly_chart'):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def _frame_version(df):
+    """
+    Versión de un DataFrame de un gráfico: un número asignado la primera vez que se ve el
+    objeto y válido mientras exista. Los paneles salen del snapshot memorizado por
+    compute_dashboard_snapshot, así que en cada re-ejecución con los mismos datos y filtros
+    llega el mismo objeto (sin recorrer sus filas para reconocerlo).
+
+    Args:
+        df (pd.DataFrame): Datos de un gráfico.
+
+    Returns:
+        int: Versión del DataFrame.
+    """
+    return _frame_versions.get(df, lambda _: next(_next_frame_version))
+
+
+def _figure_cache_key(function, args, kwargs):
+    # Nombre del gráfico + versión de cada DataFrame + resto de parámetros (con sus valores por defecto)
+    bound = inspect.signature(function).bind(*args, **kwargs)
+    bound.apply_defaults()
+    key = [function.__name__]
+    for name, value in bound.arguments.items():
+        if isinstance(value, pd.DataFrame):
+            value = ('frame', _frame_version(value))
+        elif isinstance(value, (list, tuple)):
+            value = tuple(value)
+        key.append((name, value))
+    return tuple(key)
+
+
+def _store_figures(key, figures, figures_bytes):
+    """
+    Guarda las figuras de un gráfico y expulsa las menos usadas recientemente hasta
+    respetar FIGURE_CACHE_MAX_BYTES.
+
+    Args:
+        key (tuple): Clave del gráfico.
+        figures (list): Figuras (go.Figure), en el orden en que se muestran.
+        figures_bytes (int): Tamaño aproximado de las figuras.
+    """
+    if figures_bytes > FIGURE_CACHE_MAX_BYTES:
+        return
+    with _figure_cache_lock:
+        _figure_cache[key] = (figures, figures_bytes)
+        total_bytes = sum(entry_bytes for _, entry_bytes in _figure_cache.values())
+        while total_bytes > FIGURE_CACHE_MAX_BYTES and len(_figure_cache) > 1:
+            _, (_, evicted_bytes) = _figure_cache.popitem(last=False)
+            total_bytes -= evicted_bytes
+            _figure_cache_stats["evictions"] += 1
+
+
+def cached_figures(function):
+    """
+    Decorador de los gráficos: si ya se mostró un gráfico con los mismos DataFrames (mismo
+    objeto, ver _frame_version) y parámetros, se reenvían sus figuras tal cual a
+    st.plotly_chart, sin volver a construirlas con Plotly Express ni validarlas. Las figuras
+    no se modifican tras mostrarlas, así que las sesiones las comparten. Los gráficos que no
+    muestran figuras (avisos de datos vacíos) no se cachean.
+
+    Args:
+        function (callable): Función de trazado.
+
+    Returns:
+        callable: Función con caché.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        key = _figure_cache_key(function, args, kwargs)
+        with _figure_cache_lock:
+            entry = _figure_cache.get(key)
+            if entry is not None:
+                _figure_cache.move_to_end(key)
+                _figure_cache_stats["hits"] += 1
+            else:
+                _figure_cache_stats["misses"] += 1
+        if entry is not None:
+            for figure in entry[0]:
+                _show(figure)
+            return
+        _capture.figures = []
+        try:
+            function(*args, **kwargs)
+            figures = _capture.figures
+        finally:
+            _capture.figures = None
+        if figures:
+            # Tamaño aproximado: el de los datos de entrada, que las figuras contienen como mucho
+            frames_bytes = sum(
+                int(value.memory_usage(deep=True).sum()) for value in list(args) + list(kwargs.values())
+                if isinstance(value, pd.DataFrame)
+            )
+            _store_figures(key, figures, frames_bytes + 4096 * len(figures))
+    return wrapper
+
+
+def clear_figure_cache():
+    """
+    Vacía la caché de figuras.
+    """
+    with _figure_cache_lock:
+        _figure_cache.clear()
+
+
+def get_figure_cache_info():
+    """
+    Devuelve estadísticas de uso de la caché de figuras.
+
+    Returns:
+        dict: Número de entradas, bytes ocupados, límite y contadores de aciertos/fallos/expulsiones.
+    """
+    with _figure_cache_lock:
+        return {
+            "entries": len(_figure_cache),
+            "bytes": sum(entry_bytes for _, entry_bytes in _figure_cache.values()),
+            "max_bytes": FIGURE_CACHE_MAX_BYTES,
+            **_figure_cache_stats,
+        }
+
+def _lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: elige n_out puntos de una serie conservando su forma
+    (picos y valles). Siempre conserva el primer y el último punto; de cada cubeta intermedia
+    toma el punto que forma el triángulo de mayor área con el punto elegido anterior y la
+    media de la cubeta siguiente.
+
+    Args:
+        x (np.ndarray): Coordenadas X ascendentes (numéricas).
+        y (np.ndarray): Valores de la serie.
+        n_out (int): Puntos a conservar.
+
+    Returns:
+        np.ndarray: Índices de los puntos conservados, ascendentes.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    every = (n - 2) / (n_out - 2) # Puntos intermedios por cubeta
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n) # La última cubeta "siguiente" es el último punto
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+def _downsample_lines(df, x_column, y_column, line_column, budget):
+    """
+    Reduce cada serie de un gráfico de líneas con LTTB para que el total no supere el presupuesto.
+
+    Args:
+        df (pd.DataFrame): Datos en formato largo, una fila por punto.
+        x_column (str): Columna del eje X (ordenable, ej. etiquetas de periodo).
+        y_column (str): Columna del eje Y.
+        line_column (str): Columna que identifica cada serie.
+        budget (int): Puntos máximos del gráfico.
+
+    Returns:
+        pd.DataFrame: Puntos conservados, ordenados por serie y eje X.
+    """
+    df = df.sort_values([line_column, x_column], kind='stable')
+    if len(df) <= budget:
+        return df
+    # Eje X numérico común: posición de cada etiqueta entre todas las del gráfico
+    x_positions = np.searchsorted(np.sort(df[x_column].unique()), df[x_column].to_numpy()).astype(np.float64)
+    y_values = df[y_column].to_numpy(dtype=np.float64)
+    series_ids = df.groupby(line_column, observed=True, sort=False).ngroup().to_numpy()
+    bounds = np.flatnonzero(np.diff(series_ids)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(df)]))
+    per_line = max(budget // len(starts), 3)
+    keep = np.concatenate([
+        start + _lttb_indices(x_positions[start:end], y_values[start:end], per_line)
+        for start, end in zip(starts, ends)
+    ])
+    return df.iloc[keep]
+
+@profiled
+@cached_figures
 def plot_running_totals(df_running_totals, selected_quarters_labels):
     """
-    Crea el gráfico de índice de ventas acumuladas por semana utilizando Plotly Express,
-    mostrando solo los periodos seleccionados.
+    Crea el gráfico de índice de ventas acumuladas por semana (o por día) utilizando Plotly Express,
+    mostrando solo los periodos seleccionados y, con líneas discontinuas, las curvas de referencia.
 
     Args:
         df_running_totals (pd.DataFrame): DataFrame con ventas acumuladas por semana y trimestre,
-                                          debe contener 'Week_Number', 'Running_Total', 'Quarter_Label'.
+                                          debe contener 'Week_Number' (o 'Day_Number'), 'Running_Total',
+                                          'Quarter_Label' y 'Comparison_Type'.
         selected_quarters_labels (list): Lista de etiquetas de trimestre seleccionadas.
     """
     if df_running_totals.empty:
         st.warning("No hay datos disponibles para el gráfico de totales acumulados con los periodos seleccionados.")
         return
 
+    # Eje X: semana del trimestre, o día del trimestre con las curvas diarias
+    position_column = 'Day_Number' if 'Day_Number' in df_running_totals.columns else 'Week_Number'
+    position_title = 'Día del Trimestre' if position_column == 'Day_Number' else 'Número de Semana'
+
     # Usar una paleta de colores cualitativa para diferenciar los trimestres seleccionados
     fig = px.line(
         df_running_totals,
-        x='Week_Number',       # Eje X: Número de semana
+        x=position_column,     # Eje X: Número de semana (o de día)
         y='Running_Total',     # Eje Y: Total acumulado
-        color='Quarter_Label', # Dibuja una línea por cada trimestre seleccionado
+        color='Quarter_Label', # Dibuja una línea por cada trimestre seleccionado y cada referencia
         title='Totales Acumulados (Trimestres Seleccionados)', # Título traducido
         labels={               # Etiquetas de ejes y leyenda traducidas
-            'Week_Number': 'Número de Semana',
+            position_column: position_title,
             'Running_Total': 'Totales Acumulados',
             'Quarter_Label': 'Trimestre'
         },
         hover_data={           # Datos adicionales a mostrar en el tooltip
-            'Week_Number': True,
+            position_column: True,
             'Running_Total': ':.2s', # Formato de número (ej. 726K)
             'Quarter_Label': True
         }
     )
+    # Las curvas de referencia (trimestre anterior, año anterior, media) van discontinuas
+    baseline_labels = set(df_running_totals.loc[df_running_totals['Comparison_Type'] == 'Baseline', 'Quarter_Label'])
+    fig.for_each_trace(lambda trace: trace.update(line_dash='dash') if trace.name in baseline_labels else None)
 
     # Ajustes generales de layout para mejorar la interactividad y estética
     fig.update_layout(
-        xaxis_title="Número de Semana", # Etiqueta del eje X traducida
+        xaxis_title=position_title, # Etiqueta del eje X traducida
         yaxis_title="Totales Acumulados", # Etiqueta del eje Y traducida
         hovermode="x unified",
         legend_title="Trimestre", # Título de la leyenda traducido
@@ -46,8 +279,10 @@ def plot_running_totals(df_running_totals, selected_quarters_labels):
         yaxis_range=[0, df_running_totals['Running_Total'].max() * 1.1] if not df_running_totals.empty else [0, 1000000]
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    _show(fig)
 
+@profiled
+@cached_figures
 def plot_quarterly_metrics(df_quarterly_metrics, selected_quarters_labels):
     """
     Crea el gráfico de barras detallado de métricas trimestrales utilizando Plotly Express,
@@ -125,60 +360,86 @@ def plot_quarterly_metrics(df_quarterly_metrics, selected_quarters_labels):
         figs.append(fig)
 
     for fig in figs:
-        st.plotly_chart(fig, use_container_width=True)
+        _show(fig)
 
-def plot_country_performance(df_country_performance):
+def _location_bars(df_performance, column, title, axis_label, palette, top_k):
     """
-    Crea el gráfico de barras de rendimiento por país utilizando Plotly Express.
-    Proporciona interactividad y muestra los montos de forma clara.
+    Barras horizontales de ventas por ubicación con el monto como texto de cada barra
+    (un único vector de textos en la traza, no una anotación por barra). Con top_k, las
+    ubicaciones fuera del top K se agrupan en una barra "Otros" al final.
 
     Args:
-        df_country_performance (pd.DataFrame): DataFrame con el total de ventas por país.
-                                               Debe contener 'Region', 'Amount', 'Formatted_Amount'.
+        df_performance (pd.DataFrame): Ranking con column, 'Amount' y 'Formatted_Amount'.
+        column (str): Columna de la ubicación ('Region' o 'City').
+        title (str): Título del gráfico.
+        axis_label (str): Nombre de la ubicación para etiquetas y tooltip.
+        palette (list): Paleta de colores de Plotly (se usa el primer color).
+        top_k (int): Ubicaciones a mostrar antes de agrupar el resto (None = todas).
+
+    Returns:
+        plotly.graph_objects.Figure: Figura construida.
     """
-    if df_country_performance.empty:
-        st.warning("No hay datos disponibles para el gráfico de rendimiento por país.")
-        return
-
-    # Ordenar los datos para que las barras se muestren de mayor a menor venta
-    df_country_performance_sorted = df_country_performance.sort_values(by='Amount', ascending=True)
+    bucketed, others = bucket_top_k(df_performance.sort_values(by='Amount', ascending=False), column, top_k)
+    # Orden inverso para que las barras se muestren de mayor a menor venta; "Otros" queda abajo
+    df_sorted = bucketed.iloc[::-1]
 
     fig = px.bar(
-        df_country_performance_sorted,
+        df_sorted,
         x='Amount', # Eje X: Monto de ventas
-        y='Region', # Eje Y: Región
+        y=column, # Eje Y: Ubicación
         orientation='h', # Barras horizontales
-        title='Rendimiento por País', # Título traducido
-        color_discrete_sequence=px.colors.sequential.Blues_r, # Colores azules degradados
-        labels={'Amount': 'Monto de Venta', 'Region': 'País'}, # Etiquetas traducidas
+        title=title,
+        text='Formatted_Amount', # Monto de cada barra como texto de la traza
+        color_discrete_sequence=palette,
+        labels={'Amount': 'Monto de Venta', column: axis_label}, # Etiquetas traducidas
         hover_data={ # Datos a mostrar en el tooltip
-            'Region': True,
+            column: True,
             'Amount': ':.2s', # Formato de monto (ej. 451K)
             'Formatted_Amount': False # No mostrar esta columna si ya se muestra Amount formateado
         }
     )
+    fig.update_traces(
+        textposition='outside', # Texto a la derecha de cada barra
+        textfont=dict(color="black", size=10),
+        cliponaxis=False
+    )
+    if not others.empty:
+        # La barra agregada "Otros" en gris para distinguirla de las ubicaciones individuales
+        is_others = df_sorted[column].astype(str).str.startswith(OTHERS_LABEL).to_numpy()
+        fig.update_traces(marker_color=np.where(is_others, 'lightgray', palette[0]))
 
-    # Añadir las etiquetas de monto directamente en las barras (similar a la imagen)
-    for index, row in df_country_performance_sorted.iterrows():
-        fig.add_annotation(
-            x=row['Amount'] + (row['Amount'] * 0.05), # Posición X un poco después de la barra
-            y=row['Region'], # Posición Y en el centro de la barra
-            text=row['Formatted_Amount'], # El texto a mostrar
-            showarrow=False, # No mostrar flecha
-            font=dict(color="black", size=10), # Estilo de fuente
-            xanchor="left", # Alineación del texto a la izquierda
-            yanchor="middle" # Alineación vertical al medio
-        )
-    
     fig.update_layout(
         xaxis_title="", # Eliminar título del eje X
         yaxis_title="", # Eliminar título del eje Y
-        xaxis_range=[0, df_country_performance_sorted['Amount'].max() * 1.3] # Ajustar el rango del eje X para que quepan las etiquetas
+        xaxis_range=[0, df_sorted['Amount'].max() * 1.3] # Ajustar el rango del eje X para que quepan las etiquetas
     )
+    return fig
+
+@profiled
+@cached_figures
+def plot_country_performance(df_country_performance, top_k=LOCATION_TOP_K):
+    """
+    Crea el gráfico de barras de rendimiento por país utilizando Plotly Express.
+    Proporciona interactividad y muestra los montos de forma clara.
+
+    Args:
+        df_country_performance (pd.DataFrame): DataFrame con el total de ventas por país.
+                                               Debe contener 'Region', 'Amount', 'Formatted_Amount'.
+        top_k (int): Países a mostrar; el resto se agrupa en "Otros" (None = todos).
+    """
+    if df_country_performance.empty:
+        st.warning("No hay datos disponibles para el gráfico de rendimiento por país.")
+        return
 
-    st.plotly_chart(fig, use_container_width=True)
+    fig = _location_bars(
+        df_country_performance, 'Region', 'Rendimiento por País', 'País',
+        px.colors.sequential.Blues_r, top_k # Colores azules degradados
+    )
+    _show(fig)
 
-def plot_city_performance(df_city_performance):
+@profiled
+@cached_figures
+def plot_city_performance(df_city_performance, top_k=LOCATION_TOP_K):
     """
     Crea el gráfico de barras de rendimiento por ciudad utilizando Plotly Express.
     Proporciona interactividad y muestra los montos de forma clara.
@@ -186,51 +447,22 @@ def plot_city_performance(df_city_performance):
     Args:
         df_city_performance (pd.DataFrame): DataFrame con el total de ventas por ciudad.
                                                Debe contener 'City', 'Amount', 'Formatted_Amount'.
+        top_k (int): Ciudades a mostrar; el resto se agrupa en "Otros" (None = todas).
     """
     if df_city_performance.empty:
         st.warning("No hay datos disponibles para el gráfico de rendimiento por ciudad.")
         return
 
-    # Ordenar los datos para que las barras se muestren de mayor a menor venta
-    df_city_performance_sorted = df_city_performance.sort_values(by='Amount', ascending=True)
-
-    fig = px.bar(
-        df_city_performance_sorted,
-        x='Amount', # Eje X: Monto de ventas
-        y='City', # Eje Y: Ciudad
-        orientation='h', # Barras horizontales
-        title='Rendimiento por Ciudad', # Título traducido
-        color_discrete_sequence=px.colors.sequential.Viridis_r, # Otra paleta de colores
-        labels={'Amount': 'Monto de Venta', 'City': 'Ciudad'}, # Etiquetas traducidas
-        hover_data={ # Datos a mostrar en el tooltip
-            'City': True,
-            'Amount': ':.2s',
-            'Formatted_Amount': False
-        }
+    fig = _location_bars(
+        df_city_performance, 'City', 'Rendimiento por Ciudad', 'Ciudad',
+        px.colors.sequential.Viridis_r, top_k # Otra paleta de colores
     )
-
-    # Añadir las etiquetas de monto directamente en las barras
-    for index, row in df_city_performance_sorted.iterrows():
-        fig.add_annotation(
-            x=row['Amount'] + (row['Amount'] * 0.05),
-            y=row['City'],
-            text=row['Formatted_Amount'],
-            showarrow=False,
-            font=dict(color="black", size=10),
-            xanchor="left",
-            yanchor="middle"
-        )
-    
-    fig.update_layout(
-        xaxis_title="",
-        yaxis_title="",
-        xaxis_range=[0, df_city_performance_sorted['Amount'].max() * 1.3]
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
+    _show(fig)
 
 
-def plot_seller_performance(df_seller_performance):
+@profiled
+@cached_figures
+def plot_seller_performance(df_seller_performance, top_n=SELLER_TOP_N):
     """
     Crea un gráfico de barras interactivo para mostrar el desempeño de los vendedores
     por país, producto y tipo de venta. Utiliza facetas para la región y color/patrón para
@@ -239,11 +471,18 @@ def plot_seller_performance(df_seller_performance):
     Args:
         df_seller_performance (pd.DataFrame): DataFrame agregado con las ventas totales por Sales_Manager,
                                                Region, Product y License_Type.
+        top_n (int): Vendedores a mostrar; el resto (y las regiones fuera de las 9 con más
+                     ventas) se agrupan en "Otros" antes de construir la figura (None = todos).
     """
     if df_seller_performance.empty:
         st.warning("No hay datos disponibles para el gráfico de desempeño de vendedores con los filtros seleccionados.")
         return
 
+    # Agregación en el servidor: el tamaño de la figura queda acotado por top_n x regiones
+    if top_n:
+        df_seller_performance = bucket_top_n(df_seller_performance, 'Sales_Manager', top_n)
+        df_seller_performance = bucket_top_n(df_seller_performance, 'Region', SELLER_TOP_REGIONS)
+
     # Crear el gráfico de barras
     fig = px.bar(
         df_seller_performance,
@@ -285,20 +524,34 @@ def plot_seller_performance(df_seller_performance):
     # Ajustar títulos de las facetas (los títulos de cada subgráfico)
     fig.update_annotations(patch=dict(font_size=12))
 
-    st.plotly_chart(fig, use_container_width=True)
+    _show(fig)
 
-def plot_seller_performance_over_time(df_seller_time_performance, time_granularity='quarter'):
+@profiled
+@cached_figures
+def plot_seller_performance_over_time(df_seller_time_performance, time_granularity='quarter', top_n=SELLER_TOP_N):
     """
     Crea un gráfico de líneas para mostrar el desempeño de los vendedores a lo largo del tiempo.
+    Si el gráfico supera LINE_POINT_BUDGET puntos, cada línea se reduce con LTTB; con muchos
+    puntos las líneas se dibujan con WebGL.
 
     Args:
         df_seller_time_performance (pd.DataFrame): DataFrame agregado con las ventas totales por Sales_Manager y periodo.
         time_granularity (str): 'month' o 'quarter' para la granularidad temporal en el título y etiquetas.
+        top_n (int): Vendedores con línea propia; el resto se agrupa en una línea "Otros" (None = todos).
     """
     if df_seller_time_performance.empty:
         st.warning("No hay datos disponibles para el gráfico de desempeño de vendedores en el tiempo.")
         return
 
+    if top_n:
+        df_seller_time_performance = bucket_top_n(df_seller_time_performance, 'Sales_Manager', top_n)
+    # LTTB conserva periodos distintos en cada línea: el orden del eje X se fija explícitamente
+    # (con ejes categóricos, Plotly ordena por primera aparición entre todas las trazas)
+    periods = sorted(df_seller_time_performance['Period'].unique())
+    df_seller_time_performance = _downsample_lines(
+        df_seller_time_performance, 'Period', 'Amount', 'Sales_Manager', LINE_POINT_BUDGET
+    )
+
     # Título dinámico basado en la granularidad temporal
     time_unit = "Trimestre" if time_granularity == 'quarter' else "Mes"
     title_text = f'Desempeño de Ventas por Vendedor a lo Largo del {time_unit}'
@@ -318,7 +571,9 @@ def plot_seller_performance_over_time(df_seller_time_performance, time_granulari
             'Period': True,
             'Amount': ':.2s',
             'Sales_Manager': True
-        }
+        },
+        category_orders={'Period': periods},
+        render_mode='webgl' if len(df_seller_time_performance) >= WEBGL_MIN_POINTS else 'svg'
     )
 
     # Ajustes del layout
@@ -331,4 +586,4 @@ def plot_seller_performance_over_time(df_seller_time_performance, time_granulari
     # Rotar etiquetas del eje X si son trimestres/meses para evitar superposición
     fig.update_xaxes(tickangle=45)
 
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    _show(fig)
\ No newline at end of file
@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+from src.frame_registry import FrameRegistry
+
+# Particiones de las órdenes recientes: una por combinación de los filtros globales
+RECENT_PARTITION_COLUMNS = ['Product', 'License_Type', 'Region']
+RECENT_PAGE_SIZE = 50 # Órdenes adicionales por página ("cargar más")
+# Órdenes fuera de orden retenidas en el búfer lateral de una partición antes de insertarlas
+_PENDING_MAX = 4096
+_EMPTY_PENDING = (np.empty(0, dtype='datetime64[ns]'), np.empty(0, dtype=np.int64))
+
+_recent = FrameRegistry() # DataFrame -> RecentOrders
+
+
+class _DateRun:
+    """
+    Posiciones de fila de una partición ordenadas por fecha ascendente (a igualdad de fecha,
+    por posición), de modo que las órdenes más recientes están al final. Los datos viven en
+    un búfer que crece por duplicación: añadir órdenes más recientes que las existentes es
+    escribir al final (O(1) amortizado por orden, tras la búsqueda binaria de su posición).
+    Varias versiones pueden compartir el búfer; cada una solo lee sus primeras `size` entradas.
+    Las órdenes con fechas anteriores a la más reciente van a un búfer lateral ordenado y
+    pequeño, que tail() fusiona al leer y que se vuelca en la partición al superar
+    _PENDING_MAX órdenes.
+    """
+
+    def __init__(self, dates, positions, size=None, used=None, pending=None):
+        self._dates = dates
+        self._positions = positions
+        self.size = len(dates) if size is None else size
+        self._used = [self.size] if used is None else used # Entradas escritas del búfer (compartido)
+        self._pending = _EMPTY_PENDING if pending is None else pending # (fechas, posiciones) fuera de orden
+
+    @property
+    def dates(self):
+        return self._dates[:self.size]
+
+    @property
+    def positions(self):
+        return self._positions[:self.size]
+
+    def tail(self, k):
+        """
+        Las k órdenes más recientes de la partición.
+
+        Args:
+            k (int): Número de órdenes.
+
+        Returns:
+            tuple: (fechas, posiciones) en orden ascendente.
+        """
+        start = max(self.size - k, 0)
+        dates, positions = self._dates[start:self.size], self._positions[start:self.size]
+        pending_dates, pending_positions = self._pending
+        if len(pending_dates) == 0:
+            return dates, positions
+        # Las k más recientes están entre las k últimas de cada parte
+        return _sorted_run(
+            np.concatenate([dates, pending_dates[-k:] if k else pending_dates[:0]]),
+            np.concatenate([positions, pending_positions[-k:] if k else pending_positions[:0]]),
+            k,
+        )
+
+    def inserted(self, dates, positions):
+        """
+        Versión con órdenes nuevas (ordenadas por fecha y posición). Si son más recientes que
+        todas las existentes y esta versión es la última que escribió en el búfer, se añaden al
+        final sin copiar; si no, se fusionan con el búfer lateral (O(órdenes pendientes)) y
+        solo cuando este supera _PENDING_MAX se insertan en la partición con una copia (O(n)
+        una vez cada _PENDING_MAX órdenes fuera de orden).
+
+        Args:
+            dates (np.ndarray): Fechas de las órdenes nuevas (datetime64[ns], ascendentes).
+            positions (np.ndarray): Posiciones de fila de las órdenes nuevas.
+
+        Returns:
+            _DateRun: Partición actualizada (esta no se modifica).
+        """
+        if self.size == self._used[0] and (self.size == 0 or dates[0] >= self._dates[self.size - 1]):
+            needed = self.size + len(dates)
+            buffer_dates, buffer_positions, used = self._dates, self._positions, self._used
+            if needed > len(buffer_dates):
+                capacity = max(needed, 2 * len(buffer_dates))
+                buffer_dates = np.empty(capacity, dtype=self._dates.dtype)
+                buffer_positions = np.empty(capacity, dtype=self._positions.dtype)
+                buffer_dates[:self.size] = self.dates
+                buffer_positions[:self.size] = self.positions
+                used = [self.size]
+            buffer_dates[self.size:needed] = dates
+            buffer_positions[self.size:needed] = positions
+            used[0] = needed
+            return _DateRun(buffer_dates, buffer_positions, needed, used, self._pending)
+        # Órdenes con fechas anteriores a la más reciente: al búfer lateral
+        pending_dates, pending_positions = _sorted_run(
+            np.concatenate([self._pending[0], dates]), np.concatenate([self._pending[1], positions])
+        )
+        if len(pending_dates) <= _PENDING_MAX:
+            return _DateRun(self._dates, self._positions, self.size, self._used, (pending_dates, pending_positions))
+        # Búfer lateral lleno: búsqueda binaria de su sitio y una copia de la partición
+        where = np.searchsorted(self.dates, pending_dates, side='right')
+        return _DateRun(np.insert(self.dates, where, pending_dates), np.insert(self.positions, where, pending_positions))
+
+
+def _sorted_run(dates, positions, k=None):
+    """
+    Ordena órdenes por fecha y posición.
+
+    Args:
+        dates (np.ndarray): Fechas de las órdenes.
+        positions (np.ndarray): Posiciones de fila.
+        k (int): Si se indica, solo se conservan las k más recientes.
+
+    Returns:
+        tuple: (fechas, posiciones) en orden ascendente.
+    """
+    order = np.lexsort((positions, dates))
+    if k is not None:
+        order = order[len(order) - min(k, len(order)):]
+    return dates[order], positions[order]
+
+
+class RecentOrders:
+    """
+    Índice de órdenes por fecha para cada partición (Product, License_Type, Region): las
+    posiciones de fila de cada combinación ordenadas por fecha. Las últimas N órdenes de
+    cualquier combinación de filtros globales se obtienen tomando el final de cada partición
+    que coincide y fusionando esos pocos candidatos, sin ordenar la tabla.
+    """
+
+    def __init__(self, df, offset=0):
+        self.partitions = {} # (producto, tipo, región) -> _DateRun
+        for key, (dates, positions) in self._sorted_partitions(df, offset).items():
+            self.partitions[key] = _DateRun(dates, positions)
+
+    @staticmethod
+    def _sorted_partitions(df, offset):
+        # Un único ordenamiento por (partición, fecha, posición) y corte por partición
+        if df.empty:
+            return {}
+        grouped = df.groupby(RECENT_PARTITION_COLUMNS, observed=True, sort=False)
+        group_ids = grouped.ngroup().to_numpy()
+        dates = df['Date'].to_numpy(dtype='datetime64[ns]')
+        positions = np.arange(len(df), dtype=np.int64)
+        order = np.lexsort((positions, dates, group_ids))
+        sorted_groups = group_ids[order]
+        bounds = np.flatnonzero(np.diff(sorted_groups)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(order)]))
+        key_rows = df[RECENT_PARTITION_COLUMNS].take(order[starts])
+        return {
+            key: (dates[order[start:end]], order[start:end] + offset)
+            for key, start, end in zip(key_rows.itertuples(index=False, name=None), starts, ends)
+        }
+
+    def extended(self, new_rows, offset):
+        """
+        Devuelve una versión que incluye filas añadidas al final de la tabla, sin recorrer
+        las filas existentes: cada orden nueva se ubica en su partición por búsqueda binaria.
+
+        Args:
+            new_rows (pd.DataFrame): Filas añadidas.
+            offset (int): Número de filas de la tabla antes de añadirlas.
+
+        Returns:
+            RecentOrders: Índice actualizado (el actual no se modifica).
+        """
+        extended = RecentOrders.__new__(RecentOrders)
+        extended.partitions = dict(self.partitions)
+        for key, (dates, positions) in self._sorted_partitions(new_rows, offset).items():
+            run = extended.partitions.get(key)
+            extended.partitions[key] = run.inserted(dates, positions) if run is not None else _DateRun(dates, positions)
+        return extended
+
+    def last_n(self, df, filters, n=5, offset=0):
+        """
+        Últimas N órdenes para una combinación de filtros globales, con paginación.
+
+        Args:
+            df (pd.DataFrame): DataFrame de ventas completo asociado a este índice.
+            filters (dict): Valores de Product, License_Type y Region (None = sin filtrar).
+            n (int): Número de órdenes a retornar.
+            offset (int): Órdenes más recientes a saltar (ej. RECENT_PAGE_SIZE para la segunda página).
+
+        Returns:
+            pd.DataFrame: Órdenes con 'Company' y 'Amount', de la más reciente a la más antigua.
+        """
+        wanted = [filters.get(c) for c in RECENT_PARTITION_COLUMNS]
+        matching = [
+            run for key, run in self.partitions.items()
+            if all(w is None or k == w for k, w in zip(key, wanted))
+        ]
+        if not matching:
+            return df.iloc[:0][['Company', 'Amount']]
+        # Solo las últimas offset + n órdenes de cada partición pueden aparecer en la página
+        tails = [run.tail(offset + n) for run in matching]
+        dates = np.concatenate([d for d, _ in tails])
+        positions = np.concatenate([p for _, p in tails])
+        order = np.lexsort((positions, dates))[::-1][offset:offset + n]
+        return df.take(positions[order])[['Company', 'Amount']]
+
+
+def get_recent_orders(df):
+    """
+    Devuelve el índice de órdenes por fecha de un DataFrame, construyéndolo la primera vez
+    (una vez por versión de los datos, compartido entre sesiones).
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas completo (sin filtrar).
+
+    Returns:
+        RecentOrders: Índice de órdenes por partición.
+    """
+    return _recent.get(df, RecentOrders)
+
+
+def extend_recent_orders(df, combined_df, new_rows):
+    """
+    Si df ya tiene su índice de órdenes, asocia a combined_df (df con new_rows añadidas
+    al final) la versión actualizada por delta.
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas antes de añadir las filas.
+        combined_df (pd.DataFrame): DataFrame de ventas con las filas añadidas.
+        new_rows (pd.DataFrame): Filas añadidas.
+    """
+    recent = _recent.peek(df)
+    if recent is not None:
+        _recent.register(combined_df, recent.extended(new_rows, offset=len(df)))
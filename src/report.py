@@ -0,0 +1,348 @@
+import os
+import json
+import argparse
+import datetime
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from src.utils import DashboardSnapshot, RunningCurves, compute_dashboard_snapshot, get_available_quarters
+from src.cube import SalesCube, get_sales_cube
+from src.recent_orders import RECENT_PAGE_SIZE, get_recent_orders
+
+# Carpeta de los snapshots precalculados (configurable con la variable de entorno SALES_REPORT_DIR)
+DEFAULT_REPORT_DIR = os.environ.get(
+    "SALES_REPORT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "snapshots")
+)
+REPORT_WORKERS = int(os.environ.get("SALES_REPORT_WORKERS", str(os.cpu_count() or 1))) # Procesos del cálculo
+MANIFEST_FILE = "manifest.json"
+QTD_FILE = "qtd_metrics.json"
+QTD_AMOUNTS = {"QTD Sales"} # Métricas QTD con montos (se guardan como float; el resto son conteos enteros)
+
+# Columnas de la combinación de filtros globales en las tablas de los snapshots
+# (prefijadas para no chocar con las columnas Region/Product/License_Type de los paneles)
+FILTER_COLUMNS = {'Product': 'Filter_Product', 'License_Type': 'Filter_License_Type', 'Region': 'Filter_Region'}
+# Paneles tabulares del snapshot: uno por archivo Parquet
+_TABLE_PANELS = [
+    'country_performance', 'city_performance', 'quarterly', 'running_totals',
+    'seller_performance', 'seller_performance_by_month', 'seller_performance_by_quarter',
+]
+
+SNAPSHOT_CACHE_MAX_ENTRIES = 64 # Snapshots servidos que recuerda cada ReportStore (LRU)
+
+_worker_cube = None # Cubo de ventas de cada proceso del pool (se reconstruye una vez por proceso)
+_reports_lock = threading.Lock()
+_reports = {} # carpeta -> (mtime del manifiesto, ReportStore)
+
+
+def _init_worker(cells, companies, precision):
+    # Solo viaja el estado del cubo (celdas, pares celda-cliente y precisión), no su memoria
+    # de sub-cubos ni los sketches: cada proceso los calcula si los necesita
+    global _worker_cube
+    _worker_cube = SalesCube(cells, companies, precision=precision)
+
+
+def _combination_snapshot(task):
+    """
+    Calcula todos los paneles de una combinación de filtros (en un proceso del pool).
+
+    Args:
+        task (tuple): (filtros, trimestres, fecha de corte).
+
+    Returns:
+        tuple: (filtros, DashboardSnapshot).
+    """
+    filters, quarters, as_of = task
+    return filters, compute_dashboard_snapshot(_worker_cube.filter(filters), quarters, as_of)
+
+
+def filter_combinations(df):
+    """
+    Combinaciones de los filtros globales del dashboard: cada producto, con "todos" o cada
+    tipo de licencia y con "todas" o cada región (None = sin filtrar).
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas completo.
+
+    Returns:
+        list: Diccionarios de filtros {'Product', 'License_Type', 'Region'}.
+    """
+    cube = get_sales_cube(df)
+    return [
+        {'Product': product, 'License_Type': license_type, 'Region': region}
+        for product, license_type, region in itertools.product(
+            cube.values('Product'), [None] + cube.values('License_Type'), [None] + cube.values('Region')
+        )
+    ]
+
+
+def _with_filter_columns(panel, filters):
+    # Antepone la combinación de filtros a las filas de un panel
+    return pd.DataFrame({FILTER_COLUMNS[c]: [filters[c]] * len(panel) for c in FILTER_COLUMNS}).join(
+        panel.reset_index(drop=True).astype({c: object for c in panel.columns if isinstance(panel[c].dtype, pd.CategoricalDtype)})
+    )
+
+
+def build_report(df, as_of, out_dir=DEFAULT_REPORT_DIR, workers=REPORT_WORKERS, source=None, mp_context=None):
+    """
+    Precalcula los paneles del dashboard para todas las combinaciones de filtros globales y los
+    guarda en out_dir: un Parquet por panel (con las columnas Filter_*), las métricas QTD en
+    JSON y un manifiesto con la fecha de corte y los valores de cada filtro.
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas completo (como lo entrega load_data).
+        as_of (datetime.date): Fecha de corte de las métricas QTD.
+        out_dir (str): Carpeta de salida.
+        workers (int): Procesos para calcular las combinaciones en paralelo.
+        source (str): Fuente de los datos (solo informativo, para el manifiesto).
+        mp_context: Contexto de multiprocessing del pool (None = el de la plataforma).
+
+    Returns:
+        dict: Manifiesto escrito.
+    """
+    cube = get_sales_cube(df)
+    quarters = get_available_quarters(cube) # Totales acumulados de todos: el dashboard elige al servir
+    combinations = filter_combinations(df)
+    tasks = [(filters, quarters, as_of) for filters in combinations]
+    cube_state = (cube.cells, cube.companies, cube.precision)
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_worker, initargs=cube_state) as executor:
+            results = list(executor.map(_combination_snapshot, tasks, chunksize=max(len(tasks) // (4 * workers), 1)))
+    else:
+        _init_worker(*cube_state)
+        results = [_combination_snapshot(task) for task in tasks]
+
+    os.makedirs(out_dir, exist_ok=True)
+    for panel in _TABLE_PANELS:
+        frames = [
+            _with_filter_columns(getattr(snapshot, panel), filters)
+            for filters, snapshot in results if not getattr(snapshot, panel).empty
+        ]
+        table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=list(FILTER_COLUMNS.values()))
+        table.to_parquet(os.path.join(out_dir, f"{panel}.parquet"), index=False)
+
+    # Últimas órdenes: la primera página de cada combinación, del índice de órdenes por fecha
+    recent = get_recent_orders(df)
+    orders = pd.concat(
+        [_with_filter_columns(recent.last_n(df, filters, RECENT_PAGE_SIZE), filters) for filters in combinations],
+        ignore_index=True
+    )
+    orders.to_parquet(os.path.join(out_dir, "last_orders.parquet"), index=False)
+
+    qtd = [
+        {**filters, **{name: float(value) if name in QTD_AMOUNTS else int(value) for name, value in snapshot.qtd_metrics.items()}}
+        for filters, snapshot in results
+    ]
+    with open(os.path.join(out_dir, QTD_FILE), "w", encoding="utf-8") as f:
+        json.dump(qtd, f)
+
+    manifest = {
+        'as_of': as_of.isoformat(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'source': source,
+        'rows': int(len(df)),
+        'quarters': quarters,
+        'products': cube.values('Product'),
+        'license_types': cube.values('License_Type'),
+        'regions': cube.values('Region'),
+        'combinations': len(combinations),
+        'last_orders': RECENT_PAGE_SIZE,
+    }
+    # El manifiesto se escribe al final: su presencia indica un snapshot completo
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _filter_key(filters):
+    return tuple(filters.get(c) for c in FILTER_COLUMNS)
+
+
+class ReportStore:
+    """
+    Snapshots precalculados por build_report, cargados en memoria y agrupados por
+    combinación de filtros: servir un panel es una búsqueda en un diccionario.
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.as_of = datetime.date.fromisoformat(self.manifest['as_of'])
+        self.panels = {
+            panel: self._grouped(pd.read_parquet(os.path.join(directory, f"{panel}.parquet")))
+            for panel in _TABLE_PANELS + ['last_orders']
+        }
+        with open(os.path.join(directory, QTD_FILE), encoding="utf-8") as f:
+            self.qtd_metrics = {
+                _filter_key(entry): {k: v for k, v in entry.items() if k not in FILTER_COLUMNS}
+                for entry in json.load(f)
+            }
+        self._snapshots_lock = threading.Lock()
+        self._snapshots = OrderedDict() # (filtros, trimestres) -> DashboardSnapshot servido
+
+    @staticmethod
+    def _grouped(table):
+        # Las combinaciones "sin filtrar" se guardan como nulos: None en la clave
+        key_columns = list(FILTER_COLUMNS.values())
+        keys = table[key_columns].astype(object).where(table[key_columns].notna(), None)
+        positions = pd.Series(range(len(table))).groupby([keys[c] for c in key_columns], dropna=False).indices
+        panel = table.drop(columns=key_columns)
+        return {
+            tuple(None if pd.isna(k) else k for k in key): panel.iloc[rows].reset_index(drop=True)
+            for key, rows in positions.items()
+        }
+
+    def values(self, column):
+        """
+        Valores de un filtro global presentes en los datos del snapshot.
+
+        Args:
+            column (str): 'Product', 'License_Type' o 'Region'.
+
+        Returns:
+            list: Valores ordenados.
+        """
+        return self.manifest[{'Product': 'products', 'License_Type': 'license_types', 'Region': 'regions'}[column]]
+
+    def _panel(self, panel, filters):
+        return self.panels[panel].get(_filter_key(filters), pd.DataFrame())
+
+    def available_quarters(self, filters):
+        """
+        Trimestres con datos para una combinación de filtros, en orden cronológico.
+
+        Args:
+            filters (dict): Filtros globales.
+
+        Returns:
+            list: Etiquetas de trimestre.
+        """
+        quarterly = self._panel('quarterly', filters)
+        return quarterly['Quarter'].tolist() if not quarterly.empty else []
+
+    def snapshot(self, filters, selected_quarters_labels):
+        """
+        Resultados de todos los paneles para una combinación de filtros, como los de
+        utils.compute_dashboard_snapshot con current_date = as_of. Los mismos filtros y
+        trimestres devuelven el mismo objeto (SNAPSHOT_CACHE_MAX_ENTRIES recordados).
+
+        Args:
+            filters (dict): Filtros globales.
+            selected_quarters_labels (list): Trimestres del gráfico de totales acumulados.
+
+        Returns:
+            DashboardSnapshot: Paneles precalculados.
+        """
+        key = (_filter_key(filters), tuple(selected_quarters_labels))
+        with self._snapshots_lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None:
+                self._snapshots.move_to_end(key)
+                return snapshot
+        # Los totales acumulados se guardan para todos los trimestres: de ellos salen los
+        # seleccionados y las curvas de referencia
+        running_curves = RunningCurves.from_running_totals(self._panel('running_totals', filters))
+        snapshot = DashboardSnapshot(
+            qtd_metrics=self.qtd_metrics.get(_filter_key(filters)),
+            last_orders=self._panel('last_orders', filters),
+            country_performance=self._panel('country_performance', filters),
+            city_performance=self._panel('city_performance', filters),
+            quarterly=self._panel('quarterly', filters),
+            running_totals=running_curves.running_totals(selected_quarters_labels),
+            seller_performance=self._panel('seller_performance', filters),
+            seller_performance_by_month=self._panel('seller_performance_by_month', filters),
+            seller_performance_by_quarter=self._panel('seller_performance_by_quarter', filters),
+            running_curves=running_curves,
+        )
+        with self._snapshots_lock:
+            snapshot = self._snapshots.setdefault(key, snapshot)
+            while len(self._snapshots) > SNAPSHOT_CACHE_MAX_ENTRIES:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def last_orders(self, filters, n=5, offset=0):
+        """
+        Últimas N órdenes de una combinación (como máximo las guardadas en el snapshot).
+
+        Args:
+            filters (dict): Filtros globales.
+            n (int): Número de órdenes.
+            offset (int): Órdenes más recientes a saltar (paginación).
+
+        Returns:
+            pd.DataFrame: Órdenes con 'Company' y 'Amount', de la más reciente a la más antigua.
+        """
+        orders = self._panel('last_orders', filters)
+        return orders.iloc[offset:offset + n] if not orders.empty else pd.DataFrame(columns=['Company', 'Amount'])
+
+    def has_more_orders(self, filters, n):
+        """
+        Indica si el snapshot guarda más de N órdenes para una combinación (solo se guarda la
+        primera página, RECENT_PAGE_SIZE órdenes).
+
+        Args:
+            filters (dict): Filtros globales.
+            n (int): Órdenes ya mostradas.
+
+        Returns:
+            bool: True si hay órdenes guardadas más allá de las N primeras.
+        """
+        return len(self._panel('last_orders', filters)) > n
+
+
+def report_available(directory=DEFAULT_REPORT_DIR):
+    """
+    Indica si existe un snapshot completo (con manifiesto) en la carpeta.
+
+    Args:
+        directory (str): Carpeta de los snapshots.
+
+    Returns:
+        bool: True si el manifiesto existe.
+    """
+    return os.path.isfile(os.path.join(directory, MANIFEST_FILE))
+
+
+def load_report(directory=DEFAULT_REPORT_DIR):
+    """
+    Devuelve los snapshots de una carpeta, cargándolos de nuevo solo si el manifiesto cambió
+    (ej. tras el cálculo nocturno). Compartidos entre todas las sesiones.
+
+    Args:
+        directory (str): Carpeta de los snapshots.
+
+    Returns:
+        ReportStore: Snapshots cargados.
+    """
+    directory = os.path.abspath(directory)
+    mtime = os.stat(os.path.join(directory, MANIFEST_FILE)).st_mtime_ns
+    with _reports_lock:
+        entry = _reports.get(directory)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+    store = ReportStore(directory)
+    with _reports_lock:
+        _reports[directory] = (mtime, store)
+    return store
+
+
+if __name__ == "__main__":
+    # Cálculo por lotes: python -m src.report --as-of 2016-06-30 --out snapshots/
+    from src.data_handler import load_data
+
+    parser = argparse.ArgumentParser(description="Precalcula los paneles del dashboard para todas las combinaciones de filtros.")
+    parser.add_argument("--source", default="simulated", help="Fuente de datos de origen (ver load_data).")
+    parser.add_argument("--file", default=None, help="Ruta al archivo o carpeta de origen.")
+    parser.add_argument("--as-of", default=None, help="Fecha de corte de las métricas QTD (AAAA-MM-DD). Por defecto, la última fecha de los datos.")
+    parser.add_argument("--out", default=DEFAULT_REPORT_DIR, help="Carpeta de salida de los snapshots.")
+    parser.add_argument("--workers", type=int, default=REPORT_WORKERS, help="Procesos para calcular las combinaciones.")
+    args = parser.parse_args()
+
+    df_sales = load_data(source_type=args.source, file_path=args.file, use_cache=False)
+    as_of = datetime.date.fromisoformat(args.as_of) if args.as_of else df_sales['Date'].max().date()
+    manifest = build_report(df_sales, as_of, args.out, args.workers, source=args.source)
+    print(f"{manifest['combinations']} combinaciones precalculadas al {manifest['as_of']} en {args.out}.")
@@ -0,0 +1,231 @@
+import numpy as np
+import pandas as pd
+
+# --- Esquema tipado de los datos de ventas ---
+# Definición única de los tipos que load_data aplica a todas las fuentes:
+# - 'category': dimensiones de texto con pocos valores distintos (se guardan como códigos enteros).
+# - enteros estrechos: contadores pequeños; si algún valor no cabe se usa el siguiente tipo más ancho.
+# - 'datetime64[ns]': fechas de las transacciones.
+SALES_SCHEMA = {
+    'Date': 'datetime64[ns]',
+    'Product': 'category',
+    'License_Type': 'category',
+    'Region': 'category',
+    'City': 'category',
+    'Company': 'category',
+    'Sales_Manager': 'category',
+    'Transactions': 'int32',
+    'Active_Clients': 'int8',
+    'Admins': 'int16',
+    'Designers': 'int16',
+    'Servers': 'int16',
+}
+
+# Orden de ensanchamiento de los contadores cuando un valor no cabe en el tipo declarado
+_INT_WIDENING = ['int8', 'int16', 'int32', 'int64']
+
+# --- Reconciliación de exportaciones ---
+# Nombres de columna alternativos (en minúsculas) de las exportaciones del ERP -> nombre del dashboard
+COLUMN_ALIASES = {
+    'fecha': 'Date',
+    'producto': 'Product',
+    'tipo de venta': 'License_Type',
+    'tipo de licencia': 'License_Type',
+    'región': 'Region',
+    'ciudad': 'City',
+    'cliente': 'Company',
+    'empresa': 'Company',
+    'ventas': 'Amount',
+    'monto': 'Amount',
+    'vendedor': 'Sales_Manager',
+    'transacciones': 'Transactions',
+    'administradores': 'Admins',
+    'diseñadores': 'Designers',
+    'servidores': 'Servers',
+}
+# Valores de 'License_Type' en español -> valores internos del dashboard
+LICENSE_TYPE_ALIASES = {
+    'Licencia': 'License',
+    'Renovación': 'Maintenance Renewal',
+    'Renovacion': 'Maintenance Renewal',
+}
+# Valor de las columnas que faltan en una exportación: cada fila es una transacción sin licencias desglosadas
+_RECONCILE_DEFAULTS = {'Transactions': 1, 'Active_Clients': 0, 'Admins': 0, 'Designers': 0, 'Servers': 0, 'Amount': 0}
+UNASSIGNED = 'Sin asignar' # Valor de las dimensiones vacías o ausentes
+
+
+def _stable_categorical(series):
+    """
+    Convierte una columna a categórica con un conjunto de categorías estable:
+    las categorías son los valores distintos ordenados, independientemente del orden de las filas.
+    Si la columna ya es categórica con categorías ordenadas, se devuelve sin cambios.
+
+    Args:
+        series (pd.Series): Columna de texto.
+
+    Returns:
+        pd.Series: Columna categórica.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if categories.is_monotonic_increasing:
+            return series
+        return series.cat.reorder_categories(categories.sort_values())
+    categories = pd.Index(series.dropna().unique()).sort_values()
+    return pd.Series(pd.Categorical(series, categories=categories), index=series.index, name=series.name)
+
+
+def _narrow_int(series, dtype):
+    """
+    Convierte un contador al tipo entero declarado, ensanchándolo si algún valor no cabe.
+    Los valores ausentes se tratan como 0 (no alteran las sumas).
+
+    Args:
+        series (pd.Series): Columna numérica.
+        dtype (str): Tipo entero declarado en el esquema.
+
+    Returns:
+        pd.Series: Columna entera.
+    """
+    if series.dtype == dtype:
+        return series
+    values = pd.to_numeric(series, errors='coerce').fillna(0)
+    low, high = values.min(), values.max()
+    for candidate in _INT_WIDENING[_INT_WIDENING.index(dtype):]:
+        info = np.iinfo(candidate)
+        if info.min <= low and high <= info.max:
+            return values.astype(candidate)
+    return values.astype('int64')
+
+
+def enforce_schema(df):
+    """
+    Aplica SALES_SCHEMA a un DataFrame de ventas. Las columnas que no están en el esquema
+    (o que no existen en el DataFrame) se dejan tal cual. No modifica el DataFrame recibido.
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas tal como lo entrega la fuente de datos.
+
+    Returns:
+        pd.DataFrame: DataFrame con los tipos del esquema.
+    """
+    typed = {}
+    for column in df.columns:
+        dtype = SALES_SCHEMA.get(column)
+        series = df[column]
+        if dtype is None:
+            typed[column] = series
+        elif dtype == 'category':
+            typed[column] = _stable_categorical(series)
+        elif dtype.startswith('int'):
+            typed[column] = _narrow_int(series, dtype)
+        elif series.dtype != dtype:
+            typed[column] = pd.to_datetime(series).astype(dtype)
+        else:
+            typed[column] = series
+    return pd.DataFrame(typed, index=df.index)
+
+
+def reconcile_columns(df, columns):
+    """
+    Lleva una tabla de una exportación (un archivo o una hoja) a las columnas del dashboard:
+    renombra las columnas conocidas (COLUMN_ALIASES o el nombre del dashboard con otras
+    mayúsculas/espacios), traduce los valores de 'License_Type', completa las columnas que
+    faltan y rellena las dimensiones vacías con UNASSIGNED.
+
+    Args:
+        df (pd.DataFrame): Tabla tal como se leyó del archivo.
+        columns (list): Columnas del dashboard a entregar.
+
+    Returns:
+        pd.DataFrame: Tabla con exactamente las columnas indicadas.
+
+    Raises:
+        ValueError: Si la tabla no tiene columna de fecha.
+    """
+    canonical = {column.casefold(): column for column in columns}
+    renames = {}
+    for original in df.columns:
+        name = str(original).strip().casefold()
+        target = canonical.get(name) or COLUMN_ALIASES.get(name)
+        if target is not None and target not in renames.values():
+            renames[original] = target
+    renamed = df[list(renames)].rename(columns=renames)
+    if 'Date' not in renamed.columns:
+        raise ValueError("no tiene columna de fecha")
+
+    reconciled = {}
+    for column in columns:
+        if column in renamed.columns:
+            series = renamed[column]
+        elif column in _RECONCILE_DEFAULTS:
+            series = pd.Series(_RECONCILE_DEFAULTS[column], index=renamed.index)
+        else:
+            series = pd.Series(UNASSIGNED, index=renamed.index)
+        if SALES_SCHEMA.get(column) == 'category':
+            series = series.astype(object).where(series.notna(), UNASSIGNED)
+            if column == 'License_Type':
+                series = series.replace(LICENSE_TYPE_ALIASES)
+        elif column == 'Amount':
+            series = pd.to_numeric(series, errors='coerce').fillna(0)
+            if (series % 1 == 0).all():
+                series = series.astype('int64') # Montos sin decimales: enteros como en el resto de fuentes
+        reconciled[column] = series
+    return pd.DataFrame(reconciled, index=renamed.index)
+
+
+def concat_typed(frames):
+    """
+    Concatena tablas ya tipadas cuyas columnas categóricas tienen categorías distintas,
+    unificando las categorías (ordenadas) en lugar de convertir las columnas a texto.
+
+    Args:
+        frames (list): DataFrames con el esquema aplicado y las mismas columnas.
+
+    Returns:
+        pd.DataFrame: Tabla concatenada con el esquema aplicado.
+    """
+    frames = list(frames)
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    aligned = [frame.copy(deep=False) for frame in frames]
+    for column in frames[0].columns:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            categories = frames[0][column].cat.categories
+            for frame in frames[1:]:
+                categories = categories.union(frame[column].cat.categories)
+            dtype = pd.CategoricalDtype(categories.sort_values())
+            for frame in aligned:
+                frame[column] = frame[column].astype(dtype)
+    return enforce_schema(pd.concat(aligned, ignore_index=True))
+
+
+def memory_report(df_before, df_after):
+    """
+    Compara la memoria usada por cada columna antes y después de aplicar el esquema.
+
+    Args:
+        df_before (pd.DataFrame): DataFrame original.
+        df_after (pd.DataFrame): DataFrame con el esquema aplicado.
+
+    Returns:
+        pd.DataFrame: Una fila por columna con 'Column', 'Dtype_Before', 'Dtype_After',
+                      'Bytes_Before', 'Bytes_After' y 'Reduction' (fracción ahorrada),
+                      más una fila 'Total'.
+    """
+    bytes_before = df_before.memory_usage(deep=True, index=False)
+    bytes_after = df_after.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'Column': bytes_before.index,
+        'Dtype_Before': [str(df_before[c].dtype) for c in bytes_before.index],
+        'Dtype_After': [str(df_after[c].dtype) for c in bytes_before.index],
+        'Bytes_Before': bytes_before.values,
+        'Bytes_After': bytes_after.reindex(bytes_before.index).values,
+    })
+    total = pd.DataFrame([{
+        'Column': 'Total', 'Dtype_Before': '', 'Dtype_After': '',
+        'Bytes_Before': report['Bytes_Before'].sum(), 'Bytes_After': report['Bytes_After'].sum(),
+    }])
+    report = pd.concat([report, total], ignore_index=True)
+    report['Reduction'] = 1 - report['Bytes_After'] / report['Bytes_Before'].where(report['Bytes_Before'] > 0)
+    return report
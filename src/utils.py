@@ -1,342 +1,1026 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
 import pandas as pd
 import numpy as np
-import datetime
 
-def generate_simulated_data(num_records=1000):
+from src.compute_backend import get_backend
+from src.distinct_sketch import approx_distinct
+from src.frame_registry import FrameRegistry
+from src.instrumentation import profiled
+
+# --- Parámetros de la simulación ---
+# Fechas simuladas que abarcan varios trimestres, similar a la imagen de referencia (2012-2016 Q2)
+_SIM_START_DATE = np.datetime64('2012-01-01')
+_SIM_END_DATE = np.datetime64('2016-06-15') # Hasta el segundo trimestre de 2016
+
+# Listas de valores posibles para las columnas categóricas
+_SIM_PRODUCTS = ['Product 1', 'Product 2']
+_SIM_LICENSE_TYPES = ['License', 'Maintenance Renewal']
+_SIM_REGIONS = ['UK', 'NO', 'GR', 'IT', 'SP', 'LU', 'US', 'CA', 'DE', 'FR'] # Añadimos más regiones
+_SIM_REGION_P = [0.15, 0.12, 0.08, 0.08, 0.07, 0.05, 0.15, 0.1, 0.1, 0.1] # Distribución de probabilidad por región
+_SIM_COMPANIES = [f'Company {i}' for i in range(1, 21)] # 20 empresas para tener variedad en las órdenes
+_SIM_SALES_MANAGERS = [f'Vendedor_{i}' for i in range(1, 16)] # 15 Vendedores distintos (traducido)
+
+# Algunas ciudades por región para simular datos más realistas
+_SIM_REGION_CITIES = {
+    'UK': ['London', 'Manchester', 'Edinburgh'],
+    'NO': ['Oslo', 'Bergen'],
+    'GR': ['Athens', 'Thessaloniki'],
+    'IT': ['Rome', 'Milan', 'Naples'],
+    'SP': ['Madrid', 'Barcelona', 'Seville'],
+    'LU': ['Luxembourg City'],
+    'US': ['New York', 'Los Angeles', 'Chicago', 'Houston'],
+    'CA': ['Toronto', 'Vancouver', 'Montreal'],
+    'DE': ['Berlin', 'Munich', 'Hamburg'],
+    'FR': ['Paris', 'Marseille', 'Lyon']
+}
+
+# Los datos se generan en bloques de tamaño fijo, cada uno con su propio flujo aleatorio
+# independiente derivado de la semilla. Así el resultado para una semilla dada es el mismo
+# sin importar en cuántos fragmentos (o procesos) se reparta la generación.
+SIM_BLOCK_ROWS = 65536
+
+
+def _sim_categorical(codes, values):
     """
-    Genera datos de ventas simulados para el dashboard.
-    Estos datos permiten probar el dashboard sin necesidad de una fuente de datos real.
+    Construye una columna categórica a partir de códigos enteros, con las categorías
+    ordenadas alfabéticamente (el mismo orden estable que aplica src/schema.py).
 
     Args:
-        num_records (int): Número de registros de ventas a generar.
+        codes (np.ndarray): Índices sobre la lista values.
+        values (list): Valores posibles de la columna.
 
     Returns:
-        pd.DataFrame: DataFrame con datos de ventas simulados.
+        pd.Categorical: Columna categórica.
     """
-    np.random.seed(42) # Se establece una semilla para que los datos sean reproducibles
+    order = np.argsort(values)
+    rank = np.empty(len(values), dtype=np.int32)
+    rank[order] = np.arange(len(values))
+    return pd.Categorical.from_codes(rank[codes], categories=np.asarray(values)[order])
+
+
+def _generate_sim_block(seed, block_index, num_rows):
+    """
+    Genera un bloque de filas simuladas de forma totalmente vectorizada usando un
+    numpy.random.Generator propio del bloque (no toca el estado aleatorio global).
+
+    Args:
+        seed (int): Semilla base de la simulación.
+        block_index (int): Índice del bloque; determina su flujo aleatorio independiente.
+        num_rows (int): Número de filas del bloque.
+
+    Returns:
+        pd.DataFrame: Bloque de datos de ventas simulados.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block_index,)))
 
-    # Fechas simuladas que abarcan varios trimestres, similar a la imagen de referencia (2012-2016 Q2)
-    start_date = datetime.date(2012, 1, 1)
-    end_date = datetime.date(2016, 6, 15) # Hasta el segundo trimestre de 2016
-    
     # Genera fechas aleatorias dentro del rango especificado
-    dates = pd.to_datetime([start_date + datetime.timedelta(days=np.random.randint(0, (end_date - start_date).days)) for _ in range(num_records)])
-
-    # Listas de valores posibles para las columnas categóricas
-    products = ['Product 1', 'Product 2']
-    license_types = ['License', 'Maintenance Renewal']
-    regions = ['UK', 'NO', 'GR', 'IT', 'SP', 'LU', 'US', 'CA', 'DE', 'FR'] # Añadimos más regiones
-    companies = [f'Company {i}' for i in range(1, 21)] # 20 empresas para tener variedad en las órdenes
-    sales_managers = [f'Vendedor_{i}' for i in range(1, 16)] # 15 Vendedores distintos (traducido)
-
-    # Definir algunas ciudades por región para simular datos más realistas
-    region_cities = {
-        'UK': ['London', 'Manchester', 'Edinburgh'],
-        'NO': ['Oslo', 'Bergen'],
-        'GR': ['Athens', 'Thessaloniki'],
-        'IT': ['Rome', 'Milan', 'Naples'],
-        'SP': ['Madrid', 'Barcelona', 'Seville'],
-        'LU': ['Luxembourg City'],
-        'US': ['New York', 'Los Angeles', 'Chicago', 'Houston'],
-        'CA': ['Toronto', 'Vancouver', 'Montreal'],
-        'DE': ['Berlin', 'Munich', 'Hamburg'],
-        'FR': ['Paris', 'Marseille', 'Lyon']
-    }
-    
-    # Crear una lista de ciudades basada en las regiones seleccionadas aleatoriamente
-    cities = [np.random.choice(region_cities[region]) for region in np.random.choice(regions, num_records, p=[0.15, 0.12, 0.08, 0.08, 0.07, 0.05, 0.15, 0.1, 0.1, 0.1])]
+    span_days = int((_SIM_END_DATE - _SIM_START_DATE).astype(int))
+    dates = _SIM_START_DATE + rng.integers(0, span_days, num_rows).astype('timedelta64[D]')
 
+    # La ciudad se elige dentro de la región sorteada para cada fila: se aplanan las listas
+    # de ciudades y se calcula un desplazamiento por región
+    region_codes = rng.choice(len(_SIM_REGIONS), num_rows, p=_SIM_REGION_P)
+    cities_per_region = np.array([len(_SIM_REGION_CITIES[r]) for r in _SIM_REGIONS])
+    city_offsets = np.concatenate(([0], np.cumsum(cities_per_region)[:-1]))
+    all_cities = [city for r in _SIM_REGIONS for city in _SIM_REGION_CITIES[r]]
+    city_codes = city_offsets[region_codes] + (rng.random(num_rows) * cities_per_region[region_codes]).astype(np.int64)
 
     # Creación del diccionario de datos con valores aleatorios
     data = {
-        'Date': dates, # Fechas de las transacciones
-        'Product': np.random.choice(products, num_records), # Producto asociado a la venta
-        'License_Type': np.random.choice(license_types, num_records), # Tipo de licencia (nueva o renovación)
-        'Region': np.random.choice(regions, num_records, p=[0.15, 0.12, 0.08, 0.08, 0.07, 0.05, 0.15, 0.1, 0.1, 0.1]), # Región con distribución de probabilidad
-        'City': cities, # Ciudad de la transacción
-        'Company': np.random.choice(companies, num_records), # Empresa que realizó la compra
-        'Amount': np.random.randint(100, 5000, num_records), # Monto de la venta
-        'Transactions': np.random.randint(1, 5, num_records), # Número de transacciones por venta (simulado)
-        'Active_Clients': np.random.randint(0, 2, num_records), # 1 si el cliente se considera activo, 0 si no
-        'Sales_Manager': np.random.choice(sales_managers, num_records), # Vendedor asignado a la transacción
-        'Admins': np.random.randint(0, 10, num_records), # Cantidad de licencias de administradores vendidas
-        'Designers': np.random.randint(0, 8, num_records), # Cantidad de licencias de diseñadores vendidas
-        'Servers': np.random.randint(0, 5, num_records), # Cantidad de licencias de servidores vendidas
+        'Date': dates.astype('datetime64[ns]'), # Fechas de las transacciones
+        'Product': _sim_categorical(rng.integers(0, len(_SIM_PRODUCTS), num_rows), _SIM_PRODUCTS), # Producto asociado a la venta
+        'License_Type': _sim_categorical(rng.integers(0, len(_SIM_LICENSE_TYPES), num_rows), _SIM_LICENSE_TYPES), # Tipo de licencia (nueva o renovación)
+        'Region': _sim_categorical(region_codes, _SIM_REGIONS), # Región con distribución de probabilidad
+        'City': _sim_categorical(city_codes, all_cities), # Ciudad de la transacción (perteneciente a su región)
+        'Company': _sim_categorical(rng.integers(0, len(_SIM_COMPANIES), num_rows), _SIM_COMPANIES), # Empresa que realizó la compra
+        'Amount': rng.integers(100, 5000, num_rows), # Monto de la venta
+        'Transactions': rng.integers(1, 5, num_rows, dtype=np.int32), # Número de transacciones por venta (simulado)
+        'Active_Clients': rng.integers(0, 2, num_rows, dtype=np.int8), # 1 si el cliente se considera activo, 0 si no
+        'Sales_Manager': _sim_categorical(rng.integers(0, len(_SIM_SALES_MANAGERS), num_rows), _SIM_SALES_MANAGERS), # Vendedor asignado a la transacción
+        'Admins': rng.integers(0, 10, num_rows, dtype=np.int16), # Cantidad de licencias de administradores vendidas
+        'Designers': rng.integers(0, 8, num_rows, dtype=np.int16), # Cantidad de licencias de diseñadores vendidas
+        'Servers': rng.integers(0, 5, num_rows, dtype=np.int16), # Cantidad de licencias de servidores vendidas
     }
+    return pd.DataFrame(data)
+
+
+def _generate_sim_chunk(seed, num_records, first_block, last_block):
+    """
+    Genera los bloques [first_block, last_block) de una simulación de num_records filas.
+    Es una función de nivel de módulo para poder ejecutarse en otro proceso.
+
+    Args:
+        seed (int): Semilla base de la simulación.
+        num_records (int): Número total de registros de la simulación.
+        first_block (int): Primer bloque a generar.
+        last_block (int): Bloque final (excluido).
 
-    df = pd.DataFrame(data) # Crea un DataFrame de Pandas a partir del diccionario de datos
+    Returns:
+        pd.DataFrame: Filas de los bloques solicitados, en orden.
+    """
+    blocks = []
+    for block_index in range(first_block, last_block):
+        start = block_index * SIM_BLOCK_ROWS
+        num_rows = min(SIM_BLOCK_ROWS, num_records - start)
+        blocks.append(_generate_sim_block(seed, block_index, num_rows))
+    chunk = pd.concat(blocks, ignore_index=True) if len(blocks) > 1 else blocks[0]
+    chunk.index = pd.RangeIndex(first_block * SIM_BLOCK_ROWS, first_block * SIM_BLOCK_ROWS + len(chunk))
+    return chunk
 
-    return df
 
-def calculate_qtd_metrics(df, current_date):
+def _sim_chunk_ranges(num_records, chunk_size):
+    """
+    Divide una simulación en rangos de bloques. chunk_size se redondea hacia arriba
+    a un múltiplo de SIM_BLOCK_ROWS para que los fragmentos coincidan con los bloques.
+
+    Args:
+        num_records (int): Número total de registros.
+        chunk_size (int): Número aproximado de filas por fragmento.
+
+    Returns:
+        list: Lista de tuplas (primer_bloque, bloque_final).
+    """
+    num_blocks = -(-num_records // SIM_BLOCK_ROWS)
+    blocks_per_chunk = max(1, -(-chunk_size // SIM_BLOCK_ROWS))
+    return [(b, min(b + blocks_per_chunk, num_blocks)) for b in range(0, num_blocks, blocks_per_chunk)]
+
+
+def iter_simulated_chunks(num_records, seed=42, chunk_size=1_000_000, workers=1):
+    """
+    Genera datos simulados por fragmentos, opcionalmente en paralelo en varios procesos.
+    Los fragmentos se entregan en orden y su concatenación es idéntica a
+    generate_simulated_data(num_records, seed) para cualquier chunk_size o workers.
+
+    Args:
+        num_records (int): Número total de registros a generar.
+        seed (int): Semilla de la simulación.
+        chunk_size (int): Número aproximado de filas por fragmento.
+        workers (int): Número de procesos generadores (1 = en el proceso actual).
+
+    Yields:
+        pd.DataFrame: Fragmentos consecutivos de la simulación.
+    """
+    ranges = _sim_chunk_ranges(num_records, chunk_size)
+    if workers <= 1:
+        for first_block, last_block in ranges:
+            yield _generate_sim_chunk(seed, num_records, first_block, last_block)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    # Se mantienen como máximo 2 fragmentos por proceso en vuelo para acotar la memoria
+    max_pending = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for first_block, last_block in ranges:
+            pending.append(executor.submit(_generate_sim_chunk, seed, num_records, first_block, last_block))
+            if len(pending) >= max_pending:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+@profiled
+def write_simulated_data(path, num_records, seed=42, chunk_size=1_000_000, workers=1):
+    """
+    Genera datos simulados y los escribe directamente en disco fragmento a fragmento,
+    sin materializar la tabla completa en memoria (útil para pruebas de carga de 10^8 filas).
+    El formato se deduce de la extensión: '.parquet' (requiere pyarrow) o '.csv'.
+
+    Args:
+        path (str): Ruta del archivo de salida.
+        num_records (int): Número total de registros a generar.
+        seed (int): Semilla de la simulación.
+        chunk_size (int): Número aproximado de filas por fragmento.
+        workers (int): Número de procesos generadores.
+    """
+    chunks = iter_simulated_chunks(num_records, seed=seed, chunk_size=chunk_size, workers=workers)
+    if path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    elif path.endswith('.csv'):
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    else:
+        raise ValueError(f"Formato de salida no soportado: {path} (usa .parquet o .csv)")
+    print(f"{num_records} registros simulados escritos en {path}.")
+
+
+@profiled
+def generate_simulated_data(num_records=1000, seed=42):
+    """
+    Genera datos de ventas simulados para el dashboard.
+    Estos datos permiten probar el dashboard sin necesidad de una fuente de datos real.
+    La generación es vectorizada y reproducible: para una misma semilla se obtienen
+    siempre los mismos datos (ver iter_simulated_chunks para volúmenes grandes).
+
+    Args:
+        num_records (int): Número de registros de ventas a generar.
+        seed (int): Semilla para que los datos sean reproducibles.
+
+    Returns:
+        pd.DataFrame: DataFrame con datos de ventas simulados.
+    """
+    if num_records <= 0:
+        return _generate_sim_block(seed, 0, 0)
+    return _generate_sim_chunk(seed, num_records, 0, -(-num_records // SIM_BLOCK_ROWS))
+
+# --- Claves de periodo precalculadas ---
+# Columnas enteras que prepare_sales_data añade una sola vez tras la carga, para que las
+# agregaciones agrupen por enteros en lugar de recalcular to_datetime/to_period en cada llamada.
+PERIOD_KEY_COLUMNS = ['Year', 'Quarter_Key', 'Month_Key', 'ISO_Week', 'Day_Of_Quarter', 'Week_Of_Quarter']
+
+
+def _is_cube(data):
+    """
+    Indica si data es un SalesCube (src/cube.py) en lugar de un DataFrame de transacciones.
+    Las sumas se agregan igual sobre las celdas del cubo; solo los conteos únicos
+    necesitan su estado fusionable.
+
+    Args:
+        data: DataFrame de ventas o SalesCube.
+
+    Returns:
+        bool: True si data es un cubo.
+    """
+    return hasattr(data, 'cells') and hasattr(data, 'distinct_count')
+
+
+@profiled
+def prepare_sales_data(df):
+    """
+    Etapa de preparación que se ejecuta una vez después de load_data: precalcula las claves
+    enteras de periodo usadas por todas las agregaciones. No modifica el DataFrame recibido.
+    Si las claves ya existen, devuelve el mismo DataFrame.
+
+    Claves añadidas:
+        'Year': año (ej. 2016).
+        'Quarter_Key': ordinal del trimestre (año * 4 + trimestre - 1); ver quarter_label.
+        'Month_Key': ordinal del mes (año * 12 + mes - 1); ver month_label.
+        'ISO_Week': número de semana ISO.
+        'Day_Of_Quarter': días transcurridos desde el inicio del trimestre (0 = primer día).
+        'Week_Of_Quarter': semana dentro del trimestre (1 = primera semana).
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas con 'Date' como datetime.
+
+    Returns:
+        pd.DataFrame: DataFrame con las columnas de PERIOD_KEY_COLUMNS.
+    """
+    if _is_cube(df):
+        return df.cells # Las celdas del cubo ya incluyen las claves de periodo
+    if all(column in df.columns for column in PERIOD_KEY_COLUMNS):
+        return df
+
+    dates = pd.to_datetime(df['Date'])
+    days = dates.values.astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    month_ordinal = months.astype(np.int64) # Meses desde 1970-01
+    year = month_ordinal // 12 + 1970
+    month_index = month_ordinal % 12 # 0 = enero
+    quarter_start = (months - (month_index % 3)).astype('datetime64[D]')
+    day_of_quarter = (days - quarter_start).astype(np.int64)
+
+    return df.assign(
+        Year=year.astype(np.int16),
+        Quarter_Key=(year * 4 + month_index // 3).astype(np.int32),
+        Month_Key=(year * 12 + month_index).astype(np.int32),
+        ISO_Week=dates.dt.isocalendar().week.to_numpy(dtype=np.int8),
+        Day_Of_Quarter=day_of_quarter.astype(np.int16),
+        Week_Of_Quarter=(day_of_quarter // 7 + 1).astype(np.int8),
+    )
+
+
+def quarter_label(quarter_key):
+    """
+    Convierte un ordinal de trimestre (Quarter_Key) en su etiqueta (ej. '2016Q2').
+
+    Args:
+        quarter_key (int): Ordinal del trimestre.
+
+    Returns:
+        str: Etiqueta del trimestre.
+    """
+    return f"{quarter_key // 4}Q{quarter_key % 4 + 1}"
+
+
+def quarter_key_from_label(label):
+    """
+    Convierte una etiqueta de trimestre (ej. '2016Q2') en su ordinal (Quarter_Key).
+
+    Args:
+        label (str): Etiqueta del trimestre.
+
+    Returns:
+        int: Ordinal del trimestre.
+    """
+    return int(label[:4]) * 4 + int(label[5]) - 1
+
+
+def month_label(month_key):
+    """
+    Convierte un ordinal de mes (Month_Key) en su etiqueta (ej. '2016-04').
+
+    Args:
+        month_key (int): Ordinal del mes.
+
+    Returns:
+        str: Etiqueta del mes.
+    """
+    return f"{month_key // 12}-{month_key % 12 + 1:02d}"
+
+@profiled
+def calculate_qtd_metrics(df, current_date, approximate=False):
     """
     Calcula las métricas QTD (Quarter To Date - Del inicio del trimestre hasta la fecha actual)
-    a partir del DataFrame de ventas.
+    a partir del DataFrame de ventas. Vista sobre compute_dashboard_snapshot.
 
     Args:
-        df (pd.DataFrame): DataFrame de ventas filtrado.
+        df (pd.DataFrame or SalesCube): DataFrame de ventas filtrado, o cubo filtrado
+                                        (en el cubo el corte por fecha es por día completo).
         current_date (datetime.date): Fecha actual para calcular el QTD.
+        approximate (bool): Si True, clientes y SAMs únicos se estiman con HyperLogLog.
 
     Returns:
         dict: Un diccionario con las métricas QTD calculadas.
     """
-    # Convertir la fecha actual a formato datetime para una comparación precisa
-    current_datetime = pd.to_datetime(current_date)
+    return compute_dashboard_snapshot(df, current_date=current_date, approximate=approximate).qtd_metrics
 
-    # Determinar el inicio del trimestre actual basado en la fecha actual
-    current_year = current_datetime.year
-    current_quarter_num = (current_datetime.month - 1) // 3 + 1 # 1 para Q1, 2 para Q2, etc.
-    
-    # Definir el inicio y fin del trimestre actual
-    if current_quarter_num == 1:
-        qtd_start = pd.to_datetime(f'{current_year}-01-01')
-        qtd_end = pd.to_datetime(f'{current_year}-03-31')
-    elif current_quarter_num == 2:
-        qtd_start = pd.to_datetime(f'{current_year}-04-01')
-        qtd_end = pd.to_datetime(f'{current_year}-06-30')
-    elif current_quarter_num == 3:
-        qtd_start = pd.to_datetime(f'{current_year}-07-01')
-        qtd_end = pd.to_datetime(f'{current_year}-09-30')
-    else: # Cuarto trimestre (Q4)
-        qtd_start = pd.to_datetime(f'{current_year}-10-01')
-        qtd_end = pd.to_datetime(f'{current_year}-12-31')
-
-    # Filtrar el DataFrame para incluir solo las transacciones dentro del trimestre actual
-    # y hasta la fecha actual de análisis
-    qtd_df = df[(df['Date'] >= qtd_start) & (df['Date'] <= current_datetime)].copy()
-
-    # Calcular Días restantes para fin de trimestre (EOQ - End Of Quarter)
-    # Si la fecha actual es anterior al fin del trimestre, calcula los días restantes.
-    days_left_eoq = (qtd_end.date() - current_date).days if current_date <= qtd_end.date() else 0
-
-    # Calcular las métricas QTD sumando o contando valores únicos
-    qtd_transactions = qtd_df['Transactions'].sum() if not qtd_df.empty else 0
-    qtd_active_clients = qtd_df['Company'].nunique() if not qtd_df.empty else 0 # Clientes únicos que han realizado transacciones
-    # Modificado: SAMs ahora se refiere a los Sales_Manager únicos que han realizado ventas en el QTD
-    qtd_sams = qtd_df['Sales_Manager'].nunique() if not qtd_df.empty else 0 
-    qtd_sales = qtd_df['Amount'].sum() if not qtd_df.empty else 0
-
-    # Licencias vendidas por tipo (suma directa de las columnas respectivas)
-    admins_licenses = qtd_df['Admins'].sum() if not qtd_df.empty else 0
-    designers_licenses = qtd_df['Designers'].sum() if not qtd_df.empty else 0
-    servers_licenses = qtd_df['Servers'].sum() if not qtd_df.empty else 0
-
-    return {
-        "Days Left EOQ": days_left_eoq,
-        "QTD Transactions": qtd_transactions,
-        "QTD Active Clients": qtd_active_clients,
-        "QTD SAMs": qtd_sams, # Ahora muestra el conteo de SAMs únicos
-        "QTD Sales": qtd_sales,
-        "Admins": admins_licenses,
-        "Designers": designers_licenses,
-        "Servers": servers_licenses
-    }
-
-def get_last_n_orders(df, n=5):
+@profiled
+def get_last_n_orders(df, n=5, offset=0):
     """
     Obtiene las últimas N órdenes (transacciones) del DataFrame de ventas,
-    ordenadas por fecha de forma descendente.
+    ordenadas por fecha de forma descendente. Solo se ordenan las offset + n filas más
+    recientes (mismo orden que el snapshot de paneles), sin calcular el resto de paneles.
+
+    Para el DataFrame completo cargado por load_data, recent_orders.get_recent_orders
+    mantiene un índice por fecha que evita recorrer la tabla en cada consulta.
 
     Args:
-        df (pd.DataFrame): DataFrame de ventas.
+        df (pd.DataFrame): DataFrame de ventas ('Date' ya es datetime tras load_data).
+                           Necesita las órdenes individuales: no admite un SalesCube.
         n (int): Número de órdenes más recientes a retornar.
+        offset (int): Órdenes más recientes a saltar (paginación).
 
     Returns:
         pd.DataFrame: DataFrame con las últimas N órdenes, incluyendo
                       'Company' (empresa) y 'Amount' (monto).
     """
-    # Asegurarse de que la columna 'Date' es de tipo datetime y ordenar por fecha descendente
-    df['Date'] = pd.to_datetime(df['Date'])
-    last_orders = df.sort_values(by='Date', ascending=False).head(n)
-    
-    # Seleccionar solo las columnas relevantes para la visualización de órdenes
-    return last_orders[['Company', 'Amount']]
+    return _latest_orders(df, offset + n).iloc[offset:]
+
+def format_amount(x):
+    """
+    Formatea un monto para una visualización amigable (ej. $451K en lugar de 451000).
+
+    Args:
+        x (float): Monto a formatear.
+
+    Returns:
+        str: Monto formateado en unidades, miles (K) o millones (M).
+    """
+    if x >= 1000 and x < 1000000:
+        return f"${x/1000:.0f}K"
+    if x >= 1000000:
+        return f"${x/1000000:.1f}M" # .1f para M
+    return f"${x:,.0f}"
+
+OTHERS_LABEL = 'Otros' # Categoría que agrupa las ubicaciones fuera del top K
+
+def bucket_top_k(ranking, column, k):
+    """
+    Conserva las K ubicaciones con más ventas de un ranking y agrupa el resto en una única
+    fila "Otros (n)", para que el tamaño de los gráficos no dependa del número de ubicaciones.
+
+    Args:
+        ranking (pd.DataFrame): Ranking con column, 'Amount' y 'Formatted_Amount', de mayor a menor monto.
+        column (str): Columna de la ubicación ('Region' o 'City').
+        k (int): Ubicaciones a conservar (None o 0 = todas).
 
+    Returns:
+        tuple: (ranking con a lo sumo k + 1 filas, DataFrame con las ubicaciones agrupadas en "Otros").
+    """
+    if not k or len(ranking) <= k + 1: # Agrupar una sola ubicación no reduce nada
+        return ranking, ranking.iloc[:0]
+    top = ranking.iloc[:k]
+    others = ranking.iloc[k:]
+    others_amount = others['Amount'].sum()
+    others_row = pd.DataFrame({
+        column: [f"{OTHERS_LABEL} ({len(others)})"],
+        'Amount': [others_amount],
+        'Formatted_Amount': [format_amount(others_amount)],
+    })
+    bucketed = pd.concat([top.astype({column: object}), others_row], ignore_index=True)
+    return bucketed, others.reset_index(drop=True)
+
+def bucket_top_n(df, column, n, value='Amount'):
+    """
+    Conserva los N valores de una columna con más ventas y reagrupa las filas del resto bajo
+    "Otros (m)", sumando value sobre las demás columnas. Acota el número de series de los
+    gráficos de vendedores sin importar cuántos vendedores o regiones haya.
+
+    Args:
+        df (pd.DataFrame): Datos agregados con column, value y otras columnas de agrupación.
+        column (str): Columna a acotar (ej. 'Sales_Manager' o 'Region').
+        n (int): Valores a conservar (None o 0 = todos).
+        value (str): Columna numérica que decide el ranking y que se suma en "Otros".
+
+    Returns:
+        pd.DataFrame: Datos con a lo sumo n + 1 valores distintos en column.
+    """
+    totals = df.groupby(column, observed=True)[value].sum()
+    if not n or len(totals) <= n + 1: # Agrupar un solo valor no reduce nada
+        return df
+    top = totals.nlargest(n).index
+    labels = df[column].astype(object).where(df[column].isin(top), f"{OTHERS_LABEL} ({len(totals) - n})")
+    group_columns = [c for c in df.columns if c not in (column, value)]
+    bucketed = df.drop(columns=column).assign(**{column: labels})
+    bucketed = bucketed.groupby([column] + group_columns, observed=True, sort=False)[value].sum().reset_index()
+    return bucketed[df.columns.tolist()]
+
+@profiled
 def calculate_country_performance(df):
     """
     Calcula el rendimiento de ventas (monto total) por cada país o región.
+    Vista sobre compute_dashboard_snapshot.
 
     Args:
-        df (pd.DataFrame): DataFrame de ventas.
+        df (pd.DataFrame or SalesCube): DataFrame de ventas o cubo.
 
     Returns:
         pd.DataFrame: DataFrame con el total de ventas por país, ordenado de mayor a menor monto.
                       Incluye una columna 'Formatted_Amount' para una visualización amigable.
     """
-    # Agrupa el DataFrame por 'Region' (región) y suma el 'Amount' (monto) para cada una
-    country_perf = df.groupby('Region')['Amount'].sum().reset_index()
-    country_perf = country_perf.sort_values(by='Amount', ascending=False) # Ordena de mayor a menor venta
-    
-    # Formatear montos para una mejor visualización (ej. $451K en lugar de 451000)
-    country_perf['Formatted_Amount'] = country_perf['Amount'].apply(
-        lambda x: f"${x/1000:.0f}K" if x >= 1000 and x < 1000000 else (
-                  f"${x/1000000:.1f}M" if x >= 1000000 else f"${x:,.0f}" # .1f para M
-        )
-    )
-    return country_perf
+    return compute_dashboard_snapshot(df).country_performance
 
+@profiled
 def calculate_city_performance(df):
     """
     Calcula el rendimiento de ventas (monto total) por cada ciudad.
+    Vista sobre compute_dashboard_snapshot.
 
     Args:
-        df (pd.DataFrame): DataFrame de ventas.
+        df (pd.DataFrame or SalesCube): DataFrame de ventas o cubo.
 
     Returns:
         pd.DataFrame: DataFrame con el total de ventas por ciudad, ordenado de mayor a menor monto.
                       Incluye una columna 'Formatted_Amount' para una visualización amigable.
     """
-    # Agrupa el DataFrame por 'City' y suma el 'Amount' para cada una
-    city_perf = df.groupby('City')['Amount'].sum().reset_index()
-    city_perf = city_perf.sort_values(by='Amount', ascending=False) # Ordena de mayor a menor venta
-    
-    # Formatear montos para una mejor visualización
-    city_perf['Formatted_Amount'] = city_perf['Amount'].apply(
-        lambda x: f"${x/1000:.0f}K" if x >= 1000 and x < 1000000 else (
-                  f"${x/1000000:.1f}M" if x >= 1000000 else f"${x:,.0f}"
-        )
-    )
-    return city_perf
+    return compute_dashboard_snapshot(df).city_performance
 
-def get_quarterly_data(df):
+@profiled
+def get_quarterly_data(df, approximate=False):
     """
-    Prepara los datos para los gráficos de métricas trimestrales.
-    Agrupa los datos por trimestre y calcula métricas relevantes como suma de ventas,
-    transacciones, clientes activos, SAMs, y licencias por tipo.
+    Prepara los datos para los gráficos de métricas trimestrales: suma de ventas,
+    transacciones, clientes activos, SAMs, y licencias por tipo para cada trimestre.
+    Vista sobre compute_dashboard_snapshot.
 
     Args:
-        df (pd.DataFrame): DataFrame de ventas.
+        df (pd.DataFrame or SalesCube): DataFrame de ventas (idealmente ya pasado por
+                                        prepare_sales_data) o cubo.
+        approximate (bool): Si True, clientes y SAMs únicos se estiman con HyperLogLog.
 
     Returns:
         pd.DataFrame: DataFrame con métricas agregadas por trimestre.
     """
-    # Asegurarse de que 'Date' sea de tipo datetime
-    df['Date'] = pd.to_datetime(df['Date'])
-    
-    # Crear una columna de trimestre (ej. '2016Q2') a partir de la fecha
-    df['Quarter'] = df['Date'].dt.to_period('Q').astype(str)
-    
-    # Agrupar por trimestre y calcular las métricas sumando o contando valores únicos
-    quarterly_metrics = df.groupby('Quarter').agg(
-        Amount=('Amount', 'sum'), # Suma total de ventas por trimestre
-        Transactions=('Transactions', 'sum'), # Suma total de transacciones por trimestre
-        Active_Clients=('Company', 'nunique'), # Conteo de clientes únicos por trimestre
-        SAMs=('Sales_Manager', 'nunique'), # Conteo de Sales Managers únicos que tuvieron ventas
-        Admins=('Admins', 'sum'), # Suma de licencias de Admins
-        Designers=('Designers', 'sum'), # Suma de licencias de Designers
-        Servers=('Servers', 'sum') # Suma de licencias de Servers
-    ).reset_index() # Resetea el índice para que 'Quarter' sea una columna normal
-    
-    # Ordenar el DataFrame por año y número de trimestre para asegurar la secuencia correcta en los gráficos
-    quarterly_metrics['Year'] = quarterly_metrics['Quarter'].apply(lambda x: int(x[:4]))
-    quarterly_metrics['Q_Num'] = quarterly_metrics['Quarter'].apply(lambda x: int(x[5]))
-    quarterly_metrics = quarterly_metrics.sort_values(by=['Year', 'Q_Num']).drop(columns=['Year', 'Q_Num'])
-    
-    return quarterly_metrics
+    return compute_dashboard_snapshot(df, approximate=approximate).quarterly
 
-def get_running_totals_by_week(df, selected_quarters_labels):
+@profiled
+def get_running_totals_by_week(df, selected_quarters_labels, baselines=(), average_quarters=4):
     """
     Calcula las ventas acumuladas semanales para los trimestres seleccionados.
+    Vista sobre compute_dashboard_snapshot.
     
     Args:
-        df (pd.DataFrame): DataFrame de ventas.
+        df (pd.DataFrame or SalesCube): DataFrame de ventas (idealmente ya pasado por
+                                        prepare_sales_data) o cubo.
         selected_quarters_labels (list): Lista de etiquetas de trimestre (ej. ['2016Q1', '2016Q2']) a visualizar.
+        baselines (list): Curvas de referencia del último trimestre seleccionado: 'prior_quarter',
+                          'last_year' y/o 'average' (media de los average_quarters anteriores).
+        average_quarters (int): Trimestres promediados por la referencia 'average'.
 
     Returns:
         pd.DataFrame: DataFrame con las ventas acumuladas por semana y trimestre para los trimestres seleccionados.
-                      Incluye una columna 'Comparison_Type' para el resaltado.
+                      Incluye una columna 'Comparison_Type' para el resaltado ('Selected' o 'Baseline').
     """
-    df['Date'] = pd.to_datetime(df['Date']) # Asegurarse de que 'Date' sea de tipo datetime
-    df['Quarter'] = df['Date'].dt.to_period('Q')
-    
-    quarter_weeks_data = []
-
-    # Filtrar el DataFrame original para incluir solo los trimestres seleccionados
-    df_filtered_by_quarters = df[df['Quarter'].astype(str).isin(selected_quarters_labels)].copy()
-
-    # Itera sobre cada trimestre seleccionado para calcular las ventas acumuladas por semana
-    for quarter, quarter_df in df_filtered_by_quarters.groupby('Quarter'):
-        if quarter_df.empty:
-            continue
-
-        quarter_start_date = quarter.start_time
-        quarter_df['Days_Since_Q_Start'] = (quarter_df['Date'] - quarter_start_date).dt.days
-        quarter_df['Week_Number'] = (quarter_df['Days_Since_Q_Start'] // 7) + 1
-        quarter_df = quarter_df[quarter_df['Week_Number'] <= 14] # Limitar a 14 semanas por trimestre
-        
-        weekly_sales = quarter_df.groupby('Week_Number')['Amount'].sum().reset_index()
-        weekly_sales['Running_Total'] = weekly_sales['Amount'].cumsum()
-        weekly_sales['Quarter_Label'] = str(quarter)
-        
-        quarter_weeks_data.append(weekly_sales)
-        
-    if not quarter_weeks_data:
-        return pd.DataFrame()
-
-    running_totals_df = pd.concat(quarter_weeks_data)
-    
-    # Asignar un 'Comparison_Type' genérico para diferenciar en el gráfico si se desea,
-    # o simplemente usar Quarter_Label como color.
-    running_totals_df['Comparison_Type'] = 'Selected' 
-    
-    return running_totals_df
+    snapshot = compute_dashboard_snapshot(df, selected_quarters_labels=selected_quarters_labels)
+    if not baselines:
+        return snapshot.running_totals
+    return snapshot.running_totals_compared(selected_quarters_labels, baselines, average_quarters)
+
+@profiled
+def get_running_totals_by_day(df, selected_quarters_labels, baselines=(), average_quarters=4):
+    """
+    Calcula las ventas acumuladas por día del trimestre para los trimestres seleccionados.
+    Vista sobre compute_dashboard_snapshot.
+
+    Args:
+        df (pd.DataFrame or SalesCube): DataFrame de ventas (idealmente ya pasado por
+                                        prepare_sales_data) o cubo.
+        selected_quarters_labels (list): Lista de etiquetas de trimestre a visualizar.
+        baselines (list): Curvas de referencia (ver get_running_totals_by_week).
+        average_quarters (int): Trimestres promediados por la referencia 'average'.
+
+    Returns:
+        pd.DataFrame: Ventas acumuladas por 'Day_Number' (1 = primer día) y trimestre, con 'Comparison_Type'.
+    """
+    return compute_dashboard_snapshot(df).running_totals_compared(
+        selected_quarters_labels, baselines, average_quarters, granularity='day'
+    )
 
 
+@profiled
 def get_seller_performance_data(df):
     """
     Agrega los datos de ventas para mostrar el desempeño de los vendedores
-    por país, producto y tipo de venta.
+    por país, producto y tipo de venta. Vista sobre compute_dashboard_snapshot.
 
     Args:
-        df (pd.DataFrame): DataFrame de ventas filtrado.
+        df (pd.DataFrame or SalesCube): DataFrame de ventas filtrado o cubo filtrado.
 
     Returns:
         pd.DataFrame: DataFrame agregado con las ventas totales por Sales_Manager,
                       Region, Product y License_Type.
     """
-    # Agrupar por las dimensiones clave y sumar el monto de ventas
-    seller_perf_df = df.groupby(['Sales_Manager', 'Region', 'Product', 'License_Type'])['Amount'].sum().reset_index()
-    
-    # Ordenar por el monto de ventas para que el gráfico sea más fácil de leer
-    seller_perf_df = seller_perf_df.sort_values(by='Amount', ascending=False)
-    
-    return seller_perf_df
+    return compute_dashboard_snapshot(df).seller_performance
 
+@profiled
 def get_seller_performance_over_time_data(df, time_granularity='quarter'):
     """
     Agrega los datos de ventas para mostrar el desempeño de los vendedores a lo largo del tiempo.
+    Vista sobre compute_dashboard_snapshot.
 
     Args:
-        df (pd.DataFrame): DataFrame de ventas filtrado.
+        df (pd.DataFrame or SalesCube): DataFrame de ventas filtrado (idealmente ya pasado
+                                        por prepare_sales_data) o cubo filtrado.
         time_granularity (str): 'month' o 'quarter' para la agregación temporal.
 
     Returns:
         pd.DataFrame: DataFrame agregado con las ventas totales por Sales_Manager y periodo.
     """
-    df['Date'] = pd.to_datetime(df['Date'])
-    
-    if time_granularity == 'month':
-        df['Period'] = df['Date'].dt.to_period('M').astype(str)
-    else: # default to 'quarter'
-        df['Period'] = df['Date'].dt.to_period('Q').astype(str)
+    return compute_dashboard_snapshot(df).seller_performance_over_time(time_granularity)
 
-    # Agrupar por Sales_Manager y Period, y sumar el monto
-    seller_time_perf_df = df.groupby(['Sales_Manager', 'Period'])['Amount'].sum().reset_index()
-    
-    # Ordenar por periodo para una visualización correcta de la serie temporal
-    seller_time_perf_df['Sort_Period'] = seller_time_perf_df['Period'].astype('period[Q]') if time_granularity == 'quarter' else seller_time_perf_df['Period'].astype('period[M]')
-    seller_time_perf_df = seller_time_perf_df.sort_values(by=['Sales_Manager', 'Sort_Period']).drop(columns='Sort_Period')
-    
-    return seller_time_perf_df
 
+# --- Motor de cálculo del dashboard ---
+# Claves del paso único: toda la información que necesitan los paneles, a grano de mes
+# (los totales acumulados salen de su propio agregado por día del trimestre)
+_SNAPSHOT_KEYS = ['Quarter_Key', 'Month_Key', 'Region', 'City', 'Sales_Manager', 'Product', 'License_Type']
+_SNAPSHOT_MEASURES = ['Amount', 'Transactions', 'Admins', 'Designers', 'Servers']
+_SNAPSHOT_MEMO_SIZE = 8 # Snapshots recordados por conjunto de datos (combinaciones de parámetros)
+
+_snapshots = FrameRegistry() # DataFrame o SalesCube -> {parámetros: DashboardSnapshot}
+
+# --- Curvas de totales acumulados ---
+QUARTER_DAYS = 92 # Días del trimestre más largo (Day_Of_Quarter de 0 a 91)
+QUARTER_WEEKS = 14 # Semanas del trimestre (la 14 solo tiene el día 91)
+# Curvas de referencia con las que comparar el último trimestre seleccionado
+RUNNING_BASELINES = {
+    'prior_quarter': 'Trimestre anterior',
+    'last_year': 'Mismo trimestre del año anterior',
+    'average': 'Media de los últimos {n} trimestres',
+}
+DEFAULT_BASELINE_QUARTERS = 4 # Trimestres promediados por la referencia 'average'
+
+
+@dataclass
+class RunningCurves:
+    """
+    Curvas de ventas acumuladas de todos los trimestres a la vez: una matriz de trimestres
+    consecutivos (fila 0 = first_quarter) por posición dentro del trimestre (día o semana),
+    acumulada con una única suma por filas. Las curvas de los trimestres seleccionados y las
+    de referencia (trimestre anterior, mismo trimestre del año anterior, media de los últimos
+    N) son lecturas de filas de la misma matriz.
+    """
+    first_quarter: int # Quarter_Key de la primera fila
+    amounts: np.ndarray # Ventas por (trimestre, posición)
+    observed: np.ndarray # True donde hay ventas registradas en esa posición
+    position_column: str # 'Day_Number' o 'Week_Number' (1 = primera posición)
+
+    def __post_init__(self):
+        self.totals = self.amounts.cumsum(axis=1) # Suma acumulada de todos los trimestres de una vez
+
+    @classmethod
+    def from_amounts(cls, quarter_keys, positions, amounts, length, position_column):
+        """
+        Construye las curvas a partir de ventas agregadas por trimestre y posición.
+
+        Args:
+            quarter_keys (array-like): Quarter_Key de cada fila.
+            positions (array-like): Posición dentro del trimestre (1 = primera).
+            amounts (array-like): Ventas de cada fila.
+            length (int): Número de posiciones del trimestre (QUARTER_DAYS o QUARTER_WEEKS).
+            position_column (str): Nombre de la columna de posición en las tablas resultantes.
+
+        Returns:
+            RunningCurves: Curvas de todos los trimestres presentes.
+        """
+        quarter_keys = np.asarray(quarter_keys, dtype=np.int64)
+        positions = np.asarray(positions, dtype=np.int64) - 1
+        amounts = np.asarray(amounts)
+        keep = (positions >= 0) & (positions < length)
+        quarter_keys, positions, amounts = quarter_keys[keep], positions[keep], amounts[keep]
+        first = int(quarter_keys.min()) if len(quarter_keys) else 0
+        rows = int(quarter_keys.max()) - first + 1 if len(quarter_keys) else 0
+        dtype = np.int64 if amounts.dtype.kind in 'biu' else np.float64
+        matrix = np.zeros((rows, length), dtype=dtype)
+        observed = np.zeros((rows, length), dtype=bool)
+        np.add.at(matrix, (quarter_keys - first, positions), amounts)
+        observed[quarter_keys - first, positions] = True
+        return cls(first, matrix, observed, position_column)
+
+    @classmethod
+    def from_running_totals(cls, running_totals):
+        """
+        Reconstruye las curvas semanales a partir de una tabla de totales acumulados (la de la
+        base de datos o la de los snapshots precalculados, con todos los trimestres).
+
+        Args:
+            running_totals (pd.DataFrame): Columnas 'Week_Number', 'Amount' y 'Quarter_Label'.
+
+        Returns:
+            RunningCurves: Curvas semanales.
+        """
+        if running_totals.empty:
+            return cls.from_amounts([], [], np.zeros(0, dtype=np.int64), QUARTER_WEEKS, 'Week_Number')
+        keys = [quarter_key_from_label(label) for label in running_totals['Quarter_Label']]
+        return cls.from_amounts(keys, running_totals['Week_Number'], running_totals['Amount'], QUARTER_WEEKS, 'Week_Number')
+
+    def weekly(self):
+        """
+        Curvas semanales derivadas de las diarias: el total acumulado de cada semana es el del
+        último día de la semana (sin volver a agregar).
+
+        Returns:
+            RunningCurves: Curvas por semana del trimestre.
+        """
+        if self.position_column == 'Week_Number':
+            return self
+        starts = np.arange(0, QUARTER_DAYS, 7)
+        ends = np.minimum(starts + 6, QUARTER_DAYS - 1)
+        weekly_amounts = np.diff(self.totals[:, ends], axis=1, prepend=0) if len(self.totals) else self.totals[:, ends]
+        observed = np.logical_or.reduceat(self.observed, starts, axis=1) if len(self.observed) else self.observed[:, ends]
+        return RunningCurves(self.first_quarter, weekly_amounts.astype(self.amounts.dtype), observed, 'Week_Number')
+
+    def _rows(self, quarter_keys):
+        # Filas de la matriz de los trimestres indicados que tienen ventas
+        rows = np.asarray(quarter_keys, dtype=np.int64) - self.first_quarter
+        rows = rows[(rows >= 0) & (rows < len(self.totals))]
+        return rows[self.observed[rows].any(axis=1)]
+
+    def _baseline(self, name, reference_key, average_quarters):
+        """
+        Curva de referencia para el trimestre reference_key.
+
+        Returns:
+            tuple or None: (etiqueta, total acumulado por posición), o None si faltan los datos.
+        """
+        if name == 'prior_quarter':
+            sources = [reference_key - 1]
+        elif name == 'last_year':
+            sources = [reference_key - 4]
+        else:
+            sources = list(range(reference_key - average_quarters, reference_key))
+        rows = self._rows(sources)
+        if len(rows) == 0:
+            return None
+        curve = self.totals[rows].mean(axis=0) if name == 'average' else self.totals[rows[0]]
+        last = np.flatnonzero(self.observed[rows].any(axis=0)).max() + 1 # Hasta la última posición con ventas
+        if name == 'average':
+            label = RUNNING_BASELINES[name].format(n=len(rows))
+        else:
+            label = f"{RUNNING_BASELINES[name]} ({quarter_label(self.first_quarter + int(rows[0]))})"
+        return label, curve[:last]
+
+    def running_totals(self, selected_quarters_labels, baselines=(), average_quarters=DEFAULT_BASELINE_QUARTERS):
+        """
+        Tabla de totales acumulados de los trimestres seleccionados (solo las posiciones con
+        ventas) y, opcionalmente, las curvas de referencia del último trimestre seleccionado.
+
+        Args:
+            selected_quarters_labels (list): Trimestres a visualizar (ej. ['2016Q1', '2016Q2']).
+            baselines (list): Referencias de RUNNING_BASELINES a añadir.
+            average_quarters (int): Trimestres previos promediados por la referencia 'average'.
+
+        Returns:
+            pd.DataFrame: Columnas position_column, 'Amount', 'Running_Total', 'Quarter_Label' y
+                          'Comparison_Type' ('Selected' o 'Baseline'); vacío sin datos.
+        """
+        selected = sorted(quarter_key_from_label(label) for label in selected_quarters_labels)
+        rows = self._rows(selected)
+        if len(rows) == 0:
+            return pd.DataFrame()
+        row_index, positions = np.nonzero(self.observed[rows]) # Orden: trimestre y posición
+        matrix_rows = rows[row_index]
+        tables = [pd.DataFrame({
+            self.position_column: positions + 1,
+            'Amount': self.amounts[matrix_rows, positions],
+            'Running_Total': self.totals[matrix_rows, positions],
+            'Quarter_Label': [quarter_label(self.first_quarter + int(r)) for r in matrix_rows],
+            'Comparison_Type': 'Selected',
+        })]
+        for name in baselines:
+            baseline = self._baseline(name, selected[-1], average_quarters)
+            if baseline is None:
+                continue
+            label, curve = baseline
+            tables.append(pd.DataFrame({
+                self.position_column: np.arange(1, len(curve) + 1),
+                'Amount': np.diff(curve, prepend=0).astype(curve.dtype),
+                'Running_Total': curve,
+                'Quarter_Label': label,
+                'Comparison_Type': 'Baseline',
+            }))
+        return pd.concat(tables, ignore_index=True) if len(tables) > 1 else tables[0]
+
+
+@dataclass
+class DashboardSnapshot:
+    """
+    Resultados de todos los paneles del dashboard para unos datos filtrados, calculados
+    juntos por compute_dashboard_snapshot. Las funciones de cálculo de este módulo son
+    vistas sobre sus campos.
+    """
+    qtd_metrics: Optional[dict] # None si no se indicó current_date
+    last_orders: Optional[pd.DataFrame] # None para un SalesCube (no guarda órdenes individuales)
+    country_performance: pd.DataFrame
+    city_performance: pd.DataFrame
+    quarterly: pd.DataFrame
+    running_totals: pd.DataFrame
+    seller_performance: pd.DataFrame
+    seller_performance_by_month: pd.DataFrame
+    seller_performance_by_quarter: pd.DataFrame
+    approximate: bool = False # Si los conteos únicos son estimaciones HyperLogLog
+    running_curves: Optional[RunningCurves] = None # Curvas acumuladas de todos los trimestres (diarias o semanales)
+    # parámetros -> tabla de running_totals_compared: el mismo objeto en cada re-ejecución
+    _compared: dict = field(default_factory=dict, repr=False, compare=False)
+
+    def seller_performance_over_time(self, time_granularity='quarter'):
+        """
+        Desempeño de los vendedores por periodo.
+
+        Args:
+            time_granularity (str): 'month' o 'quarter'.
+
+        Returns:
+            pd.DataFrame: Ventas totales por Sales_Manager y periodo.
+        """
+        return self.seller_performance_by_month if time_granularity == 'month' else self.seller_performance_by_quarter
 
+    def running_totals_compared(self, selected_quarters_labels, baselines=(), average_quarters=DEFAULT_BASELINE_QUARTERS,
+                                granularity='week'):
+        """
+        Totales acumulados de los trimestres seleccionados con curvas de referencia, leídos de
+        las curvas ya calculadas (cambiar las referencias no repite ninguna agregación). Cada
+        tabla se recuerda en el snapshot: los mismos parámetros devuelven el mismo DataFrame.
+
+        Args:
+            selected_quarters_labels (list): Trimestres a visualizar.
+            baselines (list): Referencias de RUNNING_BASELINES a añadir.
+            average_quarters (int): Trimestres previos promediados por la referencia 'average'.
+            granularity (str): 'week' o 'day' (solo si las curvas son diarias).
+
+        Returns:
+            pd.DataFrame: Tabla de RunningCurves.running_totals.
+        """
+        if self.running_curves is None:
+            return self.running_totals
+        key = (tuple(selected_quarters_labels), tuple(baselines), average_quarters, granularity)
+        table = self._compared.get(key)
+        if table is None:
+            curves = self.running_curves.weekly() if granularity == 'week' else self.running_curves
+            table = self._compared.setdefault(key, curves.running_totals(selected_quarters_labels, baselines, average_quarters))
+        return table
+
+
+def _quarter_bounds(current_date):
+    """
+    Inicio y fin del trimestre de una fecha.
+
+    Args:
+        current_date (datetime.date): Fecha de referencia.
+
+    Returns:
+        tuple: (inicio, fin) del trimestre como pd.Timestamp.
+    """
+    start = pd.Timestamp(current_date).to_period('Q').start_time
+    return start, (start + pd.offsets.QuarterEnd(0)).normalize()
+
+
+def _amount_ranking(base, column):
+    """
+    Ventas totales por una columna, de mayor a menor, con el monto formateado.
+
+    Args:
+        base (pd.DataFrame): Agregado base del paso único.
+        column (str): Columna por la que agrupar ('Region' o 'City').
+
+    Returns:
+        pd.DataFrame: Columnas column, 'Amount' y 'Formatted_Amount'.
+    """
+    ranking = base.groupby(column, observed=True)['Amount'].sum().reset_index()
+    ranking = ranking.sort_values(by='Amount', ascending=False) # Ordena de mayor a menor venta
+    ranking['Formatted_Amount'] = ranking['Amount'].apply(format_amount)
+    return ranking
+
+
+def _latest_orders(df, n):
+    """
+    Las N órdenes más recientes sin ordenar toda la tabla: una selección parcial (O(n))
+    encuentra la fecha umbral y solo se ordenan las filas a partir de ella. A igualdad de
+    fecha va primero la fila posterior, como en recent_orders.RecentOrders.
+
+    Args:
+        df (pd.DataFrame): DataFrame de ventas (filas individuales).
+        n (int): Número de órdenes.
+
+    Returns:
+        pd.DataFrame: Columnas 'Company' y 'Amount', de la más reciente a la más antigua.
+    """
+    dates = df['Date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    if n <= 0 or len(dates) == 0:
+        return df.iloc[:0][['Company', 'Amount']]
+    if n < len(dates):
+        threshold = np.partition(dates, len(dates) - n)[len(dates) - n]
+        candidates = np.flatnonzero(dates >= threshold)
+    else:
+        candidates = np.arange(len(dates))
+    order = candidates[np.lexsort((candidates, dates[candidates]))[::-1][:n]]
+    return df.take(order)[['Company', 'Amount']]
+
+
+def _seller_by_period(base, period_key, to_label):
+    """
+    Ventas por Sales_Manager y periodo a partir del agregado base.
+
+    Args:
+        base (pd.DataFrame): Agregado base del paso único.
+        period_key (str): 'Month_Key' o 'Quarter_Key'.
+        to_label (callable): Función que convierte la clave del periodo en su etiqueta.
+
+    Returns:
+        pd.DataFrame: Columnas 'Sales_Manager', 'Period' y 'Amount'.
+    """
+    seller_time_perf_df = base.groupby(['Sales_Manager', period_key], observed=True)['Amount'].sum().reset_index()
+    seller_time_perf_df.insert(1, 'Period', [to_label(k) for k in seller_time_perf_df[period_key]])
+    return seller_time_perf_df.drop(columns=period_key)
+
+
+@profiled
+def compute_dashboard_snapshot(df, selected_quarters_labels=(), current_date=None, approximate=False, num_orders=5, backend=None):
+    """
+    Calcula los resultados de todos los paneles del dashboard a la vez. Las filas (o celdas
+    del cubo) se recorren una sola vez: un único groupby sobre las claves factorizadas de
+    _SNAPSHOT_KEYS (más la marca de pertenencia al QTD) produce un agregado base, mucho más
+    pequeño, del que se derivan todos los paneles. Solo los conteos únicos de clientes
+    necesitan además los pares (trimestre, cliente).
+
+    Las pasadas sobre las filas (el agregado base y los conteos únicos exactos) se ejecutan
+    en el motor de src/compute_backend.py (pandas, DuckDB o Polars); los paneles se derivan
+    del agregado base igual con cualquier motor.
+
+    El resultado se recuerda por conjunto de datos y parámetros, de modo que las vistas
+    (calculate_country_performance, get_quarterly_data, ...) llamadas sobre los mismos
+    datos no repiten el cálculo.
+
+    Args:
+        df (pd.DataFrame or SalesCube): DataFrame de ventas filtrado o cubo filtrado.
+        selected_quarters_labels (list): Trimestres para los totales acumulados (ej. ['2016Q1']).
+        current_date (datetime.date): Fecha para las métricas QTD, o None para omitirlas.
+        approximate (bool): Si True, clientes y SAMs únicos se estiman con HyperLogLog.
+        num_orders (int): Número de últimas órdenes (solo con filas individuales).
+        backend (str): Motor de cálculo ('pandas', 'duckdb' o 'polars'), o None para el de
+                       SALES_COMPUTE_BACKEND.
+
+    Returns:
+        DashboardSnapshot: Resultados de todos los paneles.
+    """
+    engine = get_backend(backend)
+    params = (tuple(selected_quarters_labels), current_date, approximate, num_orders, engine)
+    memo = _snapshots.get(df, lambda _: {})
+    snapshot = memo.get(params)
+    if snapshot is None:
+        snapshot = _compute_snapshot(df, *params)
+        if len(memo) >= _SNAPSHOT_MEMO_SIZE:
+            memo.pop(next(iter(memo)))
+        memo[params] = snapshot
+    return snapshot
+
+
+def _compute_snapshot(df, selected_quarters_labels, current_date, approximate, num_orders, engine):
+    is_cube = _is_cube(df)
+    data = prepare_sales_data(df)
+
+    # Marca de las filas dentro del QTD (del inicio del trimestre hasta current_date)
+    if current_date is not None:
+        current_datetime = pd.to_datetime(current_date)
+        qtd_start, qtd_end = _quarter_bounds(current_date)
+        in_qtd = ((data['Date'] >= qtd_start) & (data['Date'] <= current_datetime)).to_numpy()
+    else:
+        in_qtd = np.zeros(len(data), dtype=bool)
+
+    # Paso único: agregado base por todas las claves de los paneles
+    base = engine.aggregate(data, _SNAPSHOT_KEYS, _SNAPSHOT_MEASURES, {'In_QTD': in_qtd})
+
+    # Conteos únicos: Sales_Manager es clave del agregado base; los clientes salen del estado
+    # fusionable del cubo o de las columnas de las filas
+    if is_cube:
+        clients_by_quarter = df.distinct_count('Company', by='Quarter_Key', approximate=approximate)
+        sams_by_quarter = df.distinct_count('Sales_Manager', by='Quarter_Key', approximate=approximate)
+    elif approximate:
+        clients_by_quarter = approx_distinct(data['Company'], keys=data['Quarter_Key'])
+        sams_by_quarter = approx_distinct(data['Sales_Manager'], keys=data['Quarter_Key'])
+    else:
+        clients_by_quarter = engine.nunique_by(data, 'Company', 'Quarter_Key')
+        sams_by_quarter = base.groupby('Quarter_Key', observed=True)['Sales_Manager'].nunique()
+
+    # Métricas trimestrales
+    quarterly_metrics = base.groupby('Quarter_Key', observed=True)[_SNAPSHOT_MEASURES].sum()
+    quarterly_metrics.insert(2, 'Active_Clients', clients_by_quarter.reindex(quarterly_metrics.index, fill_value=0))
+    quarterly_metrics.insert(3, 'SAMs', sams_by_quarter.reindex(quarterly_metrics.index, fill_value=0))
+    quarterly_metrics.insert(0, 'Quarter', [quarter_label(k) for k in quarterly_metrics.index])
+    quarterly_metrics = quarterly_metrics.reset_index(drop=True)
+
+    # Curvas acumuladas diarias de todos los trimestres (un agregado por trimestre y día y una
+    # suma acumulada por filas); las semanales y las de referencia se leen de la misma matriz
+    daily = engine.aggregate(data, ['Quarter_Key', 'Day_Of_Quarter'], ['Amount'])
+    running_curves = RunningCurves.from_amounts(
+        daily['Quarter_Key'], daily['Day_Of_Quarter'].astype(np.int64) + 1, daily['Amount'], QUARTER_DAYS, 'Day_Number'
+    )
+    running_totals_df = running_curves.weekly().running_totals(selected_quarters_labels)
+
+    # Desempeño de vendedores por dimensiones, ordenado por monto
+    seller_perf_df = base.groupby(['Sales_Manager', 'Region', 'Product', 'License_Type'], observed=True)['Amount'].sum().reset_index()
+    seller_perf_df = seller_perf_df.sort_values(by='Amount', ascending=False)
+
+    # Métricas QTD a partir de las filas del agregado base marcadas como QTD
+    qtd_metrics = None
+    if current_date is not None:
+        qtd_base = base[base['In_QTD']]
+        if is_cube:
+            qtd_cube = df.take(in_qtd)
+            qtd_active_clients = qtd_cube.distinct_count('Company', approximate=approximate)
+            qtd_sams = qtd_cube.distinct_count('Sales_Manager', approximate=approximate)
+        elif qtd_base.empty:
+            qtd_active_clients = qtd_sams = 0
+        elif approximate:
+            qtd_active_clients = approx_distinct(data['Company'][in_qtd])
+            qtd_sams = approx_distinct(data['Sales_Manager'][in_qtd])
+        else:
+            qtd_active_clients = engine.nunique(data, 'Company', in_qtd) # Clientes únicos que han realizado transacciones
+            qtd_sams = qtd_base['Sales_Manager'].nunique() # Sales_Manager únicos que han realizado ventas en el QTD
+        qtd_totals = qtd_base[_SNAPSHOT_MEASURES].sum()
+        qtd_metrics = {
+            # Días restantes para fin de trimestre (EOQ - End Of Quarter)
+            "Days Left EOQ": (qtd_end.date() - current_date).days if current_date <= qtd_end.date() else 0,
+            "QTD Transactions": qtd_totals['Transactions'],
+            "QTD Active Clients": qtd_active_clients,
+            "QTD SAMs": qtd_sams,
+            "QTD Sales": qtd_totals['Amount'],
+            "Admins": qtd_totals['Admins'],
+            "Designers": qtd_totals['Designers'],
+            "Servers": qtd_totals['Servers']
+        }
+
+    # Últimas órdenes: necesitan las filas individuales
+    last_orders = None
+    if not is_cube:
+        last_orders = _latest_orders(df, num_orders)
+
+    return DashboardSnapshot(
+        qtd_metrics=qtd_metrics,
+        last_orders=last_orders,
+        country_performance=_amount_ranking(base, 'Region'),
+        city_performance=_amount_ranking(base, 'City'),
+        quarterly=quarterly_metrics,
+        running_totals=running_totals_df,
+        seller_performance=seller_perf_df,
+        seller_performance_by_month=_seller_by_period(base, 'Month_Key', month_label),
+        seller_performance_by_quarter=_seller_by_period(base, 'Quarter_Key', quarter_label),
+        approximate=approximate,
+        running_curves=running_curves,
+    )
+
+
+@profiled
 def get_available_quarters(df):
     """
     Obtiene una lista de todos los trimestres únicos presentes en el DataFrame de ventas,
     ordenados cronológicamente.
 
     Args:
-        df (pd.DataFrame): DataFrame de ventas.
+        df (pd.DataFrame or SalesCube): DataFrame de ventas (idealmente ya pasado por
+                                        prepare_sales_data) o cubo.
 
     Returns:
         list: Lista de strings de trimestres (ej. ['2012Q1', '2012Q2', ...]).
@@ -344,12 +1028,6 @@ def get_available_quarters(df):
     if df.empty:
         return []
     
-    df['Date'] = pd.to_datetime(df['Date'])
-    # Convertir a periodo trimestral y luego a string, obtener únicos y ordenar
-    quarters = df['Date'].dt.to_period('Q').astype(str).unique().tolist()
-    
-    # Ordenar los trimestres cronológicamente
-    # Convertir a PeriodDtype para una ordenación correcta y luego de nuevo a string
-    sorted_quarters = pd.Series(quarters).astype('period[Q]').sort_values().astype(str).tolist()
-    
-    return sorted_quarters
\ No newline at end of file
+    df = prepare_sales_data(df)
+    # Los ordinales enteros ordenan cronológicamente; solo se formatean los valores únicos
+    return [quarter_label(k) for k in np.unique(df['Quarter_Key'].to_numpy())]
\ No newline at end of file
@@ -0,0 +1,17 @@
+import os
+import sys
+
+# Las pruebas importan los módulos como lo hace la aplicación: from src.<módulo> import ...
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Combinaciones de filtros globales usadas por varias pruebas (valores de generate_simulated_data;
+# 'PT' y 'Lisboa' solo existen tras añadir el lote de test_append_transactions)
+FILTER_CASES = [
+    {},
+    {'Product': 'Product 1'},
+    {'Region': 'UK'},
+    {'Product': 'Product 2', 'License_Type': 'License'},
+    {'City': ['London', 'Oslo']},
+    {'Region': ['UK', 'PT'], 'License_Type': 'Maintenance Renewal'},
+    {'Region': 'PT', 'City': 'Lisboa'},
+]
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+import pytest
+
+from src import api
+
+PARAMS = {'product': 'Product 1', 'quarters': '2016Q1'}
+
+
+@pytest.fixture
+def slow_compute(monkeypatch):
+    """
+    _compute bloqueado hasta que la prueba lo libera, con datos de versión configurable.
+    Devuelve (evento de liberación, llamadas a _compute, versión actual).
+    """
+    release = threading.Event()
+    calls = []
+    version = {'current': 'v1'}
+
+    def compute(endpoint, params, df, data_version):
+        calls.append(data_version)
+        release.wait(timeout=10)
+        return f'{endpoint}:{data_version}'.encode()
+
+    monkeypatch.setattr(api, '_compute', compute)
+    monkeypatch.setattr(api, '_data_version', lambda source: (None, version['current']))
+    monkeypatch.setattr(api, '_response_cache', api.OrderedDict())
+    monkeypatch.setattr(api, '_in_flight', {})
+    return release, calls, version
+
+
+async def _until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Condición no alcanzada")
+
+
+def test_follower_survives_cancelled_leader(slow_compute):
+    release, calls, _ = slow_compute
+
+    async def scenario():
+        leader = asyncio.create_task(api._respond('snapshot', PARAMS))
+        await _until(lambda: len(calls) == 1)
+        follower = asyncio.create_task(api._respond('snapshot', PARAMS))
+        await asyncio.sleep(0.05) # El seguidor espera el futuro del líder
+        leader.cancel()
+        await asyncio.sleep(0.05)
+        release.set()
+        body, status = await asyncio.wait_for(follower, timeout=5)
+        assert leader.cancelled()
+        return body, status
+
+    body, status = asyncio.run(scenario())
+    # El seguidor repite el cálculo en lugar de quedarse esperando un futuro que nunca se resuelve
+    assert (body, status) == (b'snapshot:v1', 'miss')
+    assert api._in_flight == {}
+
+
+def test_new_version_is_not_coalesced_with_old(slow_compute):
+    release, calls, version = slow_compute
+
+    async def scenario():
+        old = asyncio.create_task(api._respond('snapshot', PARAMS))
+        await _until(lambda: len(calls) == 1)
+        version['current'] = 'v2'
+        new = asyncio.create_task(api._respond('snapshot', PARAMS))
+        await _until(lambda: len(calls) == 2)
+        release.set()
+        return await old, await new
+
+    old, new = asyncio.run(scenario())
+    assert old == (b'snapshot:v1', 'miss')
+    assert new == (b'snapshot:v2', 'miss')
+    assert calls == ['v1', 'v2']
@@ -0,0 +1,147 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from src.cube import CUBE_DIMENSIONS, build_sales_cube, get_sales_cube
+from src.data_handler import append_transactions, clear_data_cache, load_data
+from src.filter_index import FilterIndex, get_filter_index
+from src import recent_orders
+from src.recent_orders import RecentOrders, get_recent_orders
+from src.utils import compute_dashboard_snapshot, generate_simulated_data
+
+from conftest import FILTER_CASES
+
+
+def _new_rows():
+    # Lote con fechas mezcladas (algunas anteriores a las existentes) y categorías nuevas
+    rows = generate_simulated_data(200, seed=7)
+    extra = rows.head(3).copy()
+    extra['Region'] = 'PT'
+    extra['City'] = 'Lisboa'
+    extra['Company'] = ['Cliente Nuevo 1', 'Cliente Nuevo 2', 'Cliente Nuevo 1']
+    extra['Date'] = pd.Timestamp.now().normalize()
+    return pd.concat([rows, extra], ignore_index=True)
+
+
+@pytest.fixture
+def appended():
+    """
+    Datos simulados con los derivados ya construidos, más el resultado de añadirles un lote.
+    La caché empieza vacía: la primera llamada carga los datos dentro de append_transactions.
+    """
+    clear_data_cache()
+    result = {}
+    # En frío, append_transactions carga la fuente con el bloqueo de carga ya adquirido
+    worker = threading.Thread(target=lambda: result.update(cold=append_transactions(_new_rows().head(10), 'simulated')))
+    worker.start()
+    worker.join(timeout=60)
+    assert not worker.is_alive(), "append_transactions se bloqueó con la caché vacía"
+
+    current = load_data('simulated')
+    assert current is result['cold']
+    cube = get_sales_cube(current)
+    cube.sketch('Company')
+    cube.sketch('Sales_Manager')
+    get_filter_index(current)
+    get_recent_orders(current)
+
+    combined = append_transactions(_new_rows(), 'simulated')
+    yield current, combined
+    clear_data_cache()
+
+
+def _sorted_cells(cube):
+    return cube.cells.sort_values(CUBE_DIMENSIONS + ['Date']).reset_index(drop=True)
+
+
+def test_combined_is_served_and_complete(appended):
+    current, combined = appended
+    assert load_data('simulated') is combined
+    assert len(combined) == len(current) + len(_new_rows())
+    # Las filas existentes no cambian (sus columnas categóricas solo ganan categorías al final)
+    head = combined.iloc[:len(current)]
+    for column in current.columns:
+        if isinstance(current[column].dtype, pd.CategoricalDtype):
+            assert list(head[column].cat.categories[:len(current[column].cat.categories)]) == list(current[column].cat.categories)
+            np.testing.assert_array_equal(head[column].cat.codes.to_numpy(), current[column].cat.codes.to_numpy())
+        else:
+            pdt.assert_series_equal(head[column], current[column])
+
+
+@pytest.mark.parametrize('approximate', [False, True])
+def test_cube_matches_rebuild(appended, approximate):
+    _, combined = appended
+    extended = get_sales_cube(combined)
+    rebuilt = build_sales_cube(combined, precision=extended.precision)
+    pdt.assert_frame_equal(_sorted_cells(extended), _sorted_cells(rebuilt), check_categorical=False)
+    for column in ['Company', 'Sales_Manager']:
+        assert extended.distinct_count(column, approximate=approximate) == rebuilt.distinct_count(column, approximate=approximate)
+        pdt.assert_series_equal(
+            extended.distinct_count(column, by='Quarter_Key', approximate=approximate).sort_index(),
+            rebuilt.distinct_count(column, by='Quarter_Key', approximate=approximate).sort_index(),
+            check_dtype=False,
+        )
+
+
+def test_filter_index_matches_rebuild(appended):
+    _, combined = appended
+    extended = get_filter_index(combined)
+    rebuilt = FilterIndex(combined)
+    assert extended.num_rows == rebuilt.num_rows
+    for column in rebuilt.postings:
+        assert extended.values(column) == rebuilt.values(column)
+    for filters in FILTER_CASES:
+        left, right = extended.select(filters), rebuilt.select(filters)
+        assert (left is None) == (right is None)
+        if left is not None:
+            np.testing.assert_array_equal(left, right)
+
+
+@pytest.mark.parametrize('filters', [f for f in FILTER_CASES if not any(isinstance(v, list) for v in f.values())])
+def test_recent_orders_match_rebuild(appended, filters):
+    _, combined = appended
+    recent_filters = {c: v for c, v in filters.items() if c in ('Product', 'License_Type', 'Region')}
+    for offset in (0, 5, 50):
+        pdt.assert_frame_equal(
+            get_recent_orders(combined).last_n(combined, recent_filters, n=20, offset=offset),
+            RecentOrders(combined).last_n(combined, recent_filters, n=20, offset=offset),
+        )
+
+
+@pytest.mark.parametrize('approximate', [False, True])
+def test_snapshot_matches_rebuild(appended, approximate):
+    _, combined = appended
+    rebuilt_cube = build_sales_cube(combined, precision=get_sales_cube(combined).precision)
+    extended = compute_dashboard_snapshot(get_sales_cube(combined), approximate=approximate)
+    rebuilt = compute_dashboard_snapshot(rebuilt_cube, approximate=approximate)
+    assert extended.qtd_metrics == rebuilt.qtd_metrics
+    for field in ['country_performance', 'city_performance', 'quarterly', 'running_totals',
+                  'seller_performance', 'seller_performance_by_month', 'seller_performance_by_quarter']:
+        left, right = getattr(extended, field), getattr(rebuilt, field)
+        pdt.assert_frame_equal(
+            left.sort_values(list(left.columns)).reset_index(drop=True),
+            right.sort_values(list(right.columns)).reset_index(drop=True),
+            check_categorical=False, obj=field,
+        )
+
+
+@pytest.mark.parametrize('pending_max', [0, 40, 100_000])
+def test_recent_orders_out_of_order_batches(monkeypatch, pending_max):
+    # Lotes con fechas anteriores a las existentes: sin búfer lateral, con vuelcos y sin vuelco
+    monkeypatch.setattr(recent_orders, '_PENDING_MAX', pending_max)
+    df = generate_simulated_data(300, seed=1)
+    recent = RecentOrders(df)
+    for seed in range(2, 8):
+        batch = generate_simulated_data(60, seed=seed)
+        combined = pd.concat([df, batch], ignore_index=True)
+        recent = recent.extended(batch, offset=len(df))
+        df = combined
+        for filters in [{}, {'Product': 'Product 1'}, {'Region': 'UK', 'License_Type': 'License'}]:
+            for offset in (0, 7, 300):
+                pdt.assert_frame_equal(
+                    recent.last_n(df, filters, n=15, offset=offset),
+                    RecentOrders(df).last_n(df, filters, n=15, offset=offset),
+                )
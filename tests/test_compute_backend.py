@@ -0,0 +1,75 @@
+import warnings
+
+import numpy as np
+import pandas.testing as pdt
+import pytest
+
+from src import compute_backend
+from src.benchmark import check_conformance
+from src.compute_backend import _BACKENDS, available_backends, get_backend
+from src.cube import CUBE_MEASURES, build_sales_cube
+from src.utils import generate_simulated_data, prepare_sales_data
+
+ENGINES = [name for name in _BACKENDS if name != 'pandas']
+KEY_CASES = [
+    ['Quarter_Key'],
+    ['Region', 'City'],
+    ['Sales_Manager', 'Region', 'Product', 'License_Type'],
+]
+
+
+@pytest.fixture(scope='module')
+def sales():
+    df = prepare_sales_data(generate_simulated_data(3000, seed=3))
+    return df, build_sales_cube(df)
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request):
+    if request.param not in available_backends():
+        pytest.skip(f"{request.param} no está instalado")
+    return get_backend(request.param)
+
+
+def _sorted(frame, keys):
+    return frame.sort_values(keys).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('keys', KEY_CASES)
+@pytest.mark.parametrize('on_cube', [False, True])
+def test_aggregate_matches_pandas(sales, engine, keys, on_cube):
+    df, cube = sales
+    frame = cube.cells if on_cube else df
+    extra_keys = {'In_Period': (frame['Date'] >= frame['Date'].median()).to_numpy()}
+    for extra in (None, extra_keys):
+        expected = get_backend('pandas').aggregate(frame, keys, CUBE_MEASURES, extra)
+        result = engine.aggregate(frame, keys, CUBE_MEASURES, extra)
+        # Mismos valores y tipos (categorías incluidas) tras _restore_dtypes; el orden de filas es libre
+        sort_keys = keys + list(extra or {})
+        pdt.assert_frame_equal(_sorted(result, sort_keys), _sorted(expected, sort_keys))
+
+
+@pytest.mark.parametrize('column, by', [('Company', 'Quarter_Key'), ('Company', 'Region'), ('Sales_Manager', 'Month_Key')])
+def test_nunique_by_matches_pandas(sales, engine, column, by):
+    df, _ = sales
+    pdt.assert_series_equal(engine.nunique_by(df, column, by), get_backend('pandas').nunique_by(df, column, by))
+
+
+def test_nunique_matches_pandas(sales, engine):
+    df, _ = sales
+    for mask in (np.ones(len(df), dtype=bool), (df['Region'] == 'UK').to_numpy(), np.zeros(len(df), dtype=bool)):
+        assert engine.nunique(df, 'Company', mask) == get_backend('pandas').nunique(df, 'Company', mask)
+
+
+def test_dashboard_snapshot_matches_pandas(sales, engine):
+    df, cube = sales
+    assert check_conformance(df, cube, [engine.name]) == []
+
+
+def test_unknown_backend_falls_back_to_pandas_and_warns_once():
+    compute_backend._resolve_backend.cache_clear()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        assert get_backend('inexistente') is get_backend('pandas')
+        assert get_backend('inexistente') is get_backend('pandas')
+    assert len(caught) == 1
@@ -0,0 +1,67 @@
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from src import csv_stream
+from src.cube import CUBE_DIMENSIONS, get_sales_cube
+from src.data_handler import load_data
+from src.recent_orders import get_recent_orders
+from src.utils import compute_dashboard_snapshot, generate_simulated_data
+
+from conftest import FILTER_CASES
+
+RECENT_FILTERS = [{}, {'Product': 'Product 1'}, {'Region': 'UK'}, {'Product': 'Product 2', 'License_Type': 'License'}]
+
+
+@pytest.fixture(scope='module')
+def loaded(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('stream') / 'ventas.csv')
+    generate_simulated_data(3000, seed=11).to_csv(path, index=False)
+    full = load_data('csv', path, use_cache=False)
+
+    # Fragmentos de 250 filas: el cubo y las órdenes recientes se fusionan doce veces
+    patch = pytest.MonkeyPatch()
+    patch.setattr(csv_stream, '_CHUNK_SHARE', 1e-12)
+    patch.setattr(csv_stream, '_SAMPLE_ROWS', 250)
+    chunks = []
+    try:
+        streamed = load_data('csv_stream', path, use_cache=False, progress=lambda fraction, rows: chunks.append(rows))
+    finally:
+        patch.undo()
+    assert chunks == list(range(250, 3001, 250))
+    return full, streamed
+
+
+def _cells(cube):
+    cells = cube.cells.astype({c: str for c in CUBE_DIMENSIONS})
+    return cells.sort_values(CUBE_DIMENSIONS + ['Date']).reset_index(drop=True)
+
+
+def test_streamed_frame_matches_load(loaded):
+    full, streamed = loaded
+    # STREAM_RECENT_ROWS supera las filas de cada partición: se conservan todas, por fecha
+    expected = full.take(full['Date'].argsort(kind='stable')).reset_index(drop=True)
+    pdt.assert_frame_equal(streamed.reset_index(drop=True), expected, check_categorical=False)
+
+
+def test_streamed_cube_matches_load(loaded):
+    full, streamed = loaded
+    pdt.assert_frame_equal(_cells(get_sales_cube(streamed)), _cells(get_sales_cube(full)), check_dtype=False)
+
+
+@pytest.mark.parametrize('filters', FILTER_CASES)
+def test_streamed_snapshot_matches_load(loaded, filters):
+    full, streamed = loaded
+    expected = compute_dashboard_snapshot(get_sales_cube(full).filter(filters), ['2016Q1'])
+    result = compute_dashboard_snapshot(get_sales_cube(streamed).filter(filters), ['2016Q1'])
+    for name in ['country_performance', 'city_performance', 'quarterly', 'running_totals', 'seller_performance']:
+        pdt.assert_frame_equal(getattr(result, name), getattr(expected, name), check_dtype=False, check_categorical=False)
+
+
+@pytest.mark.parametrize('filters', RECENT_FILTERS)
+def test_streamed_recent_orders_match_load(loaded, filters):
+    full, streamed = loaded
+    for offset in [0, 7]:
+        expected = get_recent_orders(full).last_n(full, filters, 7, offset)
+        result = get_recent_orders(streamed).last_n(streamed, filters, 7, offset)
+        pdt.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True), check_categorical=False)
@@ -0,0 +1,121 @@
+import pickle
+import datetime
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from src.cube import build_sales_cube
+from src.utils import compute_dashboard_snapshot, generate_simulated_data, prepare_sales_data
+
+from conftest import FILTER_CASES
+
+SELECTED = ['2016Q1', '2016Q2']
+CURRENT_DATE = datetime.date(2016, 5, 15)
+
+
+@pytest.fixture(scope='module')
+def sales():
+    df = prepare_sales_data(generate_simulated_data(3000, seed=5))
+    return df, build_sales_cube(df)
+
+
+def _rows(df, filters):
+    # Filtrado de referencia con máscaras de pandas, sin índices ni cubo
+    mask = np.ones(len(df), dtype=bool)
+    for column, value in filters.items():
+        values = value if isinstance(value, list) else [value]
+        mask &= df[column].isin(values).to_numpy()
+    rows = df[mask]
+    return rows.assign(Quarter=rows['Date'].dt.to_period('Q').astype(str), Month=rows['Date'].dt.to_period('M').astype(str))
+
+
+def _by_key(frame, keys, value='Amount'):
+    # Serie valor por clave, con claves de texto (comparables entre categóricas y texto)
+    return frame.assign(**{k: frame[k].astype(str) for k in keys}).set_index(keys)[value].sort_index()
+
+
+def _expected_sum(rows, keys):
+    # Suma de referencia con groupby sobre las filas, con claves de texto
+    expected = rows.groupby(keys, observed=True)['Amount'].sum()
+    expected.index = pd.MultiIndex.from_arrays(
+        [expected.index.get_level_values(i).astype(str) for i in range(len(keys))], names=keys
+    ) if len(keys) > 1 else expected.index.astype(str)
+    return expected.sort_index()
+
+
+@pytest.mark.parametrize('filters', FILTER_CASES)
+def test_filtered_cube_matches_row_aggregation(sales, filters):
+    df, cube = sales
+    rows = _rows(df, filters)
+    snapshot = compute_dashboard_snapshot(cube.filter(filters), SELECTED, CURRENT_DATE)
+
+    panels = {
+        'country_performance': (['Region'], ['Region']),
+        'city_performance': (['City'], ['City']),
+        'seller_performance': (['Sales_Manager', 'Region', 'Product', 'License_Type'],) * 2,
+        'seller_performance_by_month': (['Sales_Manager', 'Period'], ['Sales_Manager', 'Month']),
+        'seller_performance_by_quarter': (['Sales_Manager', 'Period'], ['Sales_Manager', 'Quarter']),
+    }
+    for panel, (keys, row_keys) in panels.items():
+        pdt.assert_series_equal(
+            _by_key(getattr(snapshot, panel), keys), _expected_sum(rows, row_keys),
+            check_dtype=False, check_index_type=False, check_names=False, obj=panel,
+        )
+
+    # Métricas trimestrales: sumas y conteos únicos por trimestre
+    grouped = rows.groupby('Quarter')
+    expected_quarterly = pd.DataFrame({
+        'Amount': grouped['Amount'].sum(),
+        'Transactions': grouped['Transactions'].sum(),
+        'Active_Clients': grouped['Company'].nunique(),
+        'SAMs': grouped['Sales_Manager'].nunique(),
+        'Admins': grouped['Admins'].sum(),
+        'Designers': grouped['Designers'].sum(),
+        'Servers': grouped['Servers'].sum(),
+    })
+    quarterly = snapshot.quarterly.set_index('Quarter')[expected_quarterly.columns]
+    pdt.assert_frame_equal(quarterly.sort_index(), expected_quarterly.sort_index(), check_dtype=False, check_index_type=False, check_names=False)
+
+    # Totales acumulados por semana del trimestre de los trimestres seleccionados
+    selected = rows[rows['Quarter'].isin(SELECTED)]
+    if selected.empty:
+        assert snapshot.running_totals.empty
+    else:
+        weekly = selected.groupby(['Quarter', 'Week_Of_Quarter'])['Amount'].sum()
+        expected_running = weekly.groupby(level=0).cumsum()
+        running = snapshot.running_totals.set_index(['Quarter_Label', 'Week_Number'])['Running_Total']
+        observed = running.reindex(expected_running.index)
+        np.testing.assert_allclose(observed.to_numpy(dtype=float), expected_running.to_numpy(dtype=float))
+
+    # QTD: del inicio del trimestre de la fecha de análisis hasta ese día incluido
+    qtd = rows[(rows['Date'] >= pd.Timestamp('2016-04-01')) & (rows['Date'].dt.normalize() <= pd.Timestamp(CURRENT_DATE))]
+    metrics = snapshot.qtd_metrics
+    assert metrics['Days Left EOQ'] == (datetime.date(2016, 6, 30) - CURRENT_DATE).days
+    assert metrics['QTD Sales'] == qtd['Amount'].sum()
+    assert metrics['QTD Transactions'] == qtd['Transactions'].sum()
+    assert metrics['QTD Active Clients'] == qtd['Company'].nunique()
+    assert metrics['QTD SAMs'] == qtd['Sales_Manager'].nunique()
+    for column in ('Admins', 'Designers', 'Servers'):
+        assert metrics[column] == qtd[column].sum()
+
+
+def test_cube_pickles_after_filter(sales):
+    _, cube = sales
+    filtered = cube.filter({'Product': 'Product 1'})
+    cube.sketch('Company')
+    restored = pickle.loads(pickle.dumps(cube))
+    pdt.assert_frame_equal(restored.cells, cube.cells)
+    pdt.assert_frame_equal(restored.companies, cube.companies)
+    assert restored.precision == cube.precision
+    # Los sub-cubos recordados no viajan, pero el cubo restaurado vuelve a filtrar (y a recordar)
+    again = restored.filter({'Product': 'Product 1'})
+    pdt.assert_frame_equal(again.cells, filtered.cells)
+    assert restored.filter({'Product': 'Product 1'}) is again
+
+
+def test_values_match_rows(sales):
+    df, cube = sales
+    for column in ['Product', 'License_Type', 'Region', 'City', 'Sales_Manager']:
+        assert cube.values(column) == sorted(df[column].unique(), key=list(df[column].cat.categories).index)
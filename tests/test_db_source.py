@@ -0,0 +1,23 @@
+import threading
+
+from src import db_source
+
+
+def test_get_pool_is_shared_across_threads(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_source, '_pools', {})
+    db_path = str(tmp_path / 'ventas.db')
+    barrier = threading.Barrier(16)
+    pools = []
+
+    def worker():
+        barrier.wait() # Todas las sesiones piden el pool a la vez, en frío
+        pools.append(db_source.get_pool(db_path))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert len(pools) == 16
+    assert all(pool is pools[0] for pool in pools)
+    assert db_source._pools == {db_path: pools[0]}
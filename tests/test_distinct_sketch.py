@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from src.distinct_sketch import (
+    approx_distinct, estimate_entries, merge_entries, precision_for_error, relative_error, sketch_entries,
+)
+
+PRECISION = precision_for_error(0.02)
+
+
+def _companies(start, stop, repeat=3):
+    # Valores repetidos (como los clientes de varias transacciones), en orden mezclado
+    values = np.repeat([f"Cliente_{i}" for i in range(start, stop)], repeat)
+    return pd.Series(np.random.default_rng(stop).permutation(values))
+
+
+@pytest.mark.parametrize('cardinality', [1_000, 20_000, 200_000])
+@pytest.mark.parametrize('categorical', [False, True])
+def test_estimate_within_error_bound(cardinality, categorical):
+    values = _companies(0, cardinality, repeat=2)
+    if categorical:
+        values = values.astype('category')
+    exact = values.nunique()
+    estimate = approx_distinct(values, precision=PRECISION)
+    # Cuatro desviaciones típicas: un fallo indica un sesgo, no mala suerte
+    assert abs(estimate - exact) / exact <= 4 * relative_error(PRECISION)
+
+
+def test_grouped_estimates_within_error_bound():
+    values = _companies(0, 30_000)
+    keys = pd.Series(np.arange(len(values)) % 3)
+    estimates = approx_distinct(values, keys, precision=PRECISION)
+    exact = values.groupby(keys).nunique()
+    assert list(estimates.index) == list(exact.index)
+    assert ((estimates - exact).abs() / exact <= 4 * relative_error(PRECISION)).all()
+
+
+def test_merge_equals_sketch_of_union():
+    left, right = _companies(0, 6_000), _companies(4_000, 12_000) # Se solapan en 2.000 clientes
+    partitions = lambda values: np.zeros(len(values), dtype=np.int64)
+    merged = merge_entries(
+        sketch_entries(partitions(left), left, PRECISION),
+        sketch_entries(partitions(right), right, PRECISION),
+    )
+    union = pd.concat([left, right], ignore_index=True)
+    direct = sketch_entries(partitions(union), union, PRECISION)
+    # Mismo estado (máximo por registro), no solo la misma estimación
+    order = ['Partition', 'Register']
+    pdt.assert_frame_equal(
+        merged.sort_values(order).reset_index(drop=True)[['Partition', 'Register', 'Rank']],
+        direct.sort_values(order).reset_index(drop=True)[['Partition', 'Register', 'Rank']],
+        check_dtype=False,
+    )
+    assert estimate_entries(merged, PRECISION) == estimate_entries(direct, PRECISION)
+
+
+@pytest.mark.parametrize('cardinality', [0, 1, 2, 5, 10, 25, 40])
+def test_small_cardinalities_are_exact(cardinality):
+    values = _companies(0, cardinality) if cardinality else pd.Series([], dtype=object)
+    entries = sketch_entries(np.zeros(len(values), dtype=np.int64), values, PRECISION)
+    # Estado disperso: como mucho una entrada por valor distinto
+    assert len(entries) <= cardinality
+    assert estimate_entries(entries, PRECISION) == cardinality
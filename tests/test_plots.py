@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from src import plots
+from src.cube import build_sales_cube
+from src.utils import compute_dashboard_snapshot, generate_simulated_data, prepare_sales_data
+
+
+class _Sink:
+    """Sustituto de streamlit: guarda las figuras que se mostrarían."""
+
+    def __init__(self):
+        self.figures = []
+
+    def plotly_chart(self, fig, **kwargs):
+        self.figures.append(fig)
+
+    def warning(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    sink = _Sink()
+    monkeypatch.setattr(plots, 'st', sink)
+    plots.clear_figure_cache()
+    yield sink
+    plots.clear_figure_cache()
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    df = prepare_sales_data(generate_simulated_data(3000, seed=9))
+    return compute_dashboard_snapshot(build_sales_cube(df), ['2016Q1', '2016Q2'])
+
+
+def test_figure_cache_hit_passes_the_same_figures(sink, snapshot):
+    hits = plots.get_figure_cache_info()['hits']
+    plots.plot_country_performance(snapshot.country_performance, top_k=5)
+    plots.plot_country_performance(snapshot.country_performance, top_k=5)
+    assert len(sink.figures) == 2
+    assert sink.figures[1] is sink.figures[0] # Sin reconstruir ni deserializar
+    info = plots.get_figure_cache_info()
+    assert (info['hits'] - hits, info['entries']) == (1, 1)
+
+
+def test_figure_cache_key_uses_frame_object_and_params(sink, snapshot):
+    plots.plot_country_performance(snapshot.country_performance, top_k=5)
+    plots.plot_country_performance(snapshot.country_performance, top_k=6)
+    plots.plot_country_performance(snapshot.country_performance.copy(), top_k=5)
+    assert len({id(fig) for fig in sink.figures}) == 3
+    assert plots.get_figure_cache_info()['entries'] == 3
+
+
+def test_seller_lines_keep_period_order_after_downsampling(sink, monkeypatch):
+    # Series largas y distintas: LTTB conserva periodos diferentes en cada línea
+    periods = [f"{year}-{month:02d}" for year in range(2000, 2020) for month in range(1, 13)]
+    rows = [
+        {'Sales_Manager': f'Vendedor {s}', 'Period': period, 'Amount': (i * (s + 3)) % 97 + (s * 5 if i % (s + 2) == 0 else 0)}
+        for s in range(6) for i, period in enumerate(periods)
+    ]
+    df = pd.DataFrame(rows)
+    monkeypatch.setattr(plots, 'LINE_POINT_BUDGET', 300)
+    plots.plot_seller_performance_over_time(df, 'month', top_n=None)
+    fig = sink.figures[-1]
+    kept = [list(trace.x) for trace in fig.data]
+    assert sum(len(x) for x in kept) <= 300 + 3 * len(kept)
+    assert len({tuple(x) for x in kept}) > 1 # Las líneas conservan periodos distintos
+    # Orden efectivo del eje: el de categoryarray, que recorre los periodos cronológicamente
+    assert fig.layout.xaxis.categoryorder == 'array'
+    axis = list(fig.layout.xaxis.categoryarray)
+    assert axis == sorted(axis)
+    assert set().union(*kept) <= set(axis)
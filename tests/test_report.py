@@ -0,0 +1,52 @@
+import os
+import json
+import datetime
+import multiprocessing
+
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from src.report import MANIFEST_FILE, QTD_FILE, _TABLE_PANELS, ReportStore, build_report
+from src.utils import compute_dashboard_snapshot, generate_simulated_data, prepare_sales_data
+from src.cube import get_sales_cube
+
+AS_OF = datetime.date(2016, 5, 15)
+
+
+@pytest.fixture(scope='module')
+def sales():
+    return prepare_sales_data(generate_simulated_data(2000, seed=11))
+
+
+def _read(directory):
+    tables = {name: pd.read_parquet(os.path.join(directory, f"{name}.parquet")) for name in _TABLE_PANELS + ['last_orders']}
+    with open(os.path.join(directory, QTD_FILE), encoding="utf-8") as f:
+        qtd = json.load(f)
+    with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest.pop('created')
+    return tables, qtd, manifest
+
+
+def test_parallel_spawn_report_matches_serial(sales, tmp_path):
+    serial, parallel = tmp_path / 'serial', tmp_path / 'parallel'
+    build_report(sales, AS_OF, str(serial), workers=1)
+    build_report(sales, AS_OF, str(parallel), workers=2, mp_context=multiprocessing.get_context('spawn'))
+    serial_tables, serial_qtd, serial_manifest = _read(serial)
+    parallel_tables, parallel_qtd, parallel_manifest = _read(parallel)
+    for name, table in serial_tables.items():
+        pdt.assert_frame_equal(parallel_tables[name], table, obj=name)
+    assert parallel_qtd == serial_qtd
+    assert parallel_manifest == serial_manifest
+
+
+def test_report_store_serves_the_computed_panels(sales, tmp_path):
+    build_report(sales, AS_OF, str(tmp_path), workers=1)
+    store = ReportStore(str(tmp_path))
+    filters = {'Product': 'Product 1', 'License_Type': None, 'Region': 'UK'}
+    expected = compute_dashboard_snapshot(get_sales_cube(sales).filter(filters), store.manifest['quarters'], AS_OF)
+    served = store.qtd_metrics[('Product 1', None, 'UK')]
+    assert served == pytest.approx({name: float(value) for name, value in expected.qtd_metrics.items()})
+    # Los montos no se truncan al guardarlos
+    assert served['QTD Sales'] == pytest.approx(float(expected.qtd_metrics['QTD Sales']))
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import QUARTER_DAYS, RUNNING_BASELINES, RunningCurves, quarter_key_from_label
+
+# Días con ventas de cada trimestre: 2015Q1 termina antes del final de la matriz (día 90 de 92),
+# 2015Q3 y 2016Q2 no tienen ventas y 2016Q1 está a medias
+LAST_DAY = {'2015Q1': 90, '2015Q2': 91, '2015Q4': 92, '2016Q1': 45, '2016Q3': 30}
+
+
+@pytest.fixture(scope='module')
+def sales():
+    rng = np.random.default_rng(3)
+    rows = []
+    for label, last in LAST_DAY.items():
+        days = np.union1d(rng.choice(np.arange(1, last), size=last // 3, replace=False), [last])
+        for day in days:
+            # Dos filas el mismo día: from_amounts debe sumarlas
+            rows += [(quarter_key_from_label(label), day, int(rng.integers(1, 500))) for _ in range(2)]
+    return pd.DataFrame(rows, columns=['Quarter_Key', 'Day_Number', 'Amount'])
+
+
+@pytest.fixture(scope='module')
+def curves(sales):
+    return RunningCurves.from_amounts(sales['Quarter_Key'], sales['Day_Number'], sales['Amount'], QUARTER_DAYS, 'Day_Number')
+
+
+def _cumsum(sales, label):
+    # Total acumulado de referencia: vector denso de días del trimestre y np.cumsum
+    rows = sales[sales['Quarter_Key'] == quarter_key_from_label(label)]
+    daily = np.zeros(QUARTER_DAYS, dtype=np.int64)
+    np.add.at(daily, rows['Day_Number'].to_numpy() - 1, rows['Amount'].to_numpy())
+    return daily.cumsum()
+
+
+def _baseline(table, prefix):
+    rows = table[(table['Comparison_Type'] == 'Baseline') & table['Quarter_Label'].str.startswith(prefix)]
+    return rows.iloc[:, 0].to_numpy(), rows['Running_Total'].to_numpy() # Primera columna: día o semana
+
+
+def test_selected_quarters_match_cumsum(sales, curves):
+    table = curves.running_totals(['2015Q1', '2016Q1'])
+    for label in ['2015Q1', '2016Q1']:
+        rows = table[table['Quarter_Label'] == label]
+        days = np.sort(sales.loc[sales['Quarter_Key'] == quarter_key_from_label(label), 'Day_Number'].unique())
+        assert rows['Day_Number'].tolist() == days.tolist() # Solo los días con ventas
+        assert rows['Running_Total'].tolist() == _cumsum(sales, label)[days - 1].tolist()
+
+
+def test_prior_quarter_and_last_year(sales, curves):
+    table = curves.running_totals(['2016Q1'], baselines=['prior_quarter', 'last_year'])
+    days, totals = _baseline(table, RUNNING_BASELINES['prior_quarter'])
+    assert table.loc[table['Quarter_Label'].str.startswith(RUNNING_BASELINES['prior_quarter']), 'Quarter_Label'].iloc[0].endswith('(2015Q4)')
+    assert days.tolist() == list(range(1, 93))
+    assert totals.tolist() == _cumsum(sales, '2015Q4').tolist()
+    # 2015Q1 tiene 90 días: la curva se corta en su último día con ventas, no en el 92
+    days, totals = _baseline(table, RUNNING_BASELINES['last_year'])
+    assert days.tolist() == list(range(1, 91))
+    assert totals.tolist() == _cumsum(sales, '2015Q1')[:90].tolist()
+
+
+def test_average_of_available_quarters(sales, curves):
+    table = curves.running_totals(['2016Q1'], baselines=['average'], average_quarters=4)
+    # De 2015Q1-2015Q4 solo hay tres trimestres con ventas: 2015Q3 no cuenta en la media
+    label = RUNNING_BASELINES['average'].format(n=3)
+    rows = table[table['Quarter_Label'] == label]
+    expected = np.mean([_cumsum(sales, q) for q in ['2015Q1', '2015Q2', '2015Q4']], axis=0)
+    assert rows['Day_Number'].tolist() == list(range(1, 93))
+    np.testing.assert_allclose(rows['Running_Total'].to_numpy(), expected)
+
+
+def test_missing_baselines_are_skipped(sales, curves):
+    # 2016Q3: no hay 2016Q2 ni 2015Q3, solo la media de 2015Q4 y 2016Q1
+    table = curves.running_totals(['2016Q3'], baselines=['prior_quarter', 'last_year', 'average'])
+    baselines = table.loc[table['Comparison_Type'] == 'Baseline', 'Quarter_Label'].unique().tolist()
+    assert baselines == [RUNNING_BASELINES['average'].format(n=2)]
+    expected = np.mean([_cumsum(sales, q) for q in ['2015Q4', '2016Q1']], axis=0)
+    np.testing.assert_allclose(table.loc[table['Comparison_Type'] == 'Baseline', 'Running_Total'].to_numpy(), expected)
+
+
+def test_weekly_baselines_read_day_totals(sales, curves):
+    table = curves.weekly().running_totals(['2016Q1'], baselines=['last_year'])
+    days, totals = _baseline(table, RUNNING_BASELINES['last_year'])
+    # Semana w acaba el día 7w (la 14 solo tiene el día 92); 2015Q1 termina en la semana 13
+    ends = np.minimum(np.arange(1, 14) * 7, QUARTER_DAYS) - 1
+    assert days.tolist() == list(range(1, 14))
+    assert totals.tolist() == _cumsum(sales, '2015Q1')[ends].tolist()
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from src.utils import SIM_BLOCK_ROWS, generate_simulated_data, iter_simulated_chunks
+
+# Más de dos bloques y un último bloque incompleto
+NUM_RECORDS = 2 * SIM_BLOCK_ROWS + 1234
+
+
+def _assert_same(left, right):
+    # DataFrame.equals compara valores, tipos e índice; assert_frame_equal tarda segundos con Company
+    assert left.dtypes.equals(right.dtypes)
+    assert left.equals(right)
+
+
+@pytest.fixture(scope='module')
+def reference():
+    return generate_simulated_data(NUM_RECORDS, seed=9)
+
+
+def test_same_seed_same_data(reference):
+    _assert_same(generate_simulated_data(NUM_RECORDS, seed=9), reference)
+    assert not generate_simulated_data(NUM_RECORDS, seed=10).equals(reference)
+
+
+@pytest.mark.parametrize('chunk_size, workers', [
+    (1, 1), # Se redondea a un bloque por fragmento
+    (SIM_BLOCK_ROWS, 1),
+    (2 * SIM_BLOCK_ROWS - 1, 1),
+    (10 * SIM_BLOCK_ROWS, 1), # Un único fragmento
+    (1, 2),
+])
+def test_chunks_independent_of_chunk_size(reference, chunk_size, workers):
+    chunks = list(iter_simulated_chunks(NUM_RECORDS, seed=9, chunk_size=chunk_size, workers=workers))
+    # Cada fragmento lleva su tramo del índice global: se concatenan sin reindexar
+    _assert_same(pd.concat(chunks), reference)
+
+
+def test_prefix_is_stable(reference):
+    # Los bloques completos no dependen del número total de registros
+    _assert_same(generate_simulated_data(SIM_BLOCK_ROWS, seed=9), reference.iloc[:SIM_BLOCK_ROWS])